@@ -4,13 +4,20 @@ Core Ability System for Vyuha VTT
 Handles validation, targeting, effects, and execution of all abilities.
 """
 
-from typing import List, Dict, Any, Optional, Tuple
-from sqlalchemy.orm import Session
+from typing import List, Dict, Any, Optional, Tuple, Union
+import numpy as np
+from sqlalchemy import update, values, column, Integer
+from sqlalchemy.orm import Session, joinedload
+from sqlalchemy.orm.exc import StaleDataError
 from . import models
 from pydantic import BaseModel
 import math
-import random
-from . import loka_system
+from . import rules_engine
+from .combat_state import CommittedView, SessionState
+from .rules_catalog import rules_catalog
+from .stat_blocks import stat_blocks
+from .spatial_index import spatial_index
+from .session_rng import session_rngs
 
 # ==================================
 # Pydantic Schemas for Type Safety
@@ -28,6 +35,7 @@ class AbilityExecutionRequest(BaseModel):
     ability_id: int
     primary_target: TargetInfo
     secondary_targets: List[TargetInfo] = []
+    expected_version: Optional[int] = None  # GameSession.version_id the client acted on; checked by the endpoint
 
 class AbilityExecutionResult(BaseModel):
     """Result of ability execution"""
@@ -36,6 +44,29 @@ class AbilityExecutionResult(BaseModel):
     log_events: List[Dict[str, Any]] = []
     affected_participants: List[int] = []
 
+class TargetOdds(BaseModel):
+    """Odds of an ability's effect on one participant"""
+    participant_id: int
+    name: str
+    evasion_dc: Optional[int] = None
+    hit_chance: float
+    expected: float
+    distribution: List[Tuple[int, float]] = []  # (amount, probability) when the effect lands
+    downed_chance: float = 0.0
+
+class AbilityPreviewResult(BaseModel):
+    """What executing an ability would do, without executing it"""
+    success: bool
+    message: str = ""
+    effect_type: Optional[str] = None
+    cost: int = 0
+    to_hit_modifier: Optional[int] = None
+    effect_modifier: int = 0
+    targets: List[TargetOdds] = []
+
+# How often the pipeline is re-run when a row it wrote was changed concurrently
+MAX_STALE_RETRIES = 3
+
 # ==================================
 # Helper Functions
 # ==================================
@@ -55,15 +86,22 @@ def get_participants_in_radius(
     center_y: int, 
     radius: int
 ) -> List[models.SessionCharacter]:
-    """Get all participants within a given radius of a point"""
-    all_participants = db.query(models.SessionCharacter).filter(
-        models.SessionCharacter.session_id == session_id,
-        models.SessionCharacter.x_pos.isnot(None)
-    ).all()
+    """Get all participants within a given radius of a point (only the matches are loaded)"""
+    participant_ids = spatial_index.get(db, session_id).within(center_x, center_y, radius)
+    if not participant_ids:
+        return []
+    # With their characters: stat blocks and log details need them for every target
+    participants = db.query(models.SessionCharacter).options(
+        joinedload(models.SessionCharacter.character)
+    ).filter(
+        models.SessionCharacter.id.in_(participant_ids)
+    ).order_by(models.SessionCharacter.id).all()
     
+    # The rows have the final say, in case another worker moved a token since the index was built
     return [
-        p for p in all_participants 
-        if calculate_distance(p.x_pos, p.y_pos, center_x, center_y) <= radius
+        p for p in participants 
+        if p.session_id == session_id and p.x_pos is not None
+        and calculate_distance(p.x_pos, p.y_pos, center_x, center_y) <= radius
     ]
 
 # ==================================
@@ -76,12 +114,44 @@ class AbilitySystem:
     Handles validation, targeting, resource management, and effect application.
     """
     
-    def __init__(self, db: Session, session_id: int):
+    def __init__(self, db: Session, session_id: int, combat: Optional[Union[SessionState, CommittedView]] = None):
         self.db = db
         self.session_id = session_id
-        self.session = db.query(models.GameSession).filter(
-            models.GameSession.id == session_id
-        ).first()
+        # In hot state mode participants and the session are the in-memory objects (or, for
+        # previews, a CommittedView of them); db is then only used to read abilities and inventory.
+        self.combat = combat
+        if combat is not None:
+            self.session = combat
+        else:
+            self.session = db.query(models.GameSession).filter(
+                models.GameSession.id == session_id
+            ).first()
+        self._rng = None
+
+    @property
+    def rng(self):
+        """The session's dice stream, taken on the first roll (previews never take it)."""
+        if self._rng is None:
+            self._rng = session_rngs.stream(self.db, self.session)
+        return self._rng
+
+    def _get_participant(self, participant_id: Optional[int], in_session: bool = True):
+        if self.combat is not None:
+            return self.combat.participants.get(participant_id)
+        query = self.db.query(models.SessionCharacter).filter(models.SessionCharacter.id == participant_id)
+        if in_session:
+            query = query.filter(models.SessionCharacter.session_id == self.session_id)
+        return query.first()
+
+    def _participants_in_radius(self, center_x: int, center_y: int, radius: int) -> list:
+        if self.combat is not None:
+            return [self.combat.participants[pid] for pid in self.combat.grid.within(center_x, center_y, radius)]
+        return get_participants_in_radius(self.db, self.session_id, center_x, center_y, radius)
+
+    def _mark_changed(self, participant):
+        # In-memory participants are diffed by the actor when the command commits
+        if self.combat is None:
+            self.db.add(participant)
     
     # ==================================
     # Validation Methods
@@ -134,33 +204,17 @@ class AbilitySystem:
         
         # Check resource costs
         active_resonance, is_enhanced = self._get_active_resonance(actor.character)
-        has_loka_resistance = actor.character.has_loka_resistance
+        modified_cost = rules_engine.ability_cost(
+            ability, active_resonance, is_enhanced, actor.character.has_loka_resistance
+        )
     
         if ability.resource_type == models.ResourceType.TAPAS:
-        # Calculate modified cost
-            modified_cost = loka_system.apply_resonance_to_ability_cost(
-                base_cost=ability.resource_cost,
-                ability_resource="tapas",
-                active_resonance=active_resonance,
-                is_enhanced=is_enhanced,
-                has_loka_resistance=has_loka_resistance
-            )
-        
-        if actor.current_tapas < modified_cost:
-            return False, f"Insufficient Tapas (need {modified_cost}, have {actor.current_tapas})."
+            if actor.current_tapas < modified_cost:
+                return False, f"Insufficient Tapas (need {modified_cost}, have {actor.current_tapas})."
     
         elif ability.resource_type == models.ResourceType.MAYA:
-        # Calculate modified cost
-            modified_cost = loka_system.apply_resonance_to_ability_cost(
-                base_cost=ability.resource_cost,
-                ability_resource="maya",
-                active_resonance=active_resonance,
-                is_enhanced=is_enhanced,
-                has_loka_resistance=has_loka_resistance
-        )
-        
-        if actor.current_maya < modified_cost:
-            return False, f"Insufficient Māyā (need {modified_cost}, have {actor.current_maya})."
+            if actor.current_maya < modified_cost:
+                return False, f"Insufficient Māyā (need {modified_cost}, have {actor.current_maya})."
     
         elif ability.resource_type == models.ResourceType.SPEED:
         # Movement doesn't use resonance
@@ -201,9 +255,7 @@ class AbilitySystem:
         
         # Example: {"min_prajna": 14}
         if "min_prajna" in requirements:
-            from .main import CharacterSchema  # Import to calculate attributes
-            char_schema = CharacterSchema.model_validate(actor.character)
-            if char_schema.prajna < requirements["min_prajna"]:
+            if stat_blocks.for_character(actor.character).prajna < requirements["min_prajna"]:
                 return False, f"Requires Prajñā {requirements['min_prajna']} or higher."
         
         # Add more requirement types as needed
@@ -245,10 +297,7 @@ class AbilitySystem:
         if target_info.participant_id is None:
             return False, "Must specify a target participant.", None
         
-        target = self.db.query(models.SessionCharacter).filter(
-            models.SessionCharacter.id == target_info.participant_id,
-            models.SessionCharacter.session_id == self.session_id
-        ).first()
+        target = self._get_participant(target_info.participant_id)
         
         if not target:
             return False, "Invalid target.", None
@@ -274,6 +323,36 @@ class AbilitySystem:
             return False, "Can only target enemies.", None
         
         return True, "", target
+
+    def validate_secondary_targets(
+        self,
+        actor: models.SessionCharacter,
+        ability: models.Ability,
+        targets_info: List[TargetInfo],
+        primary_target: Optional[models.SessionCharacter]
+    ) -> Tuple[bool, str, List[models.SessionCharacter]]:
+        """
+        Validates extra targets of a multi-target ability (requirements: {"max_targets": 3}).
+        Returns (is_valid, error_message, targets)
+        """
+        if not targets_info:
+            return True, "", []
+        max_targets = (ability.requirements or {}).get("max_targets", 1)
+        if ability.target_type not in [models.TargetType.ENEMY, models.TargetType.ALLY] or ability.effect_radius > 0 \
+                or len(targets_info) + 1 > max_targets:
+            return False, f"{ability.name} can't take more than {max_targets} target(s).", []
+        
+        targets = []
+        chosen = {primary_target.id}
+        for target_info in targets_info:
+            is_valid, error_msg, target = self.validate_targeting(actor, ability, target_info)
+            if not is_valid:
+                return False, error_msg, []
+            if target.id in chosen:
+                return False, "The same target can't be chosen twice.", []
+            chosen.add(target.id)
+            targets.append(target)
+        return True, "", targets
     
     # ==================================
     # Resource Management
@@ -296,26 +375,14 @@ class AbilitySystem:
         
         # Consume resources
         active_resonance, is_enhanced = self._get_active_resonance(actor.character)
-        has_loka_resistance = actor.character.has_loka_resistance
+        modified_cost = rules_engine.ability_cost(
+            ability, active_resonance, is_enhanced, actor.character.has_loka_resistance
+        )
     
         if ability.resource_type == models.ResourceType.TAPAS:
-            modified_cost = loka_system.apply_resonance_to_ability_cost(
-            base_cost=ability.resource_cost,
-            ability_resource="tapas",
-            active_resonance=active_resonance,
-            is_enhanced=is_enhanced,
-            has_loka_resistance=has_loka_resistance
-        )
             actor.current_tapas -= modified_cost
         
         elif ability.resource_type == models.ResourceType.MAYA:
-            modified_cost = loka_system.apply_resonance_to_ability_cost(
-            base_cost=ability.resource_cost,
-            ability_resource="maya",
-            active_resonance=active_resonance,
-            is_enhanced=is_enhanced,
-            has_loka_resistance=has_loka_resistance
-        )
             actor.current_maya -= modified_cost
         
         elif ability.resource_type == models.ResourceType.SPEED:
@@ -324,12 +391,53 @@ class AbilitySystem:
         elif ability.resource_type == models.ResourceType.PRANA:
             actor.current_prana = max(0, actor.current_prana - ability.resource_cost)
     
-        self.db.add(actor)
+        self._mark_changed(actor)
     
     # ==================================
     # Effect Application
     # ==================================
     
+    def _to_hit_modifier(self, actor: models.SessionCharacter, ability: models.Ability) -> int:
+        """The actor's to-hit modifier for ability, Loka resonance included."""
+        active_resonance, is_enhanced = self._get_active_resonance(actor.character)
+        return rules_engine.to_hit_modifier(
+            stat_blocks.for_character(actor.character), ability,
+            active_resonance, is_enhanced, actor.character.has_loka_resistance
+        )
+
+    def _write_effects(self, changes: List[Tuple[Any, Dict[str, Any]]]):
+        """
+        Writes (participant, column values) pairs, all with the same columns. In-memory
+        participants are changed in place; rows get a single UPDATE ... FROM (VALUES ...)
+        that checks and bumps every row's version, like the ORM's own UPDATEs do.
+        """
+        if not changes:
+            return
+        if self.combat is not None:
+            for participant, changed in changes:
+                for key, value in changed.items():
+                    setattr(participant, key, value)
+            return
+        
+        # Pending changes (e.g. the actor's resource cost) go first, the rows below are then reloaded
+        self.db.flush()
+        table = models.SessionCharacter.__table__
+        keys = list(changes[0][1])
+        batch = values(
+            column("id", Integer), column("version_id", Integer), *(column(key, table.c[key].type) for key in keys),
+            name="batch"
+        ).data([(participant.id, participant.version_id, *(changed[key] for key in keys)) for participant, changed in changes])
+        updated = self.db.execute(
+            update(table)
+            .where(table.c.id == batch.c.id, table.c.version_id == batch.c.version_id)
+            .values({**{key: batch.c[key] for key in keys}, "version_id": table.c.version_id + 1})
+            .returning(table.c.id)
+        ).scalars().all()
+        if len(updated) != len(changes):
+            raise StaleDataError(f"Batch UPDATE of session_characters matched {len(updated)} of {len(changes)} rows.")
+        for participant, _ in changes:
+            self.db.expire(participant, keys + ["version_id"])
+
     def apply_damage_effect(
         self, 
         actor: models.SessionCharacter,
@@ -340,82 +448,60 @@ class AbilitySystem:
         Applies a damage effect with attack roll.
         Returns log details.
         """
-        from .main import CharacterSchema
-        
-        actor_char = CharacterSchema.model_validate(actor.character)
-        target_char = CharacterSchema.model_validate(target.character)
-        
-        active_resonance, is_enhanced = self._get_active_resonance(actor.character)
-        has_loka_resistance = actor.character.has_loka_resistance
-    
-        # Determine if this is a Tapas or Maya ability based on its cost
-        if ability.resource_type == models.ResourceType.TAPAS:
-            ability_resource = "tapas"
-        elif ability.resource_type == models.ResourceType.MAYA:
-            ability_resource = "maya"
-        else:
-            ability_resource = None
-    
-        # Apply resonance modifier to the to-hit modifier
-        if ability_resource:
-            resonance_mod = loka_system.apply_resonance_to_ability_roll(
-                base_roll=0,  # We're modifying the modifier, not the d20 roll itself
-                ability_resource=ability_resource,
-                active_resonance=active_resonance,
-                is_enhanced=is_enhanced,
-                has_loka_resistance=has_loka_resistance
-            )
-            to_hit_mod += resonance_mod
-
+        return self.apply_damage_batch(actor, [target], ability)[0]
 
-        attack_roll = random.randint(1, 20)
-        total_attack = attack_roll + to_hit_mod
+    def apply_damage_batch(
+        self,
+        actor: models.SessionCharacter,
+        targets: List[models.SessionCharacter],
+        ability: models.Ability
+    ) -> List[Dict[str, Any]]:
+        """
+        Applies a damage effect to all targets at once: the actor's modifiers are worked
+        out once, every attack and damage die is drawn in one go, and the targets that
+        were hit are written together. Returns log details per target, in order.
+        """
+        if not targets:
+            return []
+        to_hit_mod = self._to_hit_modifier(actor, ability)
+        damage_mod = rules_engine.damage_modifier(stat_blocks.for_character(actor.character), ability)
+        
+        # Evasion DCs
+        evasion_dcs = np.array([rules_engine.evasion_dc(stat_blocks.for_character(t.character)) for t in targets])
         
-        # Evasion DC
-        evasion_dc = 10 + get_modifier(target_char.dakshata)
+        first_draw = self.rng.draws
+        attack_rolls = self.rng.integers(1, 21, size=len(targets))
+        damage_rolls = rules_engine.ability_dice(ability).roll(self.rng, len(targets))
         
         # Hit or Miss
-        if total_attack >= evasion_dc:
-            # Calculate damage
-            damage_mod = 0
-            if ability.damage_attribute:
-                damage_mod = get_modifier(getattr(actor_char, ability.damage_attribute))
-            
-            num, dice = map(int, ability.damage_dice.split('d'))
-            damage_roll = sum(random.randint(1, dice) for _ in range(num))
-            total_damage = max(0, damage_roll + damage_mod)
-            
-            # Apply damage
-            target.current_prana = max(0, target.current_prana - total_damage)
-            self.db.add(target)
-            
-            # Check if downed
-            if target.current_prana == 0:
-                target.status = "downed"
-                self.db.add(target)
-            
-            return {
-                "event_type": "attack_hit",
-                "actor_name": actor.character.name,
-                "target_name": target.character.name,
-                "ability_name": ability.name,
-                "roll": attack_roll,
-                "modifier": to_hit_mod,
-                "total": total_attack,
-                "dc": evasion_dc,
-                "damage": total_damage
-            }
-        else:
-            return {
-                "event_type": "attack_miss",
+        totals, hits, damage, new_prana = rules_engine.resolve_attacks(
+            attack_rolls, to_hit_mod, evasion_dcs, damage_rolls, damage_mod,
+            np.array([t.current_prana for t in targets])
+        )
+        
+        log_details = []
+        changes = []
+        for i, target in enumerate(targets):
+            details = {
+                "event_type": "attack_hit" if hits[i] else "attack_miss",
                 "actor_name": actor.character.name,
                 "target_name": target.character.name,
                 "ability_name": ability.name,
-                "roll": attack_roll,
+                "roll": int(attack_rolls[i]),
                 "modifier": to_hit_mod,
-                "total": total_attack,
-                "dc": evasion_dc
+                "total": int(totals[i]),
+                "dc": int(evasion_dcs[i]),
+                "rng_draw": first_draw
             }
+            if hits[i]:
+                details["damage"] = int(damage[i])
+                # Check if downed
+                prana = int(new_prana[i])
+                changes.append((target, {"current_prana": prana, "status": "downed" if prana == 0 else target.status}))
+            log_details.append(details)
+        
+        self._write_effects(changes)
+        return log_details
     
     def apply_healing_effect(
         self,
@@ -424,36 +510,47 @@ class AbilitySystem:
         ability: models.Ability
     ) -> Dict[str, Any]:
         """Applies a healing effect"""
-        from .main import CharacterSchema
-        print(f"DEBUG_HEAL: Applying heal effect from {ability.name} to {target.character.name}")
-        print(f"DEBUG_HEAL: Target's Prana BEFORE heal: {target.current_prana}")
-        target_char = CharacterSchema.model_validate(target.character)
-        
-        # Calculate healing
-        num, dice = map(int, ability.damage_dice.split('d'))  # Reuse damage_dice for healing
-        healing_roll = sum(random.randint(1, dice) for _ in range(num))
+        return self.apply_healing_batch(actor, [target], ability)[0]
+
+    def apply_healing_batch(
+        self,
+        actor: models.SessionCharacter,
+        targets: List[models.SessionCharacter],
+        ability: models.Ability
+    ) -> List[Dict[str, Any]]:
+        """Applies a healing effect to all targets at once, see apply_damage_batch()"""
+        if not targets:
+            return []
+        print(f"DEBUG_HEAL: Applying heal effect from {ability.name} to {len(targets)} target(s)")
         
         # Add modifier if applicable
-        healing_mod = 0
-        if ability.damage_attribute:
-            actor_char = CharacterSchema.model_validate(actor.character)
-            healing_mod = get_modifier(getattr(actor_char, ability.damage_attribute))
+        healing_mod = rules_engine.damage_modifier(stat_blocks.for_character(actor.character), ability)
         
-        total_healing = healing_roll + healing_mod
+        # Calculate healing
+        first_draw = self.rng.draws
+        healing_rolls = rules_engine.ability_dice(ability).roll(self.rng, len(targets))  # Reuse damage_dice for healing
         
         # Apply healing
-        old_prana = target.current_prana
-        target.current_prana = min(target.current_prana + total_healing, target_char.max_prana)
-        actual_healing = target.current_prana - old_prana
-        self.db.add(target)
+        old_prana = np.array([t.current_prana for t in targets])
+        max_prana = np.array([stat_blocks.for_character(t.character).max_prana for t in targets])
+        new_prana = rules_engine.resolve_healing(healing_rolls, healing_mod, old_prana, max_prana)
+        
+        log_details = []
+        changes = []
+        for i, target in enumerate(targets):
+            if new_prana[i] != old_prana[i]:
+                changes.append((target, {"current_prana": int(new_prana[i])}))
+            log_details.append({
+                "event_type": "heal",
+                "actor_name": actor.character.name,
+                "target_name": target.character.name,
+                "ability_name": ability.name,
+                "healing": int(new_prana[i] - old_prana[i]),
+                "rng_draw": first_draw
+            })
         
-        return {
-            "event_type": "heal",
-            "actor_name": actor.character.name,
-            "target_name": target.character.name,
-            "ability_name": ability.name,
-            "healing": actual_healing
-        }
+        self._write_effects(changes)
+        return log_details
     
     def apply_teleport_effect(
         self,
@@ -485,12 +582,12 @@ class AbilitySystem:
         # 1. Update the actor's position
         actor.x_pos = target_pos.x
         actor.y_pos = target_pos.y
-        self.db.add(actor)
+        self._mark_changed(actor)
         
         # 2. Add Status Effect if specified (e.g., 'invisible_until_next_turn' for Shadow Step)
         if ability.status_effect:
             actor.status = ability.status_effect
-            self.db.add(actor)
+            self._mark_changed(actor)
         
         # 3. Return log details
         return {
@@ -512,35 +609,115 @@ class AbilitySystem:
     ) -> AbilityExecutionResult:
         """
         Main entry point for ability execution.
-        Orchestrates the entire resolution pipeline.
+        Runs the resolution pipeline inside a SAVEPOINT. If another writer bumped the
+        version of a row it touched (StaleDataError), only that attempt is rolled back
+        and the pipeline re-runs against the fresh rows.
+        In hot state mode there is a single writer, so nothing can go stale and the
+        changes are committed to the in-memory state directly.
+        """
+        if self.combat is not None:
+            result = self._resolve_ability(request)
+            self.combat.commit()
+            return result
+
+        for attempt in range(1, MAX_STALE_RETRIES + 2):
+            # Taken again each attempt, from where the rolled-back one left it
+            self._rng = None
+            savepoint = self.db.begin_nested()
+            try:
+                result = self._resolve_ability(request)
+                savepoint.commit()
+            except StaleDataError:
+                savepoint.rollback()
+                if attempt > MAX_STALE_RETRIES:
+                    return AbilityExecutionResult(
+                        success=False,
+                        message="The session changed while the ability resolved. Please try again."
+                    )
+                print(f"DEBUG: Stale row while executing ability {request.ability_id}, retrying ({attempt}/{MAX_STALE_RETRIES}).")
+                continue
+            except Exception:
+                savepoint.rollback()
+                raise
+
+            # 7. Commit changes
+            self.db.commit()
+            return result
+
+    def _validate_request(self, request: AbilityExecutionRequest) -> Tuple[str, Any, Any, Any, List[Any]]:
+        """
+        Loads and validates actor, ability and targets.
+        Returns (error_message, actor, ability, primary_target, secondary_targets); error_message is "" if valid.
         """
-        print(f"DEBUG: Executing ability {request.ability_id} by actor {request.actor_id}.")
-        print(f"DEBUG: Primary target received: {request.primary_target.model_dump()}")
         # 1. Load actor and ability
-        actor = self.db.query(models.SessionCharacter).filter(
-            models.SessionCharacter.id == request.actor_id
-        ).first()
+        actor = self._get_participant(request.actor_id, in_session=False)
         
-        ability = self.db.query(models.Ability).filter(
-            models.Ability.id == request.ability_id
-        ).first()
+        ability = rules_catalog.get(self.db).abilities.by_id.get(request.ability_id)
         
         if not actor or not ability:
-            return AbilityExecutionResult(
-                success=False,
-                message="Invalid actor or ability."
-            )
+            return "Invalid actor or ability.", actor, ability, None, []
         
         # 2. Validate ability use
         is_valid, error_msg = self.validate_ability_use(actor, ability)
         if not is_valid:
-            return AbilityExecutionResult(success=False, message=error_msg)
+            return error_msg, actor, ability, None, []
         
         # 3. Validate targeting
         is_valid, error_msg, primary_target = self.validate_targeting(
             actor, ability, request.primary_target
         )
         if not is_valid:
+            return error_msg, actor, ability, None, []
+        is_valid, error_msg, secondary_targets = self.validate_secondary_targets(
+            actor, ability, request.secondary_targets, primary_target
+        )
+        if not is_valid:
+            return error_msg, actor, ability, primary_target, []
+        return "", actor, ability, primary_target, secondary_targets
+
+    def _affected_participants(
+        self,
+        actor: models.SessionCharacter,
+        ability: models.Ability,
+        request: AbilityExecutionRequest,
+        primary_target: Optional[models.SessionCharacter],
+        secondary_targets: List[models.SessionCharacter]
+    ) -> list:
+        """Participants the effect of a validated (non-teleport) request lands on."""
+        if ability.target_type == models.TargetType.SELF:
+            print("DEBUG: Validation PASSED for SELF target.")
+            return [actor]
+        
+        if ability.target_type == models.TargetType.GROUND:
+            # Area of effect
+            return self._participants_in_radius(
+                request.primary_target.x, request.primary_target.y,
+                ability.effect_radius
+            )
+        
+        if ability.target_type in [models.TargetType.ENEMY, models.TargetType.ALLY]:
+            # Single target or area around target
+            if ability.effect_radius > 0:
+                return self._participants_in_radius(
+                    primary_target.x_pos, primary_target.y_pos,
+                    ability.effect_radius
+                )
+            return [primary_target] + secondary_targets
+        return []
+
+    def _resolve_ability(
+        self, 
+        request: AbilityExecutionRequest
+    ) -> AbilityExecutionResult:
+        """
+        The resolution pipeline itself. Leaves its changes pending;
+        execute_ability() flushes and commits them.
+        """
+        print(f"DEBUG: Executing ability {request.ability_id} by actor {request.actor_id}.")
+        print(f"DEBUG: Primary target received: {request.primary_target.model_dump()}")
+        # 1-3. Load and validate actor, ability and targets
+        error_msg, actor, ability, primary_target, secondary_targets = self._validate_request(request)
+        if error_msg:
             return AbilityExecutionResult(success=False, message=error_msg)
         
         # 4. Consume resources
@@ -548,13 +725,8 @@ class AbilitySystem:
             self.consume_resources(actor, ability)
         
         # 5. Determine affected participants
-        affected = []
         log_events = []
         
-        if ability.target_type == models.TargetType.SELF:
-            print("DEBUG: Validation PASSED for SELF target.")
-            affected = [actor]
-        
         if ability.effect_type == "teleport":
                 # Only the actor is affected, and the target is the position
                 log_detail = self.apply_teleport_effect(
@@ -571,43 +743,74 @@ class AbilitySystem:
                     affected_participants=[actor.id]
                 )
 
-        elif ability.target_type == models.TargetType.GROUND:
-            # Area of effect
-            affected = get_participants_in_radius(
-                self.db, self.session_id,
-                request.primary_target.x, request.primary_target.y,
-                ability.effect_radius
-            )
+        affected = self._affected_participants(actor, ability, request, primary_target, secondary_targets)
         
-        elif ability.target_type in [models.TargetType.ENEMY, models.TargetType.ALLY]:
-            # Single target or area around target
-            if ability.effect_radius > 0:
-                affected = get_participants_in_radius(
-                    self.db, self.session_id,
-                    primary_target.x_pos, primary_target.y_pos,
-                    ability.effect_radius
-                )
-            else:
-                affected = [primary_target]
+        # 6. Apply effects to all affected participants, as one batch
+        if ability.effect_type == "damage":
+            log_events.extend(self.apply_damage_batch(actor, affected, ability))
         
-        # 6. Apply effects to all affected participants
-        for target in affected:
-            if ability.effect_type == "damage":
-                log_detail = self.apply_damage_effect(actor, target, ability)
-                log_events.append(log_detail)
-            
-            elif ability.effect_type == "heal":
-                log_detail = self.apply_healing_effect(actor, target, ability)
-                log_events.append(log_detail)
-            
-            # Add more effect types here (buff, debuff, teleport, etc.)
+        elif ability.effect_type == "heal":
+            log_events.extend(self.apply_healing_batch(actor, affected, ability))
         
-        # 7. Commit changes
-        self.db.commit()
+        # Add more effect types here (buff, debuff, teleport, etc.)
         
         return AbilityExecutionResult(
             success=True,
             message=f"{actor.character.name} used {ability.name}!",
             log_events=log_events,
             affected_participants=[p.id for p in affected]
-        )
\ No newline at end of file
+        )
+
+    # ==================================
+    # Preview
+    # ==================================
+
+    def preview_ability(self, request: AbilityExecutionRequest) -> AbilityPreviewResult:
+        """
+        Exact odds of executing request right now, per affected participant.
+        Runs the same validation as execute_ability() but changes nothing and rolls nothing.
+        """
+        error_msg, actor, ability, primary_target, secondary_targets = self._validate_request(request)
+        if error_msg:
+            return AbilityPreviewResult(success=False, message=error_msg)
+        
+        active_resonance, is_enhanced = self._get_active_resonance(actor.character)
+        actor_stats = stat_blocks.for_character(actor.character)
+        preview = AbilityPreviewResult(
+            success=True,
+            effect_type=ability.effect_type,
+            cost=rules_engine.ability_cost(ability, active_resonance, is_enhanced, actor.character.has_loka_resistance),
+            effect_modifier=rules_engine.damage_modifier(actor_stats, ability)
+        )
+        if ability.effect_type not in ("damage", "heal") or not ability.damage_dice:
+            return preview
+        
+        affected = self._affected_participants(actor, ability, request, primary_target, secondary_targets)
+        if ability.effect_type == "damage":
+            preview.to_hit_modifier = self._to_hit_modifier(actor, ability)
+            for target in affected:
+                dc = rules_engine.evasion_dc(stat_blocks.for_character(target.character))
+                odds = rules_engine.attack_odds(ability.damage_dice, preview.effect_modifier, preview.to_hit_modifier, dc)
+                preview.targets.append(TargetOdds(
+                    participant_id=target.id,
+                    name=target.character.name,
+                    evasion_dc=dc,
+                    hit_chance=odds.hit_chance,
+                    expected=odds.expected_damage,
+                    distribution=list(odds.damage),
+                    downed_chance=rules_engine.downed_chance(odds, target.current_prana)
+                ))
+        else:
+            for target in affected:
+                healing = rules_engine.healing_odds(
+                    ability.damage_dice, preview.effect_modifier,
+                    target.current_prana, stat_blocks.for_character(target.character).max_prana
+                )
+                preview.targets.append(TargetOdds(
+                    participant_id=target.id,
+                    name=target.character.name,
+                    hit_chance=1.0,
+                    expected=sum(amount * p for amount, p in healing),
+                    distribution=list(healing)
+                ))
+        return preview
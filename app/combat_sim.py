@@ -0,0 +1,359 @@
+# app/combat_sim.py
+"""
+Headless Monte Carlo combat simulator for encounter balancing.
+Characters are reduced to compact specs (stat block numbers and attack
+profiles, resonance already applied) and N independent fights are run side
+by side as NumPy arrays, one row per fight, with the pure rules from
+rules_engine.py. Chunks of fights are spread over a ProcessPoolExecutor.
+
+Each round every standing combatant, in initiative order, attacks a random
+standing enemy with its first affordable attack (strongest first) and pays
+its Tapas / Maya. Healing, movement, range and ability requirements are not
+modelled, so results compare encounters rather than predict a table.
+
+    python -m app.combat_sim --party "Devrath the Dutiful,Tara the Mystic" \\
+        --enemies "Rakshasa Warrior*3,Rakshasa Chieftain" --fights 20000 --resonance Paatala
+"""
+
+import argparse
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Any, List, NamedTuple, Optional, Sequence, Tuple
+
+import numpy as np
+import orjson
+from sqlalchemy.orm import Session, joinedload, selectinload
+
+from . import models, rules_engine
+from .dice import DiceExpression
+from .rules_catalog import rules_catalog
+from .stat_blocks import stat_blocks
+
+PARTY, ENEMIES = 0, 1
+TEAM_NAMES = ("party", "enemies")
+
+# Resource an attack is paid with
+NO_RESOURCE, TAPAS, MAYA = 0, 1, 2
+
+DEFAULT_MAX_ROUNDS = 50
+DEFAULT_CHUNK = 10000
+
+# ==================================
+# Specs
+# ==================================
+
+class AttackProfile(NamedTuple):
+    name: str
+    to_hit: int
+    damage: DiceExpression
+    damage_mod: int
+    cost: int
+    resource: int
+
+    def expected_damage(self) -> float:
+        return self.damage.mean + self.damage_mod
+
+class CombatantSpec(NamedTuple):
+    name: str
+    team: int
+    max_prana: int
+    max_tapas: int
+    max_maya: int
+    evasion_dc: int
+    initiative_mod: int
+    dakshata: int
+    attacks: Tuple[AttackProfile, ...]
+
+def combatant_spec(character: models.Character, team: int, abilities: Sequence, active_resonance: str = "none", is_enhanced: bool = False) -> CombatantSpec:
+    """Spec of a character (race, class and inventory loaded) with the given learned abilities."""
+    stats = stat_blocks.for_character(character)
+    attacks = []
+    for ability in abilities:
+        if ability.effect_type != "damage" or not ability.damage_dice or ability.target_type != models.TargetType.ENEMY:
+            continue
+        resource = {"tapas": TAPAS, "maya": MAYA}.get(rules_engine.ability_resource(ability), NO_RESOURCE)
+        attacks.append(AttackProfile(
+            name=ability.name,
+            to_hit=rules_engine.to_hit_modifier(stats, ability, active_resonance, is_enhanced, character.has_loka_resistance),
+            damage=rules_engine.ability_dice(ability),
+            damage_mod=rules_engine.damage_modifier(stats, ability),
+            cost=rules_engine.ability_cost(ability, active_resonance, is_enhanced, character.has_loka_resistance) if resource else 0,
+            resource=resource
+        ))
+    attacks.sort(key=AttackProfile.expected_damage, reverse=True)
+    return CombatantSpec(
+        name=character.name,
+        team=team,
+        max_prana=stats.max_prana,
+        max_tapas=stats.max_tapas,
+        max_maya=stats.max_maya,
+        evasion_dc=rules_engine.evasion_dc(stats),
+        initiative_mod=stats.modifier("dakshata"),
+        dakshata=stats.dakshata,
+        attacks=tuple(attacks)
+    )
+
+# ==================================
+# Simulation Kernel
+# ==================================
+
+def _attack_table(encounter: Sequence[CombatantSpec]) -> Dict[str, Any]:
+    """
+    Attack profiles as (combatant, attack) arrays; missing slots are marked invalid.
+    Plain NdS+C damage is rolled from the arrays; any other expression is listed
+    under "rolled" as (combatant, attack, expression) and rolled by the expression.
+    """
+    width = max(1, max(len(c.attacks) for c in encounter))
+    table = {key: np.zeros((len(encounter), width), dtype=np.int64) for key in ("to_hit", "num", "sides", "mod", "cost", "resource")}
+    table["sides"][:] = 1
+    table["valid"] = np.zeros((len(encounter), width), dtype=bool)
+    table["rolled"] = []
+    for i, combatant in enumerate(encounter):
+        for j, attack in enumerate(combatant.attacks):
+            table["to_hit"][i, j] = attack.to_hit
+            table["mod"][i, j] = attack.damage_mod
+            simple = attack.damage.simple
+            if simple is None:
+                table["rolled"].append((i, j, attack.damage))
+            else:
+                table["num"][i, j], table["sides"][i, j] = simple[0], simple[1]
+                table["mod"][i, j] += simple[2]
+            table["cost"][i, j] = attack.cost
+            table["resource"][i, j] = attack.resource
+            table["valid"][i, j] = True
+    return table
+
+def simulate_chunk(encounter: Sequence[CombatantSpec], fights: int, max_rounds: int, seed: np.random.SeedSequence) -> Dict[str, Any]:
+    """Runs `fights` independent fights at once and returns summable tallies."""
+    rng = np.random.default_rng(seed)
+    size = len(encounter)
+    team = np.array([c.team for c in encounter])
+    evasion_dcs = np.array([c.evasion_dc for c in encounter])
+    attacks = _attack_table(encounter)
+    max_dice = int(attacks["num"].max()) or 1
+    dice_slots = np.arange(max_dice)
+
+    prana = np.tile(np.array([c.max_prana for c in encounter], dtype=np.int64), (fights, 1))
+    tapas = np.tile(np.array([c.max_tapas for c in encounter], dtype=np.int64), (fights, 1))
+    maya = np.tile(np.array([c.max_maya for c in encounter], dtype=np.int64), (fights, 1))
+
+    # Initiative as in begin_combat: d20 + Dakshata modifier, ties to the higher Dakshata
+    initiative = rng.integers(1, 21, size=(fights, size)) + np.array([c.initiative_mod for c in encounter])
+    order = np.argsort(-(initiative * 100 + np.array([c.dakshata for c in encounter])), axis=1, kind="stable")
+
+    winner = np.full(fights, -1)
+    rounds_fought = np.zeros(fights, dtype=np.int64)
+    downed_round = np.zeros((fights, size), dtype=np.int64)
+    # Per round, per team: summed prana, tapas, maya over all fights
+    curves = np.zeros((max_rounds, 2, 3), dtype=np.int64)
+    rounds_simulated = 0
+
+    for round_number in range(1, max_rounds + 1):
+        live = np.flatnonzero(winner < 0)
+        if len(live) == 0:
+            curves[round_number - 1:] = curves[round_number - 2]
+            break
+        rounds_simulated += len(live)
+        # Work on the fights still running only; most end within a few rounds
+        rows = np.arange(len(live))
+        live_prana, live_tapas, live_maya = prana[live], tapas[live], maya[live]
+        live_order, live_downed = order[live], downed_round[live]
+        for slot in range(size):
+            actor = live_order[:, slot]
+            acting = live_prana[rows, actor] > 0
+
+            # A random standing enemy
+            enemies = (team[None, :] != team[actor][:, None]) & (live_prana > 0)
+            keys = rng.random((len(live), size))
+            keys[~enemies] = -1.0
+            target = keys.argmax(axis=1)
+            acting &= enemies.any(axis=1)
+
+            # The first attack the actor can pay for
+            resource = attacks["resource"][actor]
+            pool = np.where(resource == TAPAS, live_tapas[rows, actor][:, None], np.where(resource == MAYA, live_maya[rows, actor][:, None], np.iinfo(np.int64).max))
+            affordable = attacks["valid"][actor] & (attacks["cost"][actor] <= pool)
+            choice = affordable.argmax(axis=1)
+            acting &= affordable.any(axis=1)
+
+            num = attacks["num"][actor, choice]
+            sides = attacks["sides"][actor, choice]
+            dice = rng.integers(1, sides[:, None] + 1, size=(len(live), max_dice))
+            damage_rolls = np.where(dice_slots[None, :] < num[:, None], dice, 0).sum(axis=1)
+            for i, j, expression in attacks["rolled"]:
+                using = np.flatnonzero((actor == i) & (choice == j))
+                if len(using):
+                    damage_rolls[using] = expression.roll(rng, len(using))
+            _, _, _, new_prana = rules_engine.resolve_attacks(
+                rng.integers(1, 21, size=len(live)), attacks["to_hit"][actor, choice], evasion_dcs[target],
+                damage_rolls, attacks["mod"][actor, choice], live_prana[rows, target]
+            )
+            live_prana[rows[acting], target[acting]] = new_prana[acting]
+            downed = acting & (new_prana == 0) & (live_downed[rows, target] == 0)
+            live_downed[rows[downed], target[downed]] = round_number
+
+            cost = np.where(acting, attacks["cost"][actor, choice], 0)
+            live_tapas[rows, actor] -= np.where(resource[rows, choice] == TAPAS, cost, 0)
+            live_maya[rows, actor] -= np.where(resource[rows, choice] == MAYA, cost, 0)
+
+        prana[live], tapas[live], maya[live], downed_round[live] = live_prana, live_tapas, live_maya, live_downed
+        standing = live_prana > 0
+        party_up = (standing & (team == PARTY)).any(axis=1)
+        enemies_up = (standing & (team == ENEMIES)).any(axis=1)
+        ended = ~(party_up & enemies_up)
+        winner[live[ended & party_up]] = PARTY
+        winner[live[ended & enemies_up]] = ENEMIES
+        rounds_fought[live[ended]] = round_number
+        for side in (PARTY, ENEMIES):
+            members = team == side
+            curves[round_number - 1, side] = (
+                prana[:, members].sum(), tapas[:, members].sum(), maya[:, members].sum()
+            )
+
+    unfinished = winner < 0
+    rounds_fought[unfinished] = max_rounds
+    return {
+        "fights": fights,
+        "rounds_simulated": rounds_simulated,
+        "wins": np.array([(winner == PARTY).sum(), (winner == ENEMIES).sum(), unfinished.sum()]),
+        "rounds_to_win": np.array([rounds_fought[winner == PARTY].sum(), rounds_fought[winner == ENEMIES].sum()]),
+        "downed": (downed_round > 0).sum(axis=0),
+        "downed_round_sum": downed_round.sum(axis=0),
+        "curves": curves,
+    }
+
+def _simulate_chunk_args(args) -> Dict[str, Any]:
+    return simulate_chunk(*args)
+
+# ==================================
+# Runner
+# ==================================
+
+def run_simulation(
+    encounter: Sequence[CombatantSpec],
+    fights: int,
+    workers: Optional[int] = None,
+    max_rounds: int = DEFAULT_MAX_ROUNDS,
+    seed: Optional[int] = None,
+    chunk: int = DEFAULT_CHUNK
+) -> Dict[str, Any]:
+    """Runs the fights in chunks over `workers` processes (in this process if 1) and reports the totals."""
+    if fights < 1:
+        raise ValueError(f"fights must be at least 1, not {fights}")
+    if chunk < 1:
+        raise ValueError(f"chunk must be at least 1, not {chunk}")
+    if max_rounds < 1:
+        raise ValueError(f"max_rounds must be at least 1, not {max_rounds}")
+    encounter = tuple(encounter)
+    sizes = [min(chunk, fights - start) for start in range(0, fights, chunk)]
+    seeds = np.random.SeedSequence(seed).spawn(len(sizes))
+    jobs = [(encounter, size, max_rounds, chunk_seed) for size, chunk_seed in zip(sizes, seeds)]
+    workers = workers or os.cpu_count() or 1
+    started = time.perf_counter()
+    if workers == 1 or len(jobs) == 1:
+        tallies = [_simulate_chunk_args(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            tallies = list(executor.map(_simulate_chunk_args, jobs))
+    elapsed = time.perf_counter() - started
+
+    total = {key: sum(tally[key] for tally in tallies) for key in tallies[0]}
+    return report(encounter, total, elapsed, workers)
+
+def report(encounter: Sequence[CombatantSpec], total: Dict[str, Any], elapsed: float, workers: int) -> Dict[str, Any]:
+    fights = total["fights"]
+    wins, rounds_to_win, curves = total["wins"], total["rounds_to_win"], total["curves"] / fights
+    return {
+        "fights": fights,
+        "rounds_simulated": int(total["rounds_simulated"]),
+        "elapsed_s": round(elapsed, 3),
+        "rounds_per_second_per_worker": round(total["rounds_simulated"] / elapsed / workers) if elapsed else None,
+        "teams": {
+            TEAM_NAMES[side]: {
+                "win_rate": round(int(wins[side]) / fights, 4),
+                "mean_rounds_to_win": round(int(rounds_to_win[side]) / int(wins[side]), 2) if wins[side] else None,
+            }
+            for side in (PARTY, ENEMIES)
+        },
+        "unfinished_rate": round(int(wins[2]) / fights, 4),
+        "combatants": [
+            {
+                "name": combatant.name,
+                "team": TEAM_NAMES[combatant.team],
+                "downed_rate": round(int(total["downed"][i]) / fights, 4),
+                # Turns-to-kill: the round it went down in, over the fights where it did
+                "mean_round_downed": round(int(total["downed_round_sum"][i]) / int(total["downed"][i]), 2) if total["downed"][i] else None,
+            }
+            for i, combatant in enumerate(encounter)
+        ],
+        # Mean remaining resources of each team at the end of every round
+        "resource_curves": {
+            TEAM_NAMES[side]: {
+                resource: [round(float(value), 2) for value in curves[:, side, index]]
+                for index, resource in enumerate(("prana", "tapas", "maya"))
+            }
+            for side in (PARTY, ENEMIES)
+        },
+    }
+
+# ==================================
+# Loading Encounters
+# ==================================
+
+def _parse_roster(roster: str) -> List[Tuple[str, int]]:
+    """ "Rakshasa Warrior*3, 7" -> [("Rakshasa Warrior", 3), ("7", 1)]"""
+    entries = []
+    for entry in roster.split(","):
+        name, _, count = entry.strip().partition("*")
+        if name:
+            entries.append((name.strip(), int(count) if count else 1))
+    return entries
+
+def load_encounter(db: Session, party: str, enemies: str, active_resonance: str = "none", is_enhanced: bool = False) -> List[CombatantSpec]:
+    """Specs for the rosters; entries are character ids or names, optionally with a *count."""
+    catalog = rules_catalog.get(db)
+    encounter = []
+    for team, roster in ((PARTY, party), (ENEMIES, enemies)):
+        for key, count in _parse_roster(roster):
+            query = db.query(models.Character).options(
+                joinedload(models.Character.race),
+                joinedload(models.Character.char_class),
+                selectinload(models.Character.inventory),
+            )
+            character = query.filter(models.Character.id == int(key)).first() if key.isdigit() else \
+                query.filter(models.Character.name == key).order_by(models.Character.id).first()
+            if character is None:
+                raise ValueError(f"Character not found: {key}")
+            ability_ids = [link.ability_id for link in db.query(models.CharacterAbility).filter(models.CharacterAbility.character_id == character.id)]
+            abilities = [catalog.abilities.by_id[ability_id] for ability_id in ability_ids if ability_id in catalog.abilities.by_id]
+            spec = combatant_spec(character, team, abilities, active_resonance, is_enhanced)
+            encounter.extend(spec._replace(name=f"{spec.name} #{n + 1}" if count > 1 else spec.name) for n in range(count))
+    return encounter
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate an encounter many times and report win rates, turns-to-kill and resource curves.")
+    parser.add_argument("--party", required=True, help='Character ids or names, comma separated; "Name*3" for copies')
+    parser.add_argument("--enemies", required=True)
+    parser.add_argument("--fights", type=int, default=10000)
+    parser.add_argument("--resonance", default="none", help="Urdhva, Paatala or none")
+    parser.add_argument("--enhanced", action="store_true", help="Enhanced (Loka Mastery) resonance")
+    parser.add_argument("--max-rounds", type=int, default=DEFAULT_MAX_ROUNDS)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    for name in ("fights", "max_rounds", "workers"):
+        value = getattr(args, name)
+        if value is not None and value < 1:
+            parser.error(f"--{name.replace('_', '-')} must be at least 1")
+
+    db = models.SessionLocal()
+    try:
+        encounter = load_encounter(db, args.party, args.enemies, args.resonance, args.enhanced)
+    finally:
+        db.close()
+    result = run_simulation(encounter, args.fights, args.workers, args.max_rounds, args.seed)
+    print(orjson.dumps(result, option=orjson.OPT_INDENT_2).decode())
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,432 @@
+# app/combat_state.py
+"""
+In-memory combat state for HOT_STATE_MODE.
+The fields that change on every turn (participants' resources, action economy,
+positions and status, the turn pointer and the Loka summoning) are kept as
+compact objects owned by the session's actor. Turn, action and ability
+commands read and change those objects instead of their rows, and the
+broadcaster renders them over a cached dump of the rest of the session.
+Every acknowledged batch is first appended to the session's journal file and
+fsynced; the rows are brought up to date by batched write-behind flushes
+(periodically, when the session goes idle, before a command that works on
+the rows, and on shutdown), after which the journal is dropped. Journals left
+behind by a crash are replayed into the DB before the session is loaded again.
+Memory is authoritative, so a session must only be served by one worker.
+"""
+
+import asyncio
+import copy
+import os
+import time
+from typing import Dict, Any, List, Optional, Callable, Iterator, Tuple
+
+import orjson
+from sqlalchemy import update, bindparam
+from sqlalchemy.orm import Session
+
+from . import models
+from .game_log import buffer_log_row
+from .spatial_index import GridIndex, drop_on_commit
+from .session_rng import SessionRng, new_seed
+
+# Columns owned by the in-memory state while a session is resident
+PARTICIPANT_FIELDS = (
+    "current_prana", "current_tapas", "current_maya", "remaining_speed",
+    "actions", "bonus_actions", "reactions", "status", "x_pos", "y_pos", "version_id",
+)
+SESSION_FIELDS = ("current_mode", "turn_order", "current_turn_index", "active_loka_summoning", "version_id")
+
+# ==================================
+# State Objects
+# ==================================
+
+class ParticipantState:
+    """One SessionCharacter's hot columns, plus its (detached, fully loaded) Character for rules lookups."""
+    __slots__ = ("id", "session_id", "character_id", "player_id", "npc_type", "character") + PARTICIPANT_FIELDS
+
+    def __init__(self, participant: models.SessionCharacter):
+        self.id = participant.id
+        self.session_id = participant.session_id
+        self.character_id = participant.character_id
+        self.player_id = participant.player_id
+        self.npc_type = participant.npc_type
+        self.character = participant.character
+        for field in PARTICIPANT_FIELDS:
+            setattr(self, field, getattr(participant, field))
+
+    def values(self) -> Tuple[Any, ...]:
+        return tuple(getattr(self, field) for field in PARTICIPANT_FIELDS)
+
+    def image(self) -> Dict[str, Any]:
+        return {field: getattr(self, field) for field in PARTICIPANT_FIELDS}
+
+
+class CommittedView:
+    """
+    Copy of what a resident session last committed, for reads that run in other threads
+    (ability previews, reachable cells). It never changes; SessionState.committed_view()
+    hands out a new one after the next commit.
+    """
+
+    def __init__(self, state: "SessionState", session_values: Tuple[Any, ...], participant_values: Dict[int, Tuple[Any, ...]]):
+        self.id = state.id
+        self.environmental_resonance = state.environmental_resonance
+        for field, value in zip(SESSION_FIELDS, session_values):
+            setattr(self, field, copy.deepcopy(value))
+        self.participants: Dict[int, ParticipantState] = {}
+        for pid, values in participant_values.items():
+            participant = copy.copy(state.participants[pid])
+            for field, value in zip(PARTICIPANT_FIELDS, values):
+                setattr(participant, field, value)
+            self.participants[pid] = participant
+        self.grid = state.grid.copy()
+
+
+class SessionState:
+    """
+    A resident session. Commands see it through the same attribute names as
+    GameSession / SessionCharacter, and use begin/commit/rollback like a Session:
+    commit() bumps the version of every changed row, exactly like the ORM would.
+    """
+
+    def __init__(self, session_db: models.GameSession, snapshot: Dict[str, Any]):
+        self.id = session_db.id
+        self.environmental_resonance = session_db.environmental_resonance
+        for field in SESSION_FIELDS:
+            setattr(self, field, copy.deepcopy(getattr(session_db, field)))
+        self.participants: Dict[int, ParticipantState] = {p.id: ParticipantState(p) for p in session_db.participants}
+        # Committed token positions; moves made by the running command show up after its commit()
+        self.grid = GridIndex()
+        for participant in self.participants.values():
+            self.grid.set_position(participant.id, participant.x_pos, participant.y_pos)
+        # Dice stream; its position is flushed with the session row but never bumps its version
+        self.rng = SessionRng(session_db.rng_seed if session_db.rng_seed is not None else new_seed(), session_db.rng_draws or 0)
+        self.rng_dirty = session_db.rng_seed is None
+        # GameSessionSchema dump the hot fields are laid over; refreshed when something else changes
+        self.base_snapshot = snapshot
+        self.snapshot_stale = False
+        # Write-behind bookkeeping
+        self.dirty_participants: set = set()
+        self.session_dirty = False
+        self.pending_log_rows: List[Dict[str, Any]] = []
+        self.dirty_since: Optional[float] = None
+        # Unit of work of the running command
+        self._before = None
+        self._draws_before = 0
+        self._changes: Dict[str, Any] = {}
+        self._view: Optional[CommittedView] = None
+
+    # --- Unit of work ---
+
+    def _capture(self):
+        session_values = tuple(copy.deepcopy(getattr(self, field)) for field in SESSION_FIELDS)
+        return session_values, {pid: p.values() for pid, p in self.participants.items()}
+
+    def _restore(self, captured):
+        session_values, participant_values = captured
+        for field, value in zip(SESSION_FIELDS, session_values):
+            setattr(self, field, copy.deepcopy(value))
+        for pid, values in participant_values.items():
+            participant = self.participants[pid]
+            for field, value in zip(PARTICIPANT_FIELDS, values):
+                setattr(participant, field, value)
+
+    def _rng_image(self) -> Dict[str, Any]:
+        return {"rng_seed": self.rng.seed, "rng_draws": self.rng.draws}
+
+    def begin(self):
+        self._before = self._capture()
+        self._draws_before = self.rng.draws
+        self._changes = {"session": None, "participants": {}}
+
+    def commit(self):
+        """Records what changed since begin() (or the last commit) and bumps the changed rows' versions."""
+        session_before, participants_before = self._before
+        if tuple(getattr(self, field) for field in SESSION_FIELDS) != session_before:
+            self.version_id += 1
+            self.session_dirty = True
+            self._changes["session"] = {
+                **(self._changes["session"] or {}), **{field: copy.deepcopy(getattr(self, field)) for field in SESSION_FIELDS}
+            }
+        for pid, participant in self.participants.items():
+            if participant.values() != participants_before[pid]:
+                participant.version_id += 1
+                self.dirty_participants.add(pid)
+                self._changes["participants"][pid] = participant.image()
+                self.grid.set_position(pid, participant.x_pos, participant.y_pos)
+        if self.rng.draws != self._draws_before:
+            self.rng_dirty = True
+            self._changes["session"] = {**(self._changes["session"] or {}), **self._rng_image()}
+        self._before = self._capture()
+        self._draws_before = self.rng.draws
+        self._view = None
+
+    def rollback(self):
+        """Drops changes made since begin() or the last commit, dice included."""
+        self._restore(self._before)
+        self.rng.seek(self._draws_before)
+
+    def finish(self, log_rows: List[Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+        """
+        Ends the command: uncommitted changes are dropped (as unflushed ORM changes would be)
+        and the committed ones come back as a journal record, or None if nothing changed.
+        """
+        self.rollback()
+        changes, self._changes, self._before = self._changes, {}, None
+        if changes["session"] is None and not changes["participants"] and not log_rows:
+            return None
+        self.pending_log_rows.extend(log_rows)
+        if self.dirty_since is None:
+            self.dirty_since = time.monotonic()
+        changes["log_rows"] = log_rows
+        return changes
+
+    # --- Write-behind ---
+
+    @property
+    def dirty(self) -> bool:
+        return self.session_dirty or self.rng_dirty or bool(self.dirty_participants) or bool(self.pending_log_rows)
+
+    def take_dirty(self) -> Tuple[Optional[Dict[str, Any]], Dict[int, Dict[str, Any]], List[Dict[str, Any]]]:
+        """Current images of everything changed since the last flush."""
+        session_image = {field: copy.deepcopy(getattr(self, field)) for field in SESSION_FIELDS} if self.session_dirty else None
+        if self.rng_dirty:
+            session_image = {**(session_image or {}), **self._rng_image()}
+        participant_images = {pid: self.participants[pid].image() for pid in self.dirty_participants}
+        return session_image, participant_images, list(self.pending_log_rows)
+
+    def mark_clean(self, written_log_rows: int):
+        self.session_dirty = False
+        self.rng_dirty = False
+        self.dirty_participants.clear()
+        del self.pending_log_rows[:written_log_rows]
+        self.dirty_since = None
+
+    # --- Reads from other threads ---
+
+    def committed_view(self) -> CommittedView:
+        """
+        What was last committed, safe to read from any thread. Only call it on the actor's
+        thread (the event loop); the view itself is shared until the next commit.
+        """
+        if self._view is None:
+            session_values, participant_values = self._before if self._before is not None else self._capture()
+            self._view = CommittedView(self, session_values, participant_values)
+        return self._view
+
+    # --- Broadcast ---
+
+    def snapshot(self) -> Dict[str, Any]:
+        """GameSessionSchema dump of the session as it is in memory, without touching the DB."""
+        # While a command is running (it may await reads), show what was last committed
+        session_values, participant_values = self._before if self._before is not None else self._capture()
+        snapshot = dict(self.base_snapshot)
+        for field, value in zip(SESSION_FIELDS, session_values):
+            if field in snapshot:
+                snapshot[field] = copy.deepcopy(value)
+        participants = []
+        for item in snapshot.get("participants", []):
+            values = participant_values.get(item["id"])
+            if values is not None:
+                item = dict(item)
+                item.update(zip(PARTICIPANT_FIELDS, values))
+            participants.append(item)
+        snapshot["participants"] = participants
+        return snapshot
+
+# ==================================
+# Journal
+# ==================================
+
+class CombatJournal:
+    """
+    Append-only redo log, one file per session, holding the after-images of every
+    acknowledged command that the DB does not have yet. Records are fsynced before
+    the commands are acknowledged and the file is removed once a flush commits.
+    """
+
+    def __init__(self, directory: str):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, session_id: int) -> str:
+        return os.path.join(self.directory, f"session_{session_id}.jsonl")
+
+    def append(self, session_id: int, records: List[Dict[str, Any]]):
+        """Blocking: write + fsync. A failed write is cut off again so no torn line is left behind."""
+        data = b"".join(orjson.dumps(record, option=orjson.OPT_NON_STR_KEYS) + b"\n" for record in records)
+        with open(self._path(session_id), "ab") as f:
+            offset = f.tell()
+            try:
+                f.write(data)
+                f.flush()
+                os.fsync(f.fileno())
+            except Exception:
+                f.truncate(offset)
+                raise
+
+    def discard(self, session_id: int):
+        try:
+            os.remove(self._path(session_id))
+        except FileNotFoundError:
+            pass
+
+    def has_records(self, session_id: int) -> bool:
+        return os.path.exists(self._path(session_id))
+
+    def read(self, session_id: int) -> List[Dict[str, Any]]:
+        records = []
+        with open(self._path(session_id), "rb") as f:
+            for line in f:
+                try:
+                    records.append(orjson.loads(line))
+                except orjson.JSONDecodeError:
+                    # Torn tail of a write that was never acknowledged
+                    break
+        return records
+
+    def session_ids(self) -> Iterator[int]:
+        for name in os.listdir(self.directory):
+            if name.startswith("session_") and name.endswith(".jsonl"):
+                yield int(name[len("session_"):-len(".jsonl")])
+
+
+def merge_records(records: List[Dict[str, Any]]) -> Tuple[Optional[Dict[str, Any]], Dict[int, Dict[str, Any]], List[Dict[str, Any]]]:
+    """Collapses journal records into the final image of each row plus all log rows, in order."""
+    session_image = None
+    participant_images: Dict[int, Dict[str, Any]] = {}
+    log_rows: List[Dict[str, Any]] = []
+    for record in records:
+        if record.get("session") is not None:
+            # Partial when only the dice stream moved
+            session_image = {**(session_image or {}), **record["session"]}
+        for pid, image in record.get("participants", {}).items():
+            participant_images[int(pid)] = image
+        log_rows.extend(record.get("log_rows", []))
+    return session_image, participant_images, log_rows
+
+# ==================================
+# Row Writes
+# ==================================
+
+def write_images(
+    db: Session,
+    session_id: int,
+    session_image: Optional[Dict[str, Any]],
+    participant_images: Dict[int, Dict[str, Any]],
+    log_rows: List[Dict[str, Any]]
+):
+    """
+    Writes in-memory images over the rows, versions included (memory is authoritative,
+    so there is nothing to compare against), and buffers the log rows for db's commit.
+    """
+    if session_image:
+        table = models.GameSession.__table__
+        db.execute(update(table).where(table.c.id == session_id).values(**session_image))
+    if participant_images:
+        table = models.SessionCharacter.__table__
+        db.execute(
+            update(table).where(table.c.id == bindparam("_id")).values({field: bindparam(f"_{field}") for field in PARTICIPANT_FIELDS}),
+            [{"_id": pid, **{f"_{field}": image[field] for field in PARTICIPANT_FIELDS}} for pid, image in participant_images.items()]
+        )
+        # Positions were written around the ORM
+        drop_on_commit(db, session_id)
+    for row in log_rows:
+        buffer_log_row(db, row)
+
+# ==================================
+# Store
+# ==================================
+
+class HotStateStore:
+    """
+    Loading, journaling and flushing for resident sessions; the states themselves belong to the session actors.
+    loader(db, session_id) builds a SessionState (or returns None) inside AsyncSession.run_sync().
+    """
+
+    def __init__(
+        self,
+        session_factory,
+        loader: Callable[[Session, int], Optional[SessionState]],
+        journal_dir: str,
+        lock_statement: Optional[Callable[[int], Any]] = None,
+        flush_seconds: float = 1.0
+    ):
+        self.session_factory = session_factory
+        self.loader = loader
+        self.journal = CombatJournal(journal_dir)
+        self.lock_statement = lock_statement
+        self.flush_seconds = flush_seconds
+        # Counters
+        self.loads = 0
+        self.journaled_records = 0
+        self.flushes = 0
+        self.failed_flushes = 0
+        self.recovered_sessions = 0
+
+    async def load(self, session_id: int) -> Optional[SessionState]:
+        if self.journal.has_records(session_id):
+            await self.recover(session_id)
+        # Own Session, never committed, so the loaded Characters stay populated after it closes
+        async with self.session_factory() as db:
+            state = await db.run_sync(self.loader, session_id)
+        self.loads += 1
+        return state
+
+    async def append(self, state: SessionState, records: List[Dict[str, Any]]):
+        await asyncio.to_thread(self.journal.append, state.id, records)
+        self.journaled_records += len(records)
+
+    async def _write(self, session_id: int, session_image, participant_images, log_rows):
+        async with self.session_factory() as db:
+            try:
+                if self.lock_statement is not None:
+                    await db.execute(self.lock_statement(session_id))
+                await db.run_sync(write_images, session_id, session_image, participant_images, log_rows)
+                await db.commit()
+            except Exception:
+                await db.rollback()
+                raise
+
+    async def flush(self, state: SessionState):
+        """Writes everything changed since the last flush in one transaction, then drops the journal."""
+        if not state.dirty:
+            return
+        session_image, participant_images, log_rows = state.take_dirty()
+        try:
+            await self._write(state.id, session_image, participant_images, log_rows)
+        except Exception as e:
+            self.failed_flushes += 1
+            print(f"Session {state.id}: hot state flush failed, keeping it journaled: {e}")
+            raise
+        # A crash right here replays the journal over identical rows (log rows would be written twice)
+        await asyncio.to_thread(self.journal.discard, state.id)
+        state.mark_clean(len(log_rows))
+        self.flushes += 1
+
+    async def recover(self, session_id: int):
+        """Replays a journal left behind by a crashed process into the DB."""
+        records = await asyncio.to_thread(self.journal.read, session_id)
+        if records:
+            await self._write(session_id, *merge_records(records))
+        await asyncio.to_thread(self.journal.discard, session_id)
+        self.recovered_sessions += 1
+        print(f"Session {session_id}: replayed {len(records)} journaled commands into the DB.")
+
+    async def recover_all(self):
+        for session_id in list(self.journal.session_ids()):
+            try:
+                await self.recover(session_id)
+            except Exception as e:
+                # Kept on disk; load() retries before the session is used again
+                print(f"Session {session_id}: journal replay failed: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "flush_ms": round(self.flush_seconds * 1000),
+            "loads": self.loads,
+            "journaled_records": self.journaled_records,
+            "flushes": self.flushes,
+            "failed_flushes": self.failed_flushes,
+            "recovered_sessions": self.recovered_sessions,
+        }
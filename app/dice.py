@@ -0,0 +1,329 @@
+# app/dice.py
+"""
+Dice expressions.
+An expression is a sum of terms, each a constant or a dice term:
+
+    2d6+3        two d6 plus 3
+    4d6kh3       four d6, keep the highest three (kl: lowest; k is kh)
+    d20adv       roll the term twice and keep the higher total (dis: lower)
+    2d6!         exploding: a die showing its highest face is rolled again and added
+    1d8+2d4-1    any number of terms, added or subtracted
+
+Expressions are compiled once per text (compile_dice is memoized) into a
+DiceExpression that samples any number of rolls at once from a NumPy
+Generator or a SessionRng, and computes its exact distribution with NumPy
+convolutions. A plain NdS term draws its dice in the same order as before
+compiled expressions, so logged rolls replay unchanged. Explosions stop
+after EXPLODE_LIMIT extra dice per die, which keeps the distribution finite
+and exact. compile_dice rejects expressions whose distribution would take
+more than milliseconds (MAX_OUTCOMES, MAX_KEEP_WORK), so it is safe to
+work out on a request.
+"""
+
+import re
+from functools import lru_cache
+from math import comb
+from typing import List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+MAX_DICE = 100
+MAX_SIDES = 1000
+EXPLODE_LIMIT = 3
+# Totals (and so constants) stay within +-MAX_TOTAL, far inside int64
+MAX_TOTAL = 1_000_000
+# Bounds on the work of an exact distribution, so it takes milliseconds: MAX_OUTCOMES
+# over all terms (dice times faces), MAX_KEEP_WORK per keep term (see _keep_work)
+MAX_OUTCOMES = 100_000
+MAX_KEEP_WORK = 2_000_000
+
+_TERM = re.compile(r"([+-])(?:(\d*)d(\d+)((?:kh\d+|kl\d+|k\d+|!|adv|dis)*)|(\d+))")
+_MODIFIER = re.compile(r"kh(\d+)|kl(\d+)|k(\d+)|(!)|(adv)|(dis)")
+
+class DiceSyntaxError(ValueError):
+    pass
+
+class DiceTerm(NamedTuple):
+    sign: int
+    count: int
+    sides: int
+    keep: Optional[Tuple[str, int]] = None  # ("h" or "l", how many)
+    explode: bool = False
+    advantage: int = 0  # 1: advantage, -1: disadvantage
+
+    def __str__(self) -> str:
+        text = f"{self.count}d{self.sides}"
+        if self.keep is not None:
+            text += f"k{self.keep[0]}{self.keep[1]}"
+        if self.explode:
+            text += "!"
+        if self.advantage:
+            text += "adv" if self.advantage > 0 else "dis"
+        return text
+
+# ==================================
+# Distributions
+# ==================================
+# As (lowest total, probabilities of lowest total, lowest + 1, ...) NumPy arrays
+
+# Above this many products a convolution goes through the FFT
+_DIRECT_CONVOLUTION = 1 << 20
+
+def _faces(term: DiceTerm) -> int:
+    """Highest total one die of the term can show."""
+    return term.sides * (EXPLODE_LIMIT + 1) if term.explode else term.sides
+
+def _outcomes(term: DiceTerm) -> int:
+    return term.count * _faces(term)
+
+def _keep_work(term: DiceTerm) -> int:
+    """Rough number of array elements _keep() adds up: every face, to every kept die, over every kept sum."""
+    faces = _faces(term)
+    return faces * term.count * term.keep[1] * faces * term.keep[1] if term.keep is not None else 0
+
+def _die(sides: int, explode: bool) -> np.ndarray:
+    """Probabilities of one die showing 0, 1, 2, ..."""
+    if not explode:
+        pmf = np.full(sides + 1, 1.0 / sides)
+        pmf[0] = 0.0
+        return pmf
+    pmf = np.zeros(sides * (EXPLODE_LIMIT + 1) + 1)
+    for explosions in range(EXPLODE_LIMIT):
+        # `explosions` highest faces, then anything but the highest
+        pmf[sides * explosions + 1:sides * (explosions + 1)] = float(sides) ** -(explosions + 1)
+    pmf[sides * EXPLODE_LIMIT + 1:] = float(sides) ** -(EXPLODE_LIMIT + 1)
+    return pmf
+
+def _convolve(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    if len(a) * len(b) <= _DIRECT_CONVOLUTION:
+        return np.convolve(a, b)
+    size = len(a) + len(b) - 1
+    # Padded to a power of two, where the FFT is fastest
+    padded = 1 << (size - 1).bit_length()
+    pmf = np.fft.irfft(np.fft.rfft(a, padded) * np.fft.rfft(b, padded), padded)[:size]
+    # Rounding leaves specks around 1e-16 where there should be nothing
+    pmf[pmf < 1e-15] = 0.0
+    return pmf / pmf.sum()
+
+def _sum_of(die: np.ndarray, count: int) -> np.ndarray:
+    """Distribution of the sum of count dice, by repeated squaring."""
+    pmf, power = np.ones(1), die
+    while count:
+        if count & 1:
+            pmf = _convolve(pmf, power)
+        count >>= 1
+        if count:
+            power = _convolve(power, power)
+    return pmf
+
+def _keep(die: np.ndarray, count: int, keep: Tuple[str, int]) -> np.ndarray:
+    """
+    Sum of the kept dice. Faces are dealt out best first: states[dealt] is the distribution
+    of the kept sum once `dealt` dice show the faces dealt so far, the first `kept` of them kept.
+    """
+    highest, kept = keep[0] == "h", keep[1]
+    width = kept * (len(die) - 1) + 1
+    states = np.zeros((count + 1, width))
+    states[0, 0] = 1.0
+    # ways[left, showing]: ways for `showing` of `left` undealt dice to show a face
+    ways = np.array([[comb(left, showing) for showing in range(count + 1)] for left in range(count + 1)], dtype=float)
+    left = count - np.arange(count + 1)
+    faces = np.flatnonzero(die)
+    for face in (faces[::-1] if highest else faces):
+        powers = die[face] ** np.arange(count + 1)
+        dealt_states = np.zeros_like(states)
+        # Rows that still keep dice: the face adds to the kept sum
+        for dealt in range(min(kept, count + 1)):
+            row = states[dealt]
+            if not row.any():
+                continue
+            for showing in range(count - dealt + 1):
+                shift = face * min(showing, kept - dealt)
+                dealt_states[dealt + showing, shift:] += row[:width - shift] * (ways[count - dealt, showing] * powers[showing])
+        # Rows that keep no more dice, all at once: the face only counts towards dealt
+        for showing in range(count - kept + 1):
+            rows = slice(kept, count + 1 - showing)
+            weights = ways[left[rows], showing] * powers[showing]
+            dealt_states[kept + showing:] += states[rows] * weights[:, None]
+        states = dealt_states
+    return states[count]
+
+def _best_of_two(pmf: np.ndarray, advantage: int) -> np.ndarray:
+    """Distribution of the higher (advantage) or lower (disadvantage) of two independent rolls."""
+    at_most = np.minimum(np.cumsum(pmf), 1.0)
+    below = np.concatenate(([0.0], at_most[:-1]))
+    if advantage > 0:
+        return at_most ** 2 - below ** 2
+    return (1.0 - below) ** 2 - (1.0 - at_most) ** 2
+
+def _term_range(term: DiceTerm) -> Tuple[int, int]:
+    """Lowest and highest total of the term, sign included."""
+    dice = term.keep[1] if term.keep is not None else term.count
+    low, high = dice, dice * _faces(term)
+    return (low, high) if term.sign > 0 else (-high, -low)
+
+def _term_distribution(term: DiceTerm) -> Tuple[int, np.ndarray]:
+    die = _die(term.sides, term.explode)
+    pmf = _keep(die, term.count, term.keep) if term.keep is not None else _sum_of(die, term.count)
+    if term.advantage:
+        pmf = _best_of_two(pmf, term.advantage)
+    if term.sign < 0:
+        return -(len(pmf) - 1), pmf[::-1]
+    return 0, pmf
+
+# ==================================
+# Compiled Expressions
+# ==================================
+
+class DiceExpression:
+    """A compiled dice expression; immutable and shared between callers."""
+
+    def __init__(self, terms: Tuple[DiceTerm, ...], constant: int):
+        self.terms = terms
+        self.constant = constant
+        self._distribution: Optional[Tuple[Tuple[int, float], ...]] = None
+
+    def __str__(self) -> str:
+        text = ""
+        for term in self.terms:
+            text += ("-" if term.sign < 0 else "+") + str(term)
+        if self.constant or not self.terms:
+            text += f"{self.constant:+d}"
+        return text.lstrip("+")
+
+    def __repr__(self) -> str:
+        return f"DiceExpression({str(self)!r})"
+
+    @property
+    def simple(self) -> Optional[Tuple[int, int, int]]:
+        """(count, sides, constant) if this is a plain NdS plus a constant, else None."""
+        if len(self.terms) != 1:
+            return None
+        term = self.terms[0]
+        if term.sign < 0 or term.keep is not None or term.explode or term.advantage:
+            return None
+        return term.count, term.sides, self.constant
+
+    def roll(self, rng, n: int) -> np.ndarray:
+        """n independent rolls of the expression as an int64 array; rng is a numpy Generator or a SessionRng."""
+        totals = np.full(n, self.constant, dtype=np.int64)
+        for term in self.terms:
+            totals += term.sign * self._roll_term(rng, term, n)
+        return totals
+
+    @staticmethod
+    def _roll_term(rng, term: DiceTerm, n: int) -> np.ndarray:
+        rolls = 2 * n if term.advantage else n
+        dice = np.asarray(rng.integers(1, term.sides + 1, size=(rolls, term.count)), dtype=np.int64)
+        if term.explode:
+            exploding = np.flatnonzero(dice == term.sides)
+            for _ in range(EXPLODE_LIMIT):
+                if len(exploding) == 0:
+                    break
+                extra = np.asarray(rng.integers(1, term.sides + 1, size=len(exploding)), dtype=np.int64)
+                dice.flat[exploding] += extra
+                exploding = exploding[extra == term.sides]
+        if term.keep is not None:
+            dice = np.sort(dice, axis=1)
+            dice = dice[:, -term.keep[1]:] if term.keep[0] == "h" else dice[:, :term.keep[1]]
+        totals = dice.sum(axis=1)
+        if term.advantage:
+            first, second = totals[:n], totals[n:]
+            totals = np.maximum(first, second) if term.advantage > 0 else np.minimum(first, second)
+        return totals
+
+    def distribution(self) -> Tuple[Tuple[int, float], ...]:
+        """
+        (total, probability) pairs, ascending. Totals that can't come up are left out,
+        as are totals rarer than 1e-15 in sums large enough to go through the FFT.
+        """
+        if self._distribution is None:
+            low, pmf = self.constant, np.ones(1)
+            for term in self.terms:
+                term_low, term_pmf = _term_distribution(term)
+                low, pmf = low + term_low, _convolve(pmf, term_pmf)
+            self._distribution = tuple(
+                (low + int(offset), float(pmf[offset])) for offset in np.flatnonzero(pmf > 0)
+            )
+        return self._distribution
+
+    @property
+    def minimum(self) -> int:
+        return self.constant + sum(_term_range(term)[0] for term in self.terms)
+
+    @property
+    def maximum(self) -> int:
+        return self.constant + sum(_term_range(term)[1] for term in self.terms)
+
+    @property
+    def mean(self) -> float:
+        return sum(total * p for total, p in self.distribution())
+
+# ==================================
+# Parsing
+# ==================================
+
+def _parse_term(sign: str, count: str, sides: str, modifiers: str) -> DiceTerm:
+    count = int(count) if count else 1
+    sides = int(sides)
+    if not 1 <= count <= MAX_DICE:
+        raise DiceSyntaxError(f"A term rolls 1 to {MAX_DICE} dice, not {count}.")
+    if not 1 <= sides <= MAX_SIDES:
+        raise DiceSyntaxError(f"Dice have 1 to {MAX_SIDES} sides, not {sides}.")
+    keep, explode, advantage = None, False, 0
+    for match in _MODIFIER.finditer(modifiers):
+        high, low, plain, bang, adv, dis = match.groups()
+        if high or low or plain:
+            if keep is not None:
+                raise DiceSyntaxError("Only one keep per term.")
+            keep = ("l", int(low)) if low else ("h", int(high or plain))
+            if not 1 <= keep[1] <= count:
+                raise DiceSyntaxError(f"Can't keep {keep[1]} of {count} dice.")
+        elif bang:
+            if explode:
+                raise DiceSyntaxError("A term explodes only once.")
+            if sides < 2:
+                raise DiceSyntaxError("Only dice with 2 or more sides explode.")
+            explode = True
+        else:
+            if advantage:
+                raise DiceSyntaxError("Only one of adv / dis per term.")
+            advantage = 1 if adv else -1
+    return DiceTerm(-1 if sign == "-" else 1, count, sides, keep, explode, advantage)
+
+@lru_cache(maxsize=1024)
+def compile_dice(text: str) -> DiceExpression:
+    """Parses a dice expression; raises DiceSyntaxError if it isn't one."""
+    if not isinstance(text, str):
+        raise DiceSyntaxError("A dice expression is a string.")
+    # Spaces are allowed around + and - only: "2d6 3" is not 2d63
+    source = re.sub(r"\s*([+-])\s*", r"\1", text.strip().lower())
+    if not source:
+        raise DiceSyntaxError("Empty dice expression.")
+    if re.search(r"\s", source):
+        raise DiceSyntaxError(f"Unexpected space in {text!r}.")
+    if source[0] not in "+-":
+        source = "+" + source
+    terms: List[DiceTerm] = []
+    constant = 0
+    position = 0
+    while position < len(source):
+        match = _TERM.match(source, position)
+        if match is None:
+            raise DiceSyntaxError(f"Can't read {text!r} from {source[position:]!r}.")
+        sign, count, sides, modifiers, number = match.groups()
+        if number is not None:
+            if len(number) > len(str(MAX_TOTAL)) or int(number) > MAX_TOTAL:
+                raise DiceSyntaxError(f"Constants are at most {MAX_TOTAL}, not {number}.")
+            constant += -int(number) if sign == "-" else int(number)
+        else:
+            terms.append(_parse_term(sign, count, sides, modifiers))
+        position = match.end()
+    if sum(term.count for term in terms) > MAX_DICE:
+        raise DiceSyntaxError(f"At most {MAX_DICE} dice per expression.")
+    if sum(_outcomes(term) for term in terms) > MAX_OUTCOMES or any(_keep_work(term) > MAX_KEEP_WORK for term in terms):
+        raise DiceSyntaxError(f"{text!r} has too many outcomes to work out; use fewer or smaller dice, or keep fewer.")
+    expression = DiceExpression(tuple(terms), constant)
+    if max(-expression.minimum, expression.maximum) > MAX_TOTAL:
+        raise DiceSyntaxError(f"{text!r} can total more than {MAX_TOTAL} either way.")
+    return expression
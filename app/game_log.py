@@ -0,0 +1,171 @@
+# app/game_log.py
+"""
+Buffered writes for the game log.
+Log entries are collected on the SQLAlchemy Session of the request that
+produced them and written in one multi-row INSERT as part of that Session's
+next commit, so an action that logs ten lines still costs one commit.
+Once the commit succeeds the new ids are handed to the live-log callback.
+Non-critical events can instead go through LogWriteBehind, which batches
+them across requests and writes them off the request path.
+"""
+
+import asyncio
+from typing import Dict, Any, List, Callable, Optional, Union
+from sqlalchemy import event, insert
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from . import models
+
+# Called with (session_id, entry_ids) after the entries are committed
+LogCommittedCallback = Callable[[int, List[int]], None]
+
+# Keys in Session.info
+_PENDING_ROWS = "pending_log_rows"
+_INSERTED_IDS = "inserted_log_ids"
+_HOLD_ANNOUNCEMENTS = "hold_log_announcements"
+
+_on_committed: Optional[LogCommittedCallback] = None
+
+def set_commit_callback(callback: Optional[LogCommittedCallback]):
+    global _on_committed
+    _on_committed = callback
+
+def make_log_row(session_id: int, event_type: str, actor_id: Optional[int] = None, target_id: Optional[int] = None, details: Optional[dict] = None) -> Dict[str, Any]:
+    return {
+        "session_id": session_id,
+        "event_type": event_type,
+        "actor_id": actor_id,
+        "target_id": target_id,
+        "details": details if details else {},
+    }
+
+def buffer_log_row(db: Union[Session, AsyncSession], row: Dict[str, Any]):
+    """Queues a row on db; it is written by db's next commit and dropped if db rolls back."""
+    db.info.setdefault(_PENDING_ROWS, []).append(row)
+
+def has_pending_log_rows(db: Union[Session, AsyncSession]) -> bool:
+    return bool(db.info.get(_PENDING_ROWS))
+
+def discard_pending_log_rows(db: Union[Session, AsyncSession]):
+    """Drops the queued rows, for callers that give up on the work that logged them."""
+    db.info.pop(_PENDING_ROWS, None)
+
+def take_pending_log_rows(db: Union[Session, AsyncSession]) -> List[Dict[str, Any]]:
+    """Removes and returns the queued rows, for callers that persist them some other way."""
+    return db.info.pop(_PENDING_ROWS, None) or []
+
+def hold_log_announcements(db: Union[Session, AsyncSession]):
+    """
+    For sessions whose commits only release a SAVEPOINT: inserted ids are kept
+    until release_log_announcements() is called after the real commit.
+    """
+    db.info[_HOLD_ANNOUNCEMENTS] = True
+
+def release_log_announcements(db: Union[Session, AsyncSession]):
+    db.info.pop(_HOLD_ANNOUNCEMENTS, None)
+    _announce(db.info.pop(_INSERTED_IDS, None))
+
+def _announce(inserted: Optional[Dict[int, List[int]]]):
+    if not inserted or _on_committed is None:
+        return
+    for session_id, entry_ids in inserted.items():
+        _on_committed(session_id, sorted(entry_ids))
+
+# ==================================
+# Session Hooks
+# ==================================
+
+@event.listens_for(models.AppSession, "before_commit")
+def _write_pending_rows(db: Session):
+    rows = db.info.pop(_PENDING_ROWS, None)
+    if not rows:
+        return
+    # Rows may reference objects that are still pending (e.g. a participant added by this action)
+    db.flush()
+    result = db.execute(
+        insert(models.GameLogEntry).returning(models.GameLogEntry.session_id, models.GameLogEntry.id),
+        rows
+    )
+    inserted = db.info.setdefault(_INSERTED_IDS, {})
+    for session_id, entry_id in result:
+        inserted.setdefault(session_id, []).append(entry_id)
+
+@event.listens_for(models.AppSession, "after_commit")
+def _announce_inserted_rows(db: Session):
+    if db.info.get(_HOLD_ANNOUNCEMENTS):
+        return
+    _announce(db.info.pop(_INSERTED_IDS, None))
+
+@event.listens_for(models.AppSession, "after_rollback")
+def _discard_pending_rows(db: Session):
+    db.info.pop(_PENDING_ROWS, None)
+    if not db.info.get(_HOLD_ANNOUNCEMENTS):
+        # When held, earlier SAVEPOINTs with inserted rows are still part of the outer transaction
+        db.info.pop(_INSERTED_IDS, None)
+
+# ==================================
+# Write-Behind Queue
+# ==================================
+
+class LogWriteBehind:
+    """
+    Collects non-critical log rows from any request and writes them in batches
+    from a background task with its own (async) Session.
+    Rows still queued when the process dies are lost, so only events that the
+    game state does not depend on (e.g. token moves) should be routed here.
+    """
+
+    def __init__(self, session_factory=models.AsyncSessionLocal, interval_seconds: float = 0.25, max_batch: int = 500):
+        self._session_factory = session_factory
+        self.interval_seconds = interval_seconds
+        self.max_batch = max_batch
+        self._rows: List[Dict[str, Any]] = []
+        self._task: Optional[asyncio.Task] = None
+        # Counters
+        self.written = 0
+        self.failed = 0
+
+    def add(self, row: Dict[str, Any]):
+        self._rows.append(row)
+
+    async def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        while self._rows:
+            await self.flush()
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval_seconds)
+            while self._rows:
+                await self.flush()
+
+    async def flush(self):
+        """Writes up to max_batch queued rows in one commit"""
+        batch = self._rows[:self.max_batch]
+        del self._rows[:len(batch)]
+        if not batch:
+            return
+        async with self._session_factory() as db:
+            try:
+                for row in batch:
+                    buffer_log_row(db, row)
+                await db.commit()
+                self.written += len(batch)
+            except Exception as e:
+                await db.rollback()
+                self.failed += len(batch)
+                print(f"Write-behind log flush failed, dropped {len(batch)} entries: {e}")
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "interval_ms": round(self.interval_seconds * 1000),
+            "queued": len(self._rows),
+            "written": self.written,
+            "failed": self.failed,
+        }
@@ -0,0 +1,117 @@
+# app/http_cache.py
+"""
+Conditional GET support (ETag / If-None-Match) for the read endpoints.
+Tags are derived from in-memory content versions, never from the data
+itself, so a matching request is answered with 304 before the ORM is
+touched. Versions are per process (prefixed with a random epoch, so tags
+from another worker or an earlier run never match by accident):
+- "session:<id>" is bumped whenever a session's state broadcast is
+  scheduled (every mutation does that after its commit) or received from
+  another worker.
+- "campaigns" is bumped by any committed write to campaigns or scenes; the
+  change callback lets other workers bump theirs as well.
+- The rules catalogs use the rules catalog version.
+"""
+
+import secrets
+from itertools import chain
+from typing import Dict, Optional, Callable
+
+from fastapi import Request, Response
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+
+# Cache-Control per kind of resource: catalogs change only when seeded, the rest must always be revalidated
+CATALOG_CACHE_CONTROL = "public, max-age=60, must-revalidate"
+PRIVATE_CACHE_CONTROL = "private, no-cache"
+
+# Tables whose writes bump a content key
+WATCHED_MODELS = {
+    models.Campaign: "campaigns",
+    models.Scene: "campaigns",
+}
+
+# Key in Session.info: content keys written by this transaction
+_CHANGED_KEYS = "changed_content_keys"
+
+# Called with the content key after a commit changed it (e.g. to tell the other workers)
+ContentChangedCallback = Callable[[str], None]
+_on_changed: Optional[ContentChangedCallback] = None
+
+def set_change_callback(callback: Optional[ContentChangedCallback]):
+    global _on_changed
+    _on_changed = callback
+
+class ContentVersions:
+    def __init__(self):
+        self.epoch = secrets.token_hex(4)
+        self._versions: Dict[str, int] = {}
+
+    def bump(self, key: str):
+        self._versions[key] = self._versions.get(key, 0) + 1
+
+    def etag(self, key: str, version: Optional[int] = None) -> str:
+        """Strong ETag for key, at its current version unless one is given."""
+        if version is None:
+            version = self._versions.get(key, 0)
+        return f'"{key}.{self.epoch}.{version}"'
+
+content_versions = ContentVersions()
+
+def session_key(session_id: int) -> str:
+    return f"session:{session_id}"
+
+# ==================================
+# Request Helpers
+# ==================================
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses the weak comparison, so a W/ prefix added by a proxy still matches."""
+    if not if_none_match:
+        return False
+    for candidate in if_none_match.split(","):
+        candidate = candidate.strip()
+        if candidate == "*":
+            return True
+        if candidate.startswith("W/"):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+def conditional_response(request: Request, response: Response, etag: str, cache_control: str) -> Optional[Response]:
+    """
+    Returns a 304 if the client already has etag. Otherwise sets the validator headers
+    on the endpoint's response and returns None, so the endpoint renders the resource.
+    Take the etag before reading the data: a write that lands during the read then
+    leaves the client with an older tag, never new data under an old one.
+    """
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": cache_control})
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = cache_control
+    return None
+
+# ==================================
+# Session Hooks
+# ==================================
+
+@event.listens_for(models.AppSession, "after_flush")
+def _note_content_writes(db: Session, flush_context):
+    for obj in chain(db.new, db.dirty, db.deleted):
+        key = WATCHED_MODELS.get(type(obj))
+        if key is not None:
+            db.info.setdefault(_CHANGED_KEYS, set()).add(key)
+
+@event.listens_for(models.AppSession, "after_commit")
+def _bump_content_versions(db: Session):
+    for key in db.info.pop(_CHANGED_KEYS, ()):
+        content_versions.bump(key)
+        if _on_changed is not None:
+            _on_changed(key)
+
+@event.listens_for(models.AppSession, "after_rollback")
+def _forget_content_writes(db: Session):
+    db.info.pop(_CHANGED_KEYS, None)
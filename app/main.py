@@ -4,29 +4,103 @@
 # 1. Imports
 # ==================================
 import os
-from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks
-from sqlalchemy.orm import Session, joinedload
-from . import models, game_rules
-from .models import engine, SessionLocal, ItemType, ActionType, ResourceType, TargetType 
+from fastapi import FastAPI, Depends, HTTPException, WebSocket, WebSocketDisconnect, BackgroundTasks, Query, Request, Response
+from sqlalchemy import select
+from sqlalchemy.orm import Session, joinedload, selectinload
+from sqlalchemy.orm.exc import StaleDataError
+from sqlalchemy.ext.asyncio import AsyncSession
+from . import models, game_rules, rules_engine
+from .models import SessionLocal, AsyncSessionLocal, ItemType, ActionType, ResourceType, TargetType 
 import pydantic
 import random
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Callable
 from fastapi.middleware.cors import CORSMiddleware
-import json, string
+from fastapi.responses import ORJSONResponse
+import string
+import orjson
 import asyncio
+from contextlib import asynccontextmanager
 import datetime
 import math
+from .pubsub import create_pubsub_backend
+from .session_actor import SessionActorRegistry
+from .combat_state import CommittedView, HotStateStore, SessionState
+from .rules_catalog import rules_catalog
+from .stat_blocks import stat_blocks, StatBlock
+from .spatial_index import spatial_index
+from .session_rng import session_rngs
+from .dice import compile_dice, DiceSyntaxError
+from .movement import reach_cache, board_obstacles, find_path
+from .http_cache import (
+    content_versions,
+    session_key,
+    conditional_response,
+    set_change_callback as set_content_change_callback,
+    CATALOG_CACHE_CONTROL,
+    PRIVATE_CACHE_CONTROL
+)
+from .game_log import LogWriteBehind, make_log_row, buffer_log_row, has_pending_log_rows, discard_pending_log_rows, set_commit_callback
+from .session_sync import (
+    SessionSnapshotStore,
+    BroadcastScheduler,
+    ClientConnection,
+    STATE,
+    EVENT,
+    full_snapshot_message,
+    patch_message
+)
 from .ability_system import (
     AbilitySystem, 
     AbilityExecutionRequest, 
     TargetInfo,
-    AbilityExecutionResult
+    AbilityExecutionResult,
+    AbilityPreviewResult,
+    MAX_STALE_RETRIES
 )
 
 # ==================================
 # 2. Database Setup
 # ==================================
-models.Base.metadata.create_all(bind=engine)
+# No DDL at startup: the schema is created and upgraded by the Alembic migrations in app/migrations.
+
+# Eager loading for everything GameSessionSchema serializes. Collections use selectinload
+# (one "WHERE ... IN" query per level) and many-to-ones ride along with a join, so the
+# full graph costs 7 queries however many participants, items or objects the session has.
+SESSION_GRAPH_OPTIONS = (
+    selectinload(models.GameSession.participants)
+    .selectinload(models.SessionCharacter.character)
+    .options(
+        joinedload(models.Character.race),
+        joinedload(models.Character.char_class),
+        selectinload(models.Character.inventory).joinedload(models.CharacterInventory.item),
+    ),
+    selectinload(models.GameSession.skill_checks),
+    selectinload(models.GameSession.environmental_objects).selectinload(models.EnvironmentalObject.sections),
+)
+
+def load_session_graph(db: Session, session_id: int) -> models.GameSession | None:
+    """Loads a session with the whole graph GameSessionSchema needs, or None if it doesn't exist."""
+    return db.query(models.GameSession).options(*SESSION_GRAPH_OPTIONS).filter(models.GameSession.id == session_id).first()
+
+def dump_session_snapshot(db: Session, session_id: int) -> dict | None:
+    """The session as GameSessionSchema JSON, or None if it doesn't exist."""
+    session_db = load_session_graph(db, session_id)
+    if not session_db:
+        return None
+    return GameSessionSchema.model_validate(session_db).model_dump(mode="json")
+
+def load_combat_state(db: Session, session_id: int) -> SessionState | None:
+    """
+    Builds the in-memory hot state of a session (HOT_STATE_MODE) from the same graph the snapshot uses.
+    None for sessions that don't exist or aren't in combat: their commands run on the rows.
+    """
+    mode = db.query(models.GameSession.current_mode).filter(models.GameSession.id == session_id).scalar()
+    if mode != 'combat':
+        return None
+    session_db = load_session_graph(db, session_id)
+    if not session_db:
+        return None
+    return SessionState(session_db, GameSessionSchema.model_validate(session_db).model_dump(mode="json"))
 
 # ==================================
 # 3. Pydantic Schemas
@@ -135,51 +209,47 @@ class CharacterSchema(pydantic.BaseModel):
     movement_speed: int
     currency: int = 0 
     inventory: List[CharacterInventorySchema] = [] 
+
+    # Attributes and secondary stats come from the shared stat block for (race, class, level)
+    def _stats(self) -> StatBlock:
+        return stat_blocks.for_template(self.race, self.char_class, self.level)
+
     @pydantic.computed_field
     def bala(self) -> int:
-        return self.char_class.base_bala + self.race.bala_mod
+        return self._stats().bala
 
     @pydantic.computed_field
     def dakshata(self) -> int:
-        return self.char_class.base_dakshata + self.race.dakshata_mod
+        return self._stats().dakshata
 
     @pydantic.computed_field
     def dhriti(self) -> int:
-        return self.char_class.base_dhriti + self.race.dhriti_mod
+        return self._stats().dhriti
 
     @pydantic.computed_field
     def buddhi(self) -> int:
-        return self.char_class.base_buddhi + self.race.buddhi_mod
+        return self._stats().buddhi
 
     @pydantic.computed_field
     def prajna(self) -> int:
-        return self.char_class.base_prajna + self.race.prajna_mod
+        return self._stats().prajna
 
     @pydantic.computed_field
     def samkalpa(self) -> int:
-        return self.char_class.base_samkalpa + self.race.samkalpa_mod
+        return self._stats().samkalpa
     
     # Also calculate secondary stats
     @pydantic.computed_field
     def max_prana(self) -> int:
-        # Prana is based on Fortitude (Dhriti)
-        return 10 + (self.level * get_modifier(self.dhriti))
+        return self._stats().max_prana
 
     @pydantic.computed_field
     def max_tapas(self) -> int:
-        # Tapas is the sum of Deha (Body) attribute modifiers
-        bala_mod = get_modifier(self.bala)
-        dakshata_mod = get_modifier(self.dakshata)
-        dhriti_mod = get_modifier(self.dhriti)
-        return bala_mod + dakshata_mod + dhriti_mod
+        return self._stats().max_tapas
 
     @pydantic.computed_field
     def max_maya(self) -> int:
-        # Māyā is the sum of Ātman (Spirit) attribute modifiers
-        buddhi_mod = get_modifier(self.buddhi)
-        prajna_mod = get_modifier(self.prajna)
-        samkalpa_mod = get_modifier(self.samkalpa)
-        return buddhi_mod + prajna_mod + samkalpa_mod
+        return self._stats().max_maya
 
     class Config:
         from_attributes = True
@@ -263,6 +333,7 @@ class SessionCharacterSchema(pydantic.BaseModel):
     bonus_actions: int
     reactions: int
     character: CharacterSchema
+    version_id: int = 1
     class Config:
         from_attributes = True
 
@@ -308,6 +379,8 @@ class GameSessionSchema(pydantic.BaseModel):
     current_turn_index: int = 0
     skill_checks: List[SkillCheckSchema] = []
     environmental_objects: List[EnvironmentalObjectSchema] = []
+    # Row version; send it back as expected_version to make a mutation conditional
+    version_id: int = 1
 
     class Config:
         from_attributes = True
@@ -344,6 +417,7 @@ class GameSessionUpdate(pydantic.BaseModel):
     current_mode: str | None = None
     active_loka_resonance: str | None = None
     participant_positions: List[ParticipantPosition] | None = None
+    expected_version: int | None = None
 
 class GameAction(pydantic.BaseModel):
     actor_id: int
@@ -352,10 +426,13 @@ class GameAction(pydantic.BaseModel):
     target_id: int | None = None
     new_x: int | None = None
     new_y: int | None = None
+    expected_version: int | None = None
 
 class ActionResponse(pydantic.BaseModel):
     session: GameSessionSchema
     message: str
+    # MOVE: the cells walked, start first
+    path: Optional[List[Dict[str, int]]] = None
 
 class AddNpcsRequest(pydantic.BaseModel):
     character_ids: List[int] # Expects a list of IDs
@@ -444,59 +521,283 @@ class CharacterDeselectionRequest(pydantic.BaseModel):
 # ==================================
 # 4. The FastAPI App Instance & CORS
 # ==================================
+# Minimum spacing between two state pushes for the same session; mutations inside one tick share a broadcast.
+BROADCAST_TICK_MS = int(os.getenv("BROADCAST_TICK_MS", "40"))
+# Per-socket send queue bound and how far behind (seconds) a client may fall before it is disconnected
+WS_SEND_QUEUE_SIZE = int(os.getenv("WS_SEND_QUEUE_SIZE", "64"))
+WS_LAG_BUDGET_SECONDS = float(os.getenv("WS_LAG_BUDGET_SECONDS", "5"))
+# "memory" for a single worker, "postgres" (LISTEN/NOTIFY on DATABASE_URL) to run several workers
+BROADCAST_BACKEND = os.getenv("BROADCAST_BACKEND", "memory")
+# Session dumps can carry int dict keys (e.g. character_selections), which orjson rejects by default
+ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+# Log entry ids per pub/sub message, keeps Postgres NOTIFY payloads well under their 8000 byte cap
+LOG_IDS_PER_MESSAGE = 500
+# Comma-separated event types written behind the request instead of with its commit (e.g. "token_move,token_place").
+# Empty keeps every log entry in the action's own transaction.
+LOG_WRITE_BEHIND_EVENTS = {e.strip() for e in os.getenv("LOG_WRITE_BEHIND_EVENTS", "").split(",") if e.strip()}
+LOG_WRITE_BEHIND_MS = int(os.getenv("LOG_WRITE_BEHIND_MS", "250"))
+# Session commands are serialized per session; whatever queues up while a batch runs is committed as the next batch.
+# A tick > 0 additionally waits that long before each batch to gather more commands (trading latency for fewer commits).
+SESSION_COMMAND_TICK_MS = int(os.getenv("SESSION_COMMAND_TICK_MS", "0"))
+SESSION_COMMAND_MAX_BATCH = int(os.getenv("SESSION_COMMAND_MAX_BATCH", "32"))
+# Hot state mode: turn, action and ability commands run on in-memory session state that is journaled
+# (fsync) before they are acknowledged and written to the DB in batches every HOT_STATE_FLUSH_MS.
+# Memory is authoritative, so only enable it when every session is served by a single worker.
+# The journal directory must survive restarts (mount a volume in Docker).
+HOT_STATE_MODE = os.getenv("HOT_STATE_MODE", "").lower() in ("1", "true")
+HOT_STATE_JOURNAL_DIR = os.getenv("HOT_STATE_JOURNAL_DIR", "combat_journal")
+HOT_STATE_FLUSH_MS = int(os.getenv("HOT_STATE_FLUSH_MS", "1000"))
+
 class ConnectionManager:
-    def __init__(self):
-        self.active_connections: dict[int, list[WebSocket]] = {}
+    """
+    Holds this worker's sockets. Broadcasts are coalesced per session, published
+    through the pub/sub backend, and every worker fans received events out to
+    the sockets it holds locally.
+    """
+    def __init__(self, backend):
+        self.backend = backend
+        self.active_connections: dict[int, dict[WebSocket, ClientConnection]] = {}
+        self.snapshots = SessionSnapshotStore()
+        self.state_scheduler = BroadcastScheduler(self._flush_session_state, BROADCAST_TICK_MS / 1000)
+        self.log_scheduler = BroadcastScheduler(self._flush_log_entries, BROADCAST_TICK_MS / 1000)
+        self._pending_log_entries: dict[int, list[int]] = {}
+
+    async def start(self):
+        await self.backend.start(self._on_published)
+
+    async def stop(self):
+        await self.backend.stop()
 
     async def connect(self, websocket: WebSocket, session_id: int):
         await websocket.accept()
         if session_id not in self.active_connections:
-            self.active_connections[session_id] = []
-        self.active_connections[session_id].append(websocket)
+            self.active_connections[session_id] = {}
+        self.active_connections[session_id][websocket] = ClientConnection(
+            websocket,
+            snapshot_provider=lambda: self._snapshot_payload(session_id),
+            on_failure=lambda connection: self.disconnect(connection.websocket, session_id),
+            max_queue=WS_SEND_QUEUE_SIZE,
+            lag_budget_seconds=WS_LAG_BUDGET_SECONDS
+        )
 
     def disconnect(self, websocket: WebSocket, session_id: int):
-        if session_id in self.active_connections and websocket in self.active_connections[session_id]:
-            self.active_connections[session_id].remove(websocket)
-
-    async def broadcast_json(self, session_id: int, json_data: str):
-        if session_id in self.active_connections:
-            # Create a list of tasks for sending messages
-            tasks = [connection.send_text(json_data) for connection in self.active_connections[session_id]]
-            # Run them concurrently
-            await asyncio.gather(*tasks)
-
-    async def broadcast_session_state(self, session_id: int, db: Session):
-        """Fetches the session from DB, validates it, and broadcasts it."""
+        connections = self.active_connections.get(session_id)
+        if connections is None or websocket not in connections:
+            return
+        connection = connections.pop(websocket)
+        # No-op when the connection closed itself (send failure / lag cutoff) and reported here
+        connection.close(close_socket=False)
+        if not connections:
+            # Nobody is left to hold the base version, so the next broadcast starts from a full snapshot
+            del self.active_connections[session_id]
+            self.snapshots.forget(session_id)
+
+    def broadcast_bytes(self, session_id: int, payload: bytes, kind: str = EVENT):
+        """
+        Hands one already-serialized payload to every socket's writer (they all share the same immutable buffer).
+        Only enqueues: slow or dead sockets never hold up the caller or each other.
+        """
+        for connection in list(self.active_connections.get(session_id, {}).values()):
+            connection.send(payload, kind)
+
+    def broadcast_message(self, session_id: int, message: dict, kind: str = EVENT):
+        """Serializes message once with orjson and broadcasts the resulting bytes."""
+        self.broadcast_bytes(session_id, orjson.dumps(message, option=ORJSON_OPTIONS), kind)
+
+    async def load_session_snapshot(self, session_id: int) -> dict | None:
+        """
+        Fetches the session from DB (without blocking the event loop) and dumps it through GameSessionSchema.
+        A session resident in hot state mode is rendered from memory instead.
+        """
+        combat = session_actors.combat_state(session_id)
+        if combat is not None and not combat.snapshot_stale:
+            return combat.snapshot()
+        async with AsyncSessionLocal() as db:
+            snapshot = await db.run_sync(dump_session_snapshot, session_id)
+        if combat is not None and snapshot is not None:
+            # Cold parts changed outside the actor; the hot fields in the fresh dump may be behind memory
+            combat.base_snapshot = snapshot
+            combat.snapshot_stale = False
+            return combat.snapshot()
+        return snapshot
+
+    async def broadcast_session_state(self, session_id: int):
+        """
+        Fetches the session from DB and broadcasts what changed since the last broadcast.
+        Sends a versioned session_patch when a previous snapshot exists, otherwise a full session_update.
+        """
         print(f"Attempting to broadcast state for session {session_id}")
-        session_db = db.query(models.GameSession).options(joinedload(models.GameSession.participants).joinedload(models.SessionCharacter.character)).filter(models.GameSession.id == session_id).first()
-        if session_db:
-            # Convert the SQLAlchemy object to a Pydantic schema
-            session_schema = GameSessionSchema.model_validate(session_db)
-            
-            typed_message = {
-                "type": "session_update",
-                "data": session_schema.model_dump()
-            }
-            json_payload = json.dumps(typed_message, default=str)
-            await self.broadcast_json(session_id, json_payload)
-            print(f"Successfully broadcasted state for session {session_id}")
-        else:
+        snapshot = await self.load_session_snapshot(session_id)
+        if snapshot is None:
             print(f"Could not find session {session_id} in DB to broadcast.")
-manager = ConnectionManager()
+            return
+
+        version, patch = self.snapshots.advance(session_id, snapshot)
+        if patch is None:
+            typed_message = full_snapshot_message(version, snapshot)
+        elif not patch:
+            print(f"No changes to broadcast for session {session_id} (version {version})")
+            return
+        else:
+            typed_message = patch_message(version, patch)
+
+        self.broadcast_message(session_id, typed_message, kind=STATE)
+        print(f"Successfully broadcasted {typed_message['type']} v{version} for session {session_id}")
+
+    def schedule_broadcast(self, session_id: int):
+        """Marks the session state dirty; it is pushed once per tick no matter how many mutations happened."""
+        # Every mutation ends up here after its commit, which also makes it the session's ETag version
+        content_versions.bump(session_key(session_id))
+        self.state_scheduler.mark_dirty(session_id)
+
+    def queue_log_entries(self, session_id: int, entry_ids: list[int]):
+        """Queues committed log entries; they are pushed to clients inline, batched once per tick."""
+        self._pending_log_entries.setdefault(session_id, []).extend(entry_ids)
+        self.log_scheduler.mark_dirty(session_id)
+
+    async def _flush_session_state(self, session_id: int):
+        await self.backend.publish({"session_id": session_id, "kind": "state", "epoch": content_versions.epoch})
+
+    async def _flush_log_entries(self, session_id: int):
+        entry_ids = self._pending_log_entries.pop(session_id, [])
+        for start in range(0, len(entry_ids), LOG_IDS_PER_MESSAGE):
+            await self.backend.publish({
+                "session_id": session_id,
+                "kind": "log",
+                "entry_ids": entry_ids[start:start + LOG_IDS_PER_MESSAGE]
+            })
+
+    async def _on_published(self, message: dict):
+        """Delivers a session event from any worker to the sockets held by this one."""
+        if message.get("kind") == "catalog":
+            # Some worker changed the rules catalogs
+            rules_catalog.invalidate()
+            return
+        if message.get("kind") == "content":
+            if message.get("epoch") != content_versions.epoch:
+                content_versions.bump(message["key"])
+            return
+        session_id = message.get("session_id")
+        kind = message.get("kind")
+        if kind == "state":
+            # Possibly changed by another worker; invalidates this worker's ETag for GET /sessions/{id}/
+            content_versions.bump(session_key(session_id))
+            if message.get("epoch") != content_versions.epoch:
+                # Token moves and object changes made by another worker never reach this worker's commit hooks
+                spatial_index.invalidate(session_id)
+                board_obstacles.invalidate(session_id)
+        if session_id not in self.active_connections:
+            return
+        if kind == "state":
+            # Each worker diffs against its own snapshot store, so versions stay consistent per socket
+            await self.broadcast_session_state(session_id)
+        elif kind == "log":
+            # Only the ids travel through pub/sub; one indexed lookup per flush, never the whole log
+            async with AsyncSessionLocal() as db:
+                entries = (await db.scalars(
+                    select(models.GameLogEntry).filter(
+                        models.GameLogEntry.session_id == session_id,
+                        models.GameLogEntry.id.in_(message.get("entry_ids", []))
+                    ).order_by(models.GameLogEntry.id.asc())
+                )).all()
+                payload = [GameLogEntrySchema.model_validate(entry).model_dump() for entry in entries]
+            if payload:
+                self.broadcast_message(session_id, {"type": "log_entries", "entries": payload})
+
+    def send_message(self, websocket: WebSocket, session_id: int, message: dict):
+        """Sends a message to one socket only (replies to requests made over the socket)."""
+        connection = self.active_connections.get(session_id, {}).get(websocket)
+        if connection is not None:
+            connection.send(orjson.dumps(message, option=ORJSON_OPTIONS), EVENT)
+
+    def _snapshot_payload(self, session_id: int) -> bytes | None:
+        """Serialized full session_update for the last recorded snapshot, if any."""
+        current = self.snapshots.get(session_id)
+        if current is None:
+            return None
+        version, snapshot = current
+        return orjson.dumps(full_snapshot_message(version, snapshot), option=ORJSON_OPTIONS)
+
+    async def send_session_snapshot(self, websocket: WebSocket, session_id: int):
+        """Sends the full current snapshot to a single client (on connect, or when it asks to resync)."""
+        connection = self.active_connections.get(session_id, {}).get(websocket)
+        if connection is None:
+            return
+        if self.snapshots.get(session_id) is None:
+            snapshot = await self.load_session_snapshot(session_id)
+            if snapshot is None:
+                return
+            self.snapshots.advance(session_id, snapshot)
+        connection.send(self._snapshot_payload(session_id), kind=STATE)
+manager = ConnectionManager(create_pubsub_backend(BROADCAST_BACKEND, models.DATABASE_URL))
+log_write_behind = LogWriteBehind(interval_seconds=LOG_WRITE_BEHIND_MS / 1000)
+# Committed log entries are pushed to the live log
+set_commit_callback(manager.queue_log_entries)
+# Row lock on the session, so workers holding an actor for the same session take turns
+def lock_session_row(session_id: int):
+    return select(models.GameSession.id).where(models.GameSession.id == session_id).with_for_update()
+
+# Every committed batch of session commands also re-broadcasts that session's state
+session_actors = SessionActorRegistry(
+    models.async_engine,
+    AsyncSessionLocal,
+    lock_statement=lock_session_row,
+    on_committed=manager.schedule_broadcast,
+    tick_seconds=SESSION_COMMAND_TICK_MS / 1000,
+    max_batch=SESSION_COMMAND_MAX_BATCH,
+    hot_state=HotStateStore(
+        AsyncSessionLocal,
+        load_combat_state,
+        HOT_STATE_JOURNAL_DIR,
+        lock_statement=lock_session_row,
+        flush_seconds=HOT_STATE_FLUSH_MS / 1000
+    ) if HOT_STATE_MODE else None
+)
 
-app = FastAPI()
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await manager.start()
+    loop = asyncio.get_running_loop()
+    # Commits that change campaigns may run in the threadpool; the other workers bump their ETags too
+    set_content_change_callback(lambda key: asyncio.run_coroutine_threadsafe(
+        manager.backend.publish({"kind": "content", "key": key, "epoch": content_versions.epoch}), loop
+    ))
+    if session_actors.hot_state is not None:
+        # Commands acknowledged by a previous process that crashed before flushing them
+        await session_actors.hot_state.recover_all()
+    await log_write_behind.start()
+    yield
+    await session_actors.stop()
+    await log_write_behind.stop()
+    await manager.stop()
+
+app = FastAPI(lifespan=lifespan)
 app.add_middleware(CORSMiddleware, allow_origins=["http://localhost:5173"], allow_credentials=True, allow_methods=["*"], allow_headers=["*"])
 
 # ==================================
 # 5. DB Dependency
 # ==================================
+# Plain `def` endpoints use the sync Session (FastAPI runs them in its threadpool).
 def get_db():
     db = SessionLocal()
     try:
         yield db
+        if has_pending_log_rows(db):
+            # Entries logged after the endpoint's last commit
+            db.commit()
     finally:
         db.close()
 
+# `async def` endpoints take an AsyncSession and run their ORM work inside db.run_sync(...),
+# which drives the same sync-style code over asyncpg without blocking the event loop.
+# Endpoints that mutate one game session instead hand that work to session_actors.submit(...).
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+        if has_pending_log_rows(db):
+            # Entries logged after the endpoint's last commit
+            await db.commit()
+
 # ==================================
 # 6. API Endpoints
 # ==================================
@@ -505,49 +806,121 @@ def read_root():
     return {"message": "Welcome to the Vyuha VTT Backend!"}
 
 def log_event(db: Session, session_id: int, event_type: str, actor_id: int | None = None, target_id: int | None = None, details: dict | None = None):
-    """Creates and saves a new structured log entry to the database."""
-    new_entry = models.GameLogEntry(
-        session_id=session_id,
-        event_type=event_type,
-        actor_id=actor_id,
-        target_id=target_id,
-        details=details if details else {}
-    )
-    db.add(new_entry)
-    db.commit()
+    """
+    Adds a structured log entry to the current unit of work.
+    It is written (together with every other entry of the request, in one INSERT)
+    by the next db.commit() and pushed to the live log once that commit succeeds.
+    Event types listed in LOG_WRITE_BEHIND_EVENTS are written in the background instead.
+    """
+    row = make_log_row(session_id, event_type, actor_id=actor_id, target_id=target_id, details=details)
+    if event_type in LOG_WRITE_BEHIND_EVENTS:
+        log_write_behind.add(row)
+    else:
+        buffer_log_row(db, row)
+
+def commit_changes(db: Session, combat: SessionState | None):
+    """Commits a command's changes: the in-memory state's in hot state mode, db's otherwise."""
+    if combat is not None:
+        combat.commit()
+    else:
+        db.commit()
+
+def session_result(db: Session, session_id: int, combat: SessionState | None) -> "GameSessionSchema":
+    """The session to return from a command, rendered from memory in hot state mode."""
+    if combat is not None:
+        return GameSessionSchema.model_validate(combat.snapshot())
+    return GameSessionSchema.model_validate(load_session_graph(db, session_id))
+
+def check_expected_version(session: models.GameSession | SessionState, expected_version: int | None):
+    """Rejects a conditional mutation made against an older version of the session."""
+    if expected_version is not None and expected_version != session.version_id:
+        raise HTTPException(
+            status_code=409,
+            detail=f"Session has changed (version {session.version_id}, expected {expected_version}). Reload and try again."
+        )
 
 def generate_access_code(length: int = 6) -> str:
     """Generates a random alphanumeric access code."""
     return ''.join(random.choices(string.ascii_uppercase + string.digits, k=length))
 
+@app.get("/stats/broadcasts")
+def get_broadcast_stats():
+    """Counters for this worker's coalescing broadcast schedulers (requested vs. coalesced vs. actually sent), log writes and session command batches."""
+    return {
+        "backend": BROADCAST_BACKEND,
+        "session_state": manager.state_scheduler.stats(),
+        "log_entries": manager.log_scheduler.stats(),
+        "log_write_behind": log_write_behind.stats(),
+        "session_commands": session_actors.stats(),
+        "rules_catalog": rules_catalog.stats(),
+        "stat_blocks": stat_blocks.stats(),
+        "spatial_index": spatial_index.stats(),
+        "session_rng": session_rngs.stats(),
+        "reachable_cells": reach_cache.stats(),
+    }
+
+def catalog_etag() -> str:
+    return content_versions.etag("catalog", rules_catalog.version)
+
 @app.get("/rules/races", response_model=List[RaceSchema])
-def get_races(db: Session = Depends(get_db)):
-    """Fetches all playable races with their full details from the database."""
-    races = db.query(models.Race).order_by(models.Race.name).all()
-    return races
+def get_races(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Fetches all playable races with their full details (from the rules catalog cache)."""
+    not_modified = conditional_response(request, response, catalog_etag(), CATALOG_CACHE_CONTROL)
+    if not_modified is not None:
+        return not_modified
+    return rules_catalog.get(db).races.rows
 
 @app.get("/rules/classes", response_model=List[CharClassSchema])
-def get_classes(db: Session = Depends(get_db)):
-    """Fetches all playable classes with their full details from the database."""
-    classes = db.query(models.Char_Class).order_by(models.Char_Class.name).all()
-    return classes
+def get_classes(request: Request, response: Response, db: Session = Depends(get_db)):
+    """Fetches all playable classes with their full details (from the rules catalog cache)."""
+    not_modified = conditional_response(request, response, catalog_etag(), CATALOG_CACHE_CONTROL)
+    if not_modified is not None:
+        return not_modified
+    return rules_catalog.get(db).classes.rows
+
+@app.post("/rules/reload")
+async def reload_rules_catalog():
+    """Makes every worker reload the rules catalogs; call it after running a seed script against a live server."""
+    await manager.backend.publish({"kind": "catalog"})
+    return {"message": "Rules catalogs will be reloaded."}
 
 @app.websocket("/ws/{session_id}/{user_id}")
 async def websocket_endpoint(websocket: WebSocket, session_id: int, user_id: int):
     await manager.connect(websocket, session_id)
-    db = SessionLocal()
     try:
-        # When a user connects, immediately broadcast the latest game state to everyone in the session.
-        await manager.broadcast_session_state(session_id, db)
+        # When a user connects, send them the full current state; everyone else keeps receiving patches.
+        await manager.send_session_snapshot(websocket, session_id)
         
         # Keep the connection alive to listen for future messages (e.g., chat)
         while True:
-            await websocket.receive_text()
+            raw_message = await websocket.receive_text()
+            try:
+                message = orjson.loads(raw_message)
+            except orjson.JSONDecodeError:
+                continue
+            # A client that missed a patch (version gap) asks for a fresh full snapshot
+            if isinstance(message, dict) and message.get("type") == "resync":
+                await manager.send_session_snapshot(websocket, session_id)
+            # Movement overlay: the cells a participant can move to this turn
+            elif isinstance(message, dict) and message.get("type") == "reachable":
+                participant_id = message.get("participant_id")
+                if not isinstance(participant_id, int) or isinstance(participant_id, bool):
+                    reply = {"participant_id": participant_id, "error": "participant_id must be an integer"}
+                else:
+                    try:
+                        reply = await _read_reachable_cells(session_id, participant_id)
+                    except HTTPException as e:
+                        reply = {"participant_id": participant_id, "error": e.detail}
+                    except Exception as e:
+                        # Reported in-band: a failed lookup must not close the socket
+                        print(f"Reachable cells for participant {participant_id} in session {session_id} failed: {e}")
+                        reply = {"participant_id": participant_id, "error": "Could not compute reachable cells"}
+                manager.send_message(websocket, session_id, {"type": "reachable_cells", **reply})
     except WebSocketDisconnect:
         print(f"User {user_id} disconnected from session {session_id}")
-        manager.disconnect(websocket, session_id)
     finally:
-        db.close()
+        # Also covers sockets the manager already dropped (send failure / lag cutoff); disconnect is idempotent
+        manager.disconnect(websocket, session_id)
 
 # --- USER ENDPOINTS ---
 @app.post("/users/", response_model=PlayerSchema)
@@ -566,8 +939,11 @@ def get_or_create_user(user: PlayerCreate, db: Session = Depends(get_db)):
     db.refresh(new_user)
     return new_user
 
-@app.post("/join", response_model=JoinResponse)
-async def join_session(join_request: JoinRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+@app.post("/join", response_model=JoinResponse, response_class=ORJSONResponse)
+async def join_session(join_request: JoinRequest, background_tasks: BackgroundTasks, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(_join_session, join_request)
+
+def _join_session(db: Session, join_request: JoinRequest):
     session = db.query(models.GameSession).filter(models.GameSession.access_code == join_request.access_code.upper()).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session with that access code not found.")
@@ -578,15 +954,14 @@ async def join_session(join_request: JoinRequest, background_tasks: BackgroundTa
         current_session_id=session.id
     )
     db.add(new_player)
+    log_event(db, session.id, 'player_join', details={"player_name": new_player.display_name})
     db.commit()
     db.refresh(new_player)
-    log_event(db, session.id, 'player_join', details={"player_name": new_player.display_name})
     
-    background_tasks.add_task(manager.broadcast_session_state, session.id, db)
-    await manager.broadcast_json(session.id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session.id)
     return {
         "player": PlayerSchema.model_validate(new_player),
-        "session": GameSessionSchema.model_validate(session)
+        "session": GameSessionSchema.model_validate(load_session_graph(db, session.id))
     }
 
 @app.get("/users/", response_model=List[PlayerSchema])
@@ -596,15 +971,30 @@ def read_all_users(db: Session = Depends(get_db)):
 
 # --- ABILITY ENDPOINTS ---
 @app.post("/abilities/", response_model=AbilitySchema)
-def create_ability(ability: AbilityCreate, db: Session = Depends(get_db)):
+async def create_ability(ability: AbilityCreate, db: AsyncSession = Depends(get_async_db)):
+    new_ability = await db.run_sync(_create_ability, ability)
+    # This worker's catalog was invalidated by the commit; tell the others
+    await manager.backend.publish({"kind": "catalog"})
+    return new_ability
+
+def _create_ability(db: Session, ability: AbilityCreate):
+    # Parsed here, so a malformed expression never reaches combat
+    if ability.damage_dice is not None:
+        try:
+            compile_dice(ability.damage_dice)
+        except DiceSyntaxError as e:
+            raise HTTPException(status_code=400, detail=f"Invalid damage dice {ability.damage_dice!r}: {e}")
     new_ability = models.Ability(**ability.model_dump())
     db.add(new_ability); db.commit(); db.refresh(new_ability)
-    return new_ability
+    return AbilitySchema.model_validate(new_ability)
 
 @app.get("/abilities/", response_model=List[AbilitySchema])
-def read_all_abilities(db: Session = Depends(get_db)):
+def read_all_abilities(request: Request, response: Response, db: Session = Depends(get_db)):
     """Returns a list of all abilities available in the game."""
-    return db.query(models.Ability).all()
+    not_modified = conditional_response(request, response, catalog_etag(), CATALOG_CACHE_CONTROL)
+    if not_modified is not None:
+        return not_modified
+    return rules_catalog.get(db).abilities.rows
 
 # --- CHARACTER ENDPOINTS ---
 @app.post("/characters/", response_model=CharacterSchema)
@@ -613,12 +1003,13 @@ def create_character(character_input: CharacterCreate, db: Session = Depends(get
     Creates a new character, links it to a race and class from the database,
     and assigns default abilities defined in that class's database record.
     """
-    # Look up the chosen Race and Class in the database.
-    db_race = db.query(models.Race).filter(models.Race.name == character_input.race).first()
+    # Look up the chosen Race and Class in the rules catalog.
+    catalog = rules_catalog.get(db)
+    db_race = catalog.races.by_name.get(character_input.race)
     if not db_race:
         raise HTTPException(status_code=400, detail=f"Invalid race: {character_input.race}")
 
-    db_class = db.query(models.Char_Class).filter(models.Char_Class.name == character_input.char_class).first()
+    db_class = catalog.classes.by_name.get(character_input.char_class)
     if not db_class:
         raise HTTPException(status_code=400, detail=f"Invalid class: {character_input.char_class}")
 
@@ -635,9 +1026,10 @@ def create_character(character_input: CharacterCreate, db: Session = Depends(get
 
     # Assign default abilities
     if db_class.default_abilities:
-        abilities_to_learn = db.query(models.Ability).filter(
-            models.Ability.name.in_(db_class.default_abilities)
-        ).all()
+        abilities_to_learn = [
+            catalog.abilities.by_name[name] for name in db_class.default_abilities
+            if name in catalog.abilities.by_name
+        ]
         
         for ability in abilities_to_learn:
             new_link = models.CharacterAbility(
@@ -647,7 +1039,7 @@ def create_character(character_input: CharacterCreate, db: Session = Depends(get
             db.add(new_link)
         
         db.commit()
-    char_class = db.query(models.Char_Class).filter(models.Char_Class.id == new_character.char_class_id).first()
+    char_class = catalog.classes.by_id.get(new_character.char_class_id)
     if not char_class:
         # This is a fallback in case the class ID is invalid
         return new_character
@@ -659,7 +1051,7 @@ def create_character(character_input: CharacterCreate, db: Session = Depends(get
         # 3. Loop through the list and add each item to the character's inventory
         for item_name, quantity in default_items:
             # Find the master item in the 'items' table
-            item_to_add = db.query(models.Item).filter(models.Item.puranic_name == item_name).first()
+            item_to_add = catalog.items.by_name.get(item_name)
             if item_to_add:
                 # Create the new inventory entry
                 new_inventory_item = models.CharacterInventory(
@@ -702,18 +1094,22 @@ def get_character_abilities(character_id: int, db: Session = Depends(get_db)):
     ability_links = db.query(models.CharacterAbility).filter(models.CharacterAbility.character_id == character_id).all()
     
     abilities = []
+    abilities_by_id = rules_catalog.get(db).abilities.by_id
     for link in ability_links:
-        ability = db.query(models.Ability).filter(models.Ability.id == link.ability_id).first()
+        ability = abilities_by_id.get(link.ability_id)
         if ability:
             abilities.append(ability)
             
     return abilities
 
 @app.get("/character/{character_id}/inventory", response_model=List[CharacterInventorySchema])
-async def get_character_inventory(character_id: int, db: Session = Depends(get_db)):
+async def get_character_inventory(character_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Fetches the complete inventory for a specific character.
     """
+    return await db.run_sync(_get_character_inventory, character_id)
+
+def _get_character_inventory(db: Session, character_id: int):
     # Query for all inventory entries belonging to the character.
     # `joinedload` tells SQLAlchemy to also fetch the related item data in a single, efficient query.
     inventory_items = db.query(models.CharacterInventory).options(
@@ -724,10 +1120,10 @@ async def get_character_inventory(character_id: int, db: Session = Depends(get_d
         # It's not an error to have an empty inventory, just return an empty list.
         return []
         
-    return inventory_items
+    return [CharacterInventorySchema.model_validate(entry) for entry in inventory_items]
 
 # --- SESSION ENDPOINTS ---
-@app.post("/sessions", response_model=GameSessionSchema)
+@app.post("/sessions", response_model=GameSessionSchema, response_class=ORJSONResponse)
 def create_session(session_input: GameSessionCreate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
     SECRET_GM_CODE = os.getenv("GM_ACCESS_CODE")
     if not SECRET_GM_CODE or session_input.gm_access_code != SECRET_GM_CODE:
@@ -755,11 +1151,18 @@ def create_session(session_input: GameSessionCreate, background_tasks: Backgroun
     
     gm_user.current_session_id = new_session.id
     db.commit()
-    return new_session
-
-@app.get("/sessions/{session_id}/", response_model=GameSessionSchema)
-def read_session(session_id: int, db: Session = Depends(get_db)):
-    session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
+    return load_session_graph(db, new_session.id)
+
+@app.get("/sessions/{session_id}/", response_model=GameSessionSchema, response_class=ORJSONResponse)
+def read_session(session_id: int, request: Request, response: Response, db: Session = Depends(get_db)):
+    not_modified = conditional_response(request, response, content_versions.etag(session_key(session_id)), PRIVATE_CACHE_CONTROL)
+    if not_modified is not None:
+        return not_modified
+    combat = session_actors.combat_state(session_id)
+    if combat is not None:
+        # Resident in hot state mode: the rows may be behind memory
+        return combat.snapshot()
+    session = load_session_graph(db, session_id)
     if not session: raise HTTPException(status_code=404, detail="Session not found")
     return session
 
@@ -771,10 +1174,14 @@ def get_session_players(session_id: int, db: Session = Depends(get_db)):
         return []
     return players
 
-@app.patch("/sessions/{session_id}/", response_model=GameSessionSchema)
-async def update_session(session_id: int, session_update: GameSessionUpdate, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+@app.patch("/sessions/{session_id}/", response_model=GameSessionSchema, response_class=ORJSONResponse)
+async def update_session(session_id: int, session_update: GameSessionUpdate, background_tasks: BackgroundTasks):
+    return await session_actors.submit(session_id, _update_session, session_id, session_update)
+
+def _update_session(db: Session, session_id: int, session_update: GameSessionUpdate):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     if not session: raise HTTPException(status_code=404, detail="Session not found")
+    check_expected_version(session, session_update.expected_version)
     
     # ... (The logic inside this function remains the same)
     update_data = session_update.model_dump(exclude_unset=True)
@@ -799,17 +1206,19 @@ async def update_session(session_id: int, session_update: GameSessionUpdate, bac
                 p.y_pos = pos_data.y_pos
     
     db.commit()
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
-    background_tasks.add_task(manager.broadcast_session_state, session_id, db)
-    return GameSessionSchema.model_validate(session)
+    manager.schedule_broadcast(session_id)
+    return GameSessionSchema.model_validate(load_session_graph(db, session_id))
 
-@app.post("/sessions/{session_id}/add_character", response_model=GameSessionSchema)
-async def add_character_to_session(session_id: int, request: AddCharacterRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+@app.post("/sessions/{session_id}/add_character", response_model=GameSessionSchema, response_class=ORJSONResponse)
+async def add_character_to_session(session_id: int, request: AddCharacterRequest, background_tasks: BackgroundTasks):
     """
     Adds a character to the game session.
     - If added by a player, enforces a 1-character limit.
     - If added by the GM, it is treated as an NPC.
     """
+    return await session_actors.submit(session_id, _add_character_to_session, session_id, request)
+
+def _add_character_to_session(db: Session, session_id: int, request: AddCharacterRequest):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     requesting_user = db.query(models.User).filter(models.User.id == request.player_id).first()
 
@@ -839,8 +1248,8 @@ async def add_character_to_session(session_id: int, request: AddCharacterRequest
     elif is_request_from_gm and character.owner_id != session.gm_id:
          raise HTTPException(status_code=403, detail="GM does not own this character template.")
     
-    # REFACTOR: Use the Pydantic schema to calculate the character's max values.
-    char_schema = CharacterSchema.model_validate(character)
+    # Max values come from the character's precomputed stat block
+    stats = stat_blocks.for_character(character)
     
     # REFACTOR: Create the new participant using the calculated values.
     new_participant = models.SessionCharacter(
@@ -848,24 +1257,27 @@ async def add_character_to_session(session_id: int, request: AddCharacterRequest
         character_id=request.character_id,
         # CORRECTED: NPCs added by the GM should be controlled by the GM.
         player_id=session.gm_id if is_request_from_gm else request.player_id,
-        current_prana=char_schema.max_prana,
-        current_tapas=char_schema.max_tapas,
-        current_maya=char_schema.max_maya,
-        remaining_speed=char_schema.movement_speed,
+        current_prana=stats.max_prana,
+        current_tapas=stats.max_tapas,
+        current_maya=stats.max_maya,
+        remaining_speed=character.movement_speed,
         x_pos=None,
         y_pos=None
     )
 
     db.add(new_participant)
-    db.commit()
+    db.flush() # Assigns the participant id for the log entry
     log_event(db, session_id, 'character_select', actor_id=new_participant.id, details={"player_name": requesting_user.display_name, "character_name": character.name})
-    background_tasks.add_task(manager.broadcast_session_state, session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
-    return GameSessionSchema.model_validate(session)
+    db.commit()
+    manager.schedule_broadcast(session_id)
+    return GameSessionSchema.model_validate(load_session_graph(db, session_id))
 
-@app.delete("/sessions/{session_id}/participants/{participant_id}", response_model=GameSessionSchema)
-async def remove_character_from_session(session_id: int, participant_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+@app.delete("/sessions/{session_id}/participants/{participant_id}", response_model=GameSessionSchema, response_class=ORJSONResponse)
+async def remove_character_from_session(session_id: int, participant_id: int, background_tasks: BackgroundTasks):
     """Removes a participant (SessionCharacter) from a game session."""
+    return await session_actors.submit(session_id, _remove_character_from_session, session_id, participant_id)
+
+def _remove_character_from_session(db: Session, session_id: int, participant_id: int):
     
     # Find the specific participant record to delete
     participant = db.query(models.SessionCharacter).filter(
@@ -876,20 +1288,21 @@ async def remove_character_from_session(session_id: int, participant_id: int, ba
     if not participant:
         raise HTTPException(status_code=404, detail="Participant not found in this session.")
 
-    session = participant.session # Get a reference to the session before deleting
-
     db.delete(participant)
     db.commit()
 
     # Broadcast the update to all connected clients
-    background_tasks.add_task(manager.broadcast_session_state, session_id, db)
+    manager.schedule_broadcast(session_id)
     
-    return session
+    return GameSessionSchema.model_validate(load_session_graph(db, session_id))
 
 # app/main.py
 
-@app.post("/sessions/{session_id}/begin_combat", response_model=GameSessionSchema)
-async def begin_combat(session_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+@app.post("/sessions/{session_id}/begin_combat", response_model=GameSessionSchema, response_class=ORJSONResponse)
+async def begin_combat(session_id: int, background_tasks: BackgroundTasks):
+    return await session_actors.submit(session_id, _begin_combat, session_id)
+
+def _begin_combat(db: Session, session_id: int):
     session = db.query(models.GameSession).options(
         joinedload(models.GameSession.participants)
         .joinedload(models.SessionCharacter.character)  
@@ -904,24 +1317,30 @@ async def begin_combat(session_id: int, background_tasks: BackgroundTasks, db: S
 
     
     initiative_results = []
+    # Every initiative die in one draw from the session's stream
+    rng = session_rngs.stream(db, session)
+    first_draw = rng.draws
+    rolls = iter(rng.integers(1, 21, size=sum(1 for p in session.participants if p.character)).tolist())
     for p in session.participants:
         if p.character:
-            dakshata_mod = get_modifier(CharacterSchema.model_validate(p.character).dakshata)
-            roll = random.randint(1, 20)
+            stats = stat_blocks.for_character(p.character)
+            dakshata_mod = stats.modifier("dakshata")
+            roll = next(rolls)
             total_score = roll + dakshata_mod
             
             log_event(db, session_id, 'initiative_roll', actor_id=p.id, details={
                 "character_name": p.character.name,
                 "roll": roll,
                 "modifier": dakshata_mod,
-                "total": total_score
+                "total": total_score,
+                "rng_draw": first_draw
             })
 
             initiative_results.append({
                 "participant_id": p.id,
                 "score": total_score,
-                "dakshata": CharacterSchema.model_validate(p.character).dakshata,
-                "participant_name": CharacterSchema.model_validate(p.character).name
+                "dakshata": stats.dakshata,
+                "participant_name": p.character.name
             })
             p.status = 'active'
     
@@ -940,26 +1359,31 @@ async def begin_combat(session_id: int, background_tasks: BackgroundTasks, db: S
 
     db.commit()
 
-    background_tasks.add_task(manager.broadcast_session_state, session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session_id)
     
-    return GameSessionSchema.model_validate(session)
+    return GameSessionSchema.model_validate(load_session_graph(db, session_id))
 
 
-@app.post("/sessions/{session_id}/ability", response_model=ActionResponse)
+@app.post("/sessions/{session_id}/ability", response_model=ActionResponse, response_class=ORJSONResponse)
 async def execute_ability(
     session_id: int, 
     request: AbilityExecutionRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """
     New unified endpoint for ability execution.
     Handles all ability types: attacks, heals, buffs, area effects, etc.
     """
+    return await session_actors.submit_hot(session_id, _execute_ability, session_id, request)
+
+def _execute_ability(db: Session, session_id: int, request: AbilityExecutionRequest, combat: SessionState | None = None):
+    if request.expected_version is not None:
+        session = combat or db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
+        if not session: raise HTTPException(status_code=404, detail="Session not found")
+        check_expected_version(session, request.expected_version)
     
     # Initialize the ability system
-    ability_system = AbilitySystem(db, session_id)
+    ability_system = AbilitySystem(db, session_id, combat=combat)
     
     # Execute the ability
     result = ability_system.execute_ability(request)
@@ -967,13 +1391,7 @@ async def execute_ability(
     if not result.success:
         print(f"DEBUG: Ability FAILED - {result.message}")
         raise HTTPException(status_code=400, detail=result.message)
-    try:
-        db.commit()
-    except Exception as e:
-        db.rollback()
-        print(f"CRITICAL DB ERROR: Failed to commit ability execution: {e}")
-        raise HTTPException(status_code=500, detail="Database update failed after action.")
-    # Log all events
+    # Log all events; they are written by the commit below in a single INSERT
     for log_detail in result.log_events:
         event_type = log_detail.pop("event_type")
         log_event(
@@ -984,54 +1402,136 @@ async def execute_ability(
             target_id=log_detail.get("target_id"),
             details=log_detail
         )
+    try:
+        commit_changes(db, combat)
+    except Exception as e:
+        db.rollback()
+        print(f"CRITICAL DB ERROR: Failed to commit ability execution: {e}")
+        raise HTTPException(status_code=500, detail="Database update failed after action.")
     
     # Broadcast updates
-    background_tasks.add_task(manager.broadcast_session_state, session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session_id)
     
     # Fetch and return updated session
-    session = db.query(models.GameSession).filter(
-        models.GameSession.id == session_id
-    ).first()
-    
     return ActionResponse(
-        session=GameSessionSchema.model_validate(session),
+        session=session_result(db, session_id, combat),
         message=result.message
     )
 
+@app.post("/sessions/{session_id}/ability/preview", response_model=AbilityPreviewResult, response_class=ORJSONResponse)
+async def preview_ability(session_id: int, request: AbilityExecutionRequest):
+    """
+    Exact hit chance and damage/healing distribution of an ability against its current targets.
+    Nothing is rolled or written, so the UI can call it on hover. A read: instead of queueing behind
+    the session's writes, it runs in a worker thread on its own session, over what a resident
+    hot state last committed (taken here, on the event loop the actor runs on).
+    """
+    combat = session_actors.committed_view(session_id)
+    return await asyncio.to_thread(_run_read, _preview_ability, session_id, request, combat)
 
-@app.post("/sessions/{session_id}/action", response_model=ActionResponse)
-async def perform_action(session_id: int, action: GameAction, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
-    session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
-    actor = db.query(models.SessionCharacter).filter(models.SessionCharacter.id == action.actor_id).first()
-    validated_actor_character = CharacterSchema.model_validate(actor.character)
+def _preview_ability(db: Session, session_id: int, request: AbilityExecutionRequest, combat: CommittedView | None = None):
+    result = AbilitySystem(db, session_id, combat=combat).preview_ability(request)
+    if not result.success:
+        raise HTTPException(status_code=400, detail=result.message)
+    return result
+
+
+@app.get("/sessions/{session_id}/participants/{participant_id}/reachable", response_class=ORJSONResponse)
+async def get_reachable_cells(session_id: int, participant_id: int):
+    """
+    Cells the participant can move to this turn, as run-length rows [y, first x, count].
+    Also available over the session WebSocket: {"type": "reachable", "participant_id": ...}.
+    A read, run like the ability preview.
+    """
+    return await _read_reachable_cells(session_id, participant_id)
+
+async def _read_reachable_cells(session_id: int, participant_id: int):
+    combat = session_actors.committed_view(session_id)
+    return await asyncio.to_thread(_run_read, _reachable_cells, session_id, participant_id, combat)
+
+def _run_read(command: Callable[..., Any], *args) -> Any:
+    """command(db, *args) on a session of its own, for reads done in a worker thread."""
+    db = SessionLocal()
+    try:
+        return command(db, *args)
+    finally:
+        db.close()
+
+def _reachable_cells(db: Session, session_id: int, participant_id: int, combat: CommittedView | None = None):
+    if combat is not None:
+        participant = combat.participants.get(participant_id)
+        grid = combat.grid
+    else:
+        participant = db.query(models.SessionCharacter).filter(models.SessionCharacter.id == participant_id).first()
+        grid = spatial_index.get(db, session_id)
+    if not participant or participant.session_id != session_id:
+        raise HTTPException(status_code=404, detail="Participant not found in this session")
+    if participant.x_pos is None or participant.y_pos is None:
+        raise HTTPException(status_code=400, detail="Participant not on grid")
+    return reach_cache.reach(db, participant, grid).to_message(participant.id)
+
+
+@app.post("/sessions/{session_id}/action", response_model=ActionResponse, response_class=ORJSONResponse)
+async def perform_action(session_id: int, action: GameAction, background_tasks: BackgroundTasks):
+    return await session_actors.submit_hot(session_id, _perform_action, session_id, action)
+
+def _perform_action(db: Session, session_id: int, action: GameAction, combat: SessionState | None = None):
+    """Runs the action, re-running it on fresh rows if a concurrent write bumped a row version underneath it."""
+    for attempt in range(1, MAX_STALE_RETRIES + 2):
+        try:
+            return _resolve_action(db, session_id, action, combat)
+        except StaleDataError:
+            db.rollback()
+            discard_pending_log_rows(db)
+            if attempt > MAX_STALE_RETRIES:
+                raise HTTPException(status_code=409, detail="The session changed while the action resolved. Please try again.")
+            print(f"DEBUG: Stale row while performing {action.action_type}, retrying ({attempt}/{MAX_STALE_RETRIES}).")
+
+def _resolve_action(db: Session, session_id: int, action: GameAction, combat: SessionState | None = None):
+    if combat is not None:
+        session = combat
+        actor = combat.participants.get(action.actor_id)
+    else:
+        session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
+        actor = db.query(models.SessionCharacter).filter(models.SessionCharacter.id == action.actor_id).first()
     if not session or not actor or actor.session_id != session_id:
         raise HTTPException(status_code=400, detail="Invalid actor or session")
+    actor_stats = stat_blocks.for_character(actor.character)
+    check_expected_version(session, action.expected_version)
 
     if actor.status == "downed":
         raise HTTPException(status_code=400, detail=f"{actor.character.name} is downed and cannot take actions.")
 
     message = ""
+    walked = None
 
     if action.action_type == "MOVE":
         if actor.x_pos is None: raise HTTPException(status_code=400, detail="Actor not on grid")
-        distance = abs(actor.x_pos - action.new_x) + abs(actor.y_pos - action.new_y)
-        if distance > actor.remaining_speed:
-            raise HTTPException(status_code=400, detail=f"Move exceeds remaining speed of {actor.remaining_speed}")
+        if action.new_x is None or action.new_y is None:
+            raise HTTPException(status_code=400, detail="MOVE needs new_x and new_y")
+        # Cheapest path around obstacles and tokens; the movement overlay uses the same costs
+        path = find_path(db, actor, combat.grid if combat is not None else spatial_index.get(db, session_id), (action.new_x, action.new_y))
+        if path is None:
+            raise HTTPException(status_code=400, detail=f"({action.new_x}, {action.new_y}) can't be reached with remaining speed of {actor.remaining_speed}")
         
         actor.x_pos = action.new_x
         actor.y_pos = action.new_y
-        actor.remaining_speed -= distance # Subtract the distance moved
+        actor.remaining_speed -= path.cost # Subtract the distance moved
+        walked = [{"x": x, "y": y} for x, y in path.cells]
         log_event(db, session_id, 'move', actor_id=actor.id, details={
             "character_name": actor.character.name,
-            "new_pos": {"x": action.new_x, "y": action.new_y}
+            "new_pos": {"x": action.new_x, "y": action.new_y},
+            "path": walked
         })
 
         
 
     elif action.action_type == "ATTACK":
-        target = db.query(models.SessionCharacter).filter(models.SessionCharacter.id == action.target_id).first()
-        ability = db.query(models.Ability).filter(models.Ability.id == action.ability_id).first()
+        if combat is not None:
+            target = combat.participants.get(action.target_id)
+        else:
+            target = db.query(models.SessionCharacter).filter(models.SessionCharacter.id == action.target_id).first()
+        ability = rules_catalog.get(db).abilities.by_id.get(action.ability_id)
         if not target or not ability: raise HTTPException(status_code=404, detail="Target or Ability not found")
         if actor.x_pos is None or target.x_pos is None: raise HTTPException(status_code=400, detail="Characters not on grid")
         distance = max(abs(actor.x_pos - target.x_pos), abs(actor.y_pos - target.y_pos))
@@ -1044,26 +1544,24 @@ async def perform_action(session_id: int, action: GameAction, background_tasks:
             })
         else:
             # The rest of the attack logic only runs if the target is in range.
-            to_hit_mod = get_modifier(getattr(validated_actor_character, ability.to_hit_attribute))
-            attack_roll = random.randint(1, 20)
-            total_attack = attack_roll + to_hit_mod
-            evasion_dc = 10 + get_modifier(CharacterSchema.model_validate(target.character).dakshata)
+            to_hit_mod = rules_engine.to_hit_modifier(actor_stats, ability)
+            rng = session_rngs.stream(db, session)
+            first_draw = rng.draws
+            attack_roll = rng.randint(1, 20)
+            evasion_dc = rules_engine.evasion_dc(stat_blocks.for_character(target.character))
+            damage_roll = int(rules_engine.ability_dice(ability).roll(rng, 1)[0])
+            total_attack, hit, total_damage, new_prana = (int(value) for value in rules_engine.resolve_attacks(
+                attack_roll, to_hit_mod, evasion_dc, damage_roll, rules_engine.damage_modifier(actor_stats, ability), target.current_prana
+            ))
             
-            if total_attack >= evasion_dc:
-                damage_mod = 0
-                if ability.damage_attribute:
-                    damage_mod = get_modifier(getattr(validated_actor_character, ability.damage_attribute))
-                
-                num, dice = map(int, ability.damage_dice.split('d'))
-                damage_roll = sum(random.randint(1, dice) for _ in range(num))
-                total_damage = max(0, damage_roll + damage_mod)
-                target.current_prana = max(0, target.current_prana - total_damage)
+            if hit:
+                target.current_prana = new_prana
                 log_event(db, session_id, 'attack_hit', actor_id=actor.id, target_id=target.id, details={
                 "actor_name": actor.character.name,
                 "target_name": target.character.name,
                 "ability_name": ability.name,
                 "roll": attack_roll, "modifier": to_hit_mod, "total": total_attack, "dc": evasion_dc,
-                "damage": total_damage
+                "damage": total_damage, "rng_draw": first_draw
             })
                 if target.current_prana == 0:
                     target.status = "downed"
@@ -1073,40 +1571,53 @@ async def perform_action(session_id: int, action: GameAction, background_tasks:
                 "actor_name": actor.character.name,
                 "target_name": target.character.name,
                 "ability_name": ability.name,
-                "roll": attack_roll, "modifier": to_hit_mod, "total": total_attack, "dc": evasion_dc
+                "roll": attack_roll, "modifier": to_hit_mod, "total": total_attack, "dc": evasion_dc,
+                "rng_draw": first_draw
             })
     
-    db.commit()
-    background_tasks.add_task(manager.broadcast_session_state, session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    commit_changes(db, combat)
+    manager.schedule_broadcast(session_id)
     
-    return {"session": GameSessionSchema.model_validate(session), "message": message}
+    return {"session": session_result(db, session_id, combat), "message": message, "path": walked}
+
+@app.post("/sessions/{session_id}/next_turn", response_model=GameSessionSchema, response_class=ORJSONResponse)
+async def next_turn(session_id: int, background_tasks: BackgroundTasks, expected_version: int | None = None):
+    return await session_actors.submit_hot(session_id, _next_turn, session_id, expected_version)
 
-@app.post("/sessions/{session_id}/next_turn", response_model=GameSessionSchema)
-async def next_turn(session_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+def _next_turn(db: Session, session_id: int, expected_version: int | None = None, combat: SessionState | None = None):
     # ... (The logic inside this function remains the same)
-    session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
+    if combat is not None:
+        session = combat
+        get_participant = combat.participants.get
+    else:
+        session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
+        get_participant = lambda participant_id: db.query(models.SessionCharacter).filter(models.SessionCharacter.id == participant_id).first()
     if not session or session.current_mode != 'combat': raise HTTPException(status_code=400, detail="Not in combat.")
-    current_char = db.query(models.SessionCharacter).filter(models.SessionCharacter.id == session.turn_order[session.current_turn_index]).first()
+    # Guards against a double "end turn" advancing twice
+    check_expected_version(session, expected_version)
+    current_char = get_participant(session.turn_order[session.current_turn_index])
     if current_char: current_char.remaining_speed = 0
     next_index = (session.current_turn_index + 1) % len(session.turn_order)
     session.current_turn_index = next_index
-    next_char = db.query(models.SessionCharacter).filter(models.SessionCharacter.id == session.turn_order[next_index]).first()
+    next_char = get_participant(session.turn_order[next_index])
     if next_char: 
         next_char.remaining_speed = next_char.character.movement_speed
         next_char.actions = 1
         next_char.bonus_actions = 1
     
-    db.commit()
+    commit_changes(db, combat)
 
     
-    background_tasks.add_task(manager.broadcast_session_state, session.id, db)
+    manager.schedule_broadcast(session.id)
 
-    return GameSessionSchema.model_validate(session)
+    return session_result(db, session_id, combat)
 
-@app.post("/sessions/{session_id}/end_combat", response_model=GameSessionSchema)
-async def end_combat(session_id: int, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+@app.post("/sessions/{session_id}/end_combat", response_model=GameSessionSchema, response_class=ORJSONResponse)
+async def end_combat(session_id: int, background_tasks: BackgroundTasks):
     """Ends the current combat, switching the mode back to exploration."""
+    return await session_actors.submit(session_id, _end_combat, session_id)
+
+def _end_combat(db: Session, session_id: int):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -1131,14 +1642,16 @@ async def end_combat(session_id: int, background_tasks: BackgroundTasks, db: Ses
     session.current_mode = 'exploration'
     log_event(db, session_id, 'mode_change', details={"new_mode": "exploration"})
     db.commit()
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
     # Broadcast the updated state to all players
-    background_tasks.add_task(manager.broadcast_session_state, session.id, db)
-    return GameSessionSchema.model_validate(session)
+    manager.schedule_broadcast(session.id)
+    return GameSessionSchema.model_validate(load_session_graph(db, session_id))
 
-@app.post("/sessions/{session_id}/add_npcs", response_model=GameSessionSchema)
-async def add_npcs_to_session(session_id: int, request: AddNpcsRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+@app.post("/sessions/{session_id}/add_npcs", response_model=GameSessionSchema, response_class=ORJSONResponse)
+async def add_npcs_to_session(session_id: int, request: AddNpcsRequest, background_tasks: BackgroundTasks):
     """GM-only endpoint to add multiple NPCs to a session at once."""
+    return await session_actors.submit(session_id, _add_npcs_to_session, session_id, request)
+
+def _add_npcs_to_session(db: Session, session_id: int, request: AddNpcsRequest):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found.")
@@ -1157,17 +1670,17 @@ async def add_npcs_to_session(session_id: int, request: AddNpcsRequest, backgrou
 
     new_npcs = []
     for char in character_templates:
-        # REFACTOR: Use our Pydantic schema to calculate the character's max values.
-        char_schema = CharacterSchema.model_validate(char)
+        # Max values come from the character's precomputed stat block
+        stats = stat_blocks.for_character(char)
         
         # REFACTOR: Create the new SessionCharacter using the calculated values from the schema.
         new_npc = models.SessionCharacter(
             session_id=session.id,
             character_id=char.id,
             player_id=session.gm_id,
-            current_prana=char_schema.max_prana,
-            current_tapas=char_schema.max_tapas,
-            current_maya=char_schema.max_maya,
+            current_prana=stats.max_prana,
+            current_tapas=stats.max_tapas,
+            current_maya=stats.max_maya,
             x_pos=None,
             y_pos=None
         )
@@ -1176,15 +1689,18 @@ async def add_npcs_to_session(session_id: int, request: AddNpcsRequest, backgrou
     db.add_all(new_npcs)
     db.commit()
 
-    background_tasks.add_task(manager.broadcast_session_state, session_id, db)
+    manager.schedule_broadcast(session_id)
     # The final returned session will correctly include the newly added NPCs.
-    return GameSessionSchema.model_validate(session)
+    return GameSessionSchema.model_validate(load_session_graph(db, session_id))
 
-@app.post("/sessions/{session_id}/update_npcs/", response_model=GameSessionSchema)
-async def update_session_npcs(session_id: int, request: UpdateNpcsRequest, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+@app.post("/sessions/{session_id}/update_npcs/", response_model=GameSessionSchema, response_class=ORJSONResponse)
+async def update_session_npcs(session_id: int, request: UpdateNpcsRequest, background_tasks: BackgroundTasks):
     """
     Synchronizes the NPCs in a session with a provided list of character IDs.
     """
+    return await session_actors.submit(session_id, _update_session_npcs, session_id, request)
+
+def _update_session_npcs(db: Session, session_id: int, request: UpdateNpcsRequest):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -1221,37 +1737,70 @@ async def update_session_npcs(session_id: int, request: UpdateNpcsRequest, backg
             if char.owner_id != session.gm_id:
                 raise HTTPException(status_code=403, detail=f"GM does not own character template: {char.name}")
 
-            # Step 2: Use our Pydantic schema to calculate the character's max values.
-            char_schema = CharacterSchema.model_validate(char)
+            # Step 2: Max values come from the character's precomputed stat block.
+            stats = stat_blocks.for_character(char)
             
             # Step 3: Create the new SessionCharacter using the calculated values.
             new_npc = models.SessionCharacter(
                 session_id=session.id, 
                 character_id=char.id, 
                 player_id=session.gm_id, # NPCs are "owned" by the GM in a session
-                current_prana=char_schema.max_prana, 
-                current_tapas=char_schema.max_tapas, 
-                current_maya=char_schema.max_maya,
-                remaining_speed=char_schema.movement_speed
+                current_prana=stats.max_prana, 
+                current_tapas=stats.max_tapas, 
+                current_maya=stats.max_maya,
+                remaining_speed=char.movement_speed
             )
             db.add(new_npc)
 
     db.commit()
-    background_tasks.add_task(manager.broadcast_session_state, session_id, db)
-    return GameSessionSchema.model_validate(session)
+    manager.schedule_broadcast(session_id)
+    return GameSessionSchema.model_validate(load_session_graph(db, session_id))
+
+# Page size bounds for GET /sessions/{id}/log
+LOG_PAGE_DEFAULT = 200
+LOG_PAGE_MAX = 1000
 
 @app.get("/sessions/{session_id}/log", response_model=List[GameLogEntrySchema])
-def get_session_log(session_id: int, db: Session = Depends(get_db)):
-    """Fetches all log entries for a session, ordered by timestamp."""
-    log_entries = db.query(models.GameLogEntry).filter(models.GameLogEntry.session_id == session_id).order_by(models.GameLogEntry.timestamp.asc()).all()
+def get_session_log(
+    session_id: int,
+    after_id: int | None = None,
+    before_id: int | None = None,
+    limit: int = Query(LOG_PAGE_DEFAULT, ge=1, le=LOG_PAGE_MAX),
+    event_type: str | None = None,
+    db: Session = Depends(get_db)
+):
+    """
+    Fetches one page of log entries for a session, always returned in ascending id order.
+    - after_id: the first `limit` entries newer than after_id (incremental reads)
+    - before_id: the last `limit` entries older than before_id (scrolling back)
+    - neither: the last `limit` entries of the session (tail)
+    event_type optionally filters the page to a single event type.
+    """
+    query = db.query(models.GameLogEntry).filter(models.GameLogEntry.session_id == session_id)
+    if after_id is not None:
+        query = query.filter(models.GameLogEntry.id > after_id)
+    if before_id is not None:
+        query = query.filter(models.GameLogEntry.id < before_id)
+    if event_type:
+        query = query.filter(models.GameLogEntry.event_type == event_type)
+
+    if after_id is not None:
+        return query.order_by(models.GameLogEntry.id.asc()).limit(limit).all()
+
+    # Tail / backwards page: walk the (session_id, id) index from the newest end, then flip
+    log_entries = query.order_by(models.GameLogEntry.id.desc()).limit(limit).all()
+    log_entries.reverse()
     return log_entries
 
 @app.post("/sessions/{session_id}/skill_check/request")
-async def request_skill_check(session_id: int, request: SkillCheckRequest, db: Session = Depends(get_db)):
+async def request_skill_check(session_id: int, request: SkillCheckRequest):
     """
     Endpoint for a GM to request a skill check from one or more participants.
     This creates the pending check records in the database.
     """
+    return await session_actors.submit(session_id, _request_skill_check, session_id, request)
+
+def _request_skill_check(db: Session, session_id: int, request: SkillCheckRequest):
     gm_actor_name = "Game Master" # Or fetch GM character name if you have one
 
     targets = db.query(models.SessionCharacter).options(
@@ -1290,17 +1839,19 @@ async def request_skill_check(session_id: int, request: SkillCheckRequest, db: S
     db.commit()
 
     # Broadcast the new state to all clients.
-    await manager.broadcast_session_state(session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session_id)
 
     return {"message": f"Skill check request sent to {len(target_names)} participants."}
 
 
 @app.post("/sessions/{session_id}/skill_check/roll")
-async def roll_skill_check(session_id: int, request: SkillCheckRoll, background_tasks: BackgroundTasks, db: Session = Depends(get_db)):
+async def roll_skill_check(session_id: int, request: SkillCheckRoll, background_tasks: BackgroundTasks):
     """
     Performs a skill check. All modifier logic is self-contained in this function.
     """
+    return await session_actors.submit(session_id, _roll_skill_check, session_id, request)
+
+def _roll_skill_check(db: Session, session_id: int, request: SkillCheckRoll):
     skill_check = db.query(models.SkillCheck).options(
         joinedload(models.SkillCheck.participant).
         joinedload(models.SessionCharacter.character).
@@ -1318,24 +1869,15 @@ async def roll_skill_check(session_id: int, request: SkillCheckRoll, background_
     if not character:
         raise HTTPException(status_code=400, detail="Participant has no character.")
 
-    validated_character = CharacterSchema.model_validate(character)
-    modifier = 0
     check_type = skill_check.check_type
 
-    # 2. Use game_rules ONLY to get the list of derived skills.
-    if check_type in game_rules.DERIVED_SKILLS:
-        attr1_name, attr2_name = game_rules.DERIVED_SKILLS[check_type]
-        score1 = getattr(validated_character, attr1_name)
-        score2 = getattr(validated_character, attr2_name)
-        mod1 = get_modifier(score1)
-        mod2 = get_modifier(score2)
-        modifier = math.floor((mod1 + mod2) / 2)
-    else:
-        score = getattr(validated_character, check_type)
-        modifier = get_modifier(score)
+    # 2. Derived skills (game_rules.DERIVED_SKILLS) are precomputed in the stat block.
+    modifier = stat_blocks.for_character(character).check_modifier(check_type)
         
 
-    roll1 = random.randint(1, 20)
+    rng = session_rngs.stream(db, skill_check.session)
+    first_draw = rng.draws
+    roll1 = rng.randint(1, 20)
     final_roll = roll1
     advantage_used = False
 
@@ -1355,7 +1897,7 @@ async def roll_skill_check(session_id: int, request: SkillCheckRoll, background_
             advantage_used = True
         
         if advantage_used:
-            roll2 = random.randint(1, 20)
+            roll2 = rng.randint(1, 20)
             final_roll = max(roll1, roll2)
 
     total_score = final_roll + modifier
@@ -1363,22 +1905,19 @@ async def roll_skill_check(session_id: int, request: SkillCheckRoll, background_
     skill_check.status = 'completed'
     db.add(skill_check)
     
-    # FIX: Add background task for broadcasting state
-    # This was missing in the original function.
-    background_tasks.add_task(manager.broadcast_session_state, session_id, db)
+    # Schedule the state broadcast; it flushes on the next tick, after the commit below.
+    manager.schedule_broadcast(session_id)
 
     log_event(db, session_id, 'skill_check_result', actor_id=participant.id, details={
         "character_name": character.name, "check_type": check_type.capitalize(),
         "roll": final_roll, "modifier": modifier, "total": total_score, "dc": skill_check.dc,
         "success": success, "advantage_used": advantage_used,
-        "roll_breakdown": f"{roll1}" + (f", {roll2}" if advantage_used else "")
+        "roll_breakdown": f"{roll1}" + (f", {roll2}" if advantage_used else ""),
+        "rng_draw": first_draw
     })
     
     db.commit()
 
-    # The broadcast for state is now in a background task, but we still need the log entry notification.
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
-
     return {
         "success": success,
         "total": total_score,
@@ -1389,15 +1928,18 @@ async def roll_skill_check(session_id: int, request: SkillCheckRoll, background_
     }
 
 @app.post("/gm/give-item")
-async def gm_give_item(request: GiveItemRequest, db: Session = Depends(get_db)):
+async def gm_give_item(request: GiveItemRequest, db: AsyncSession = Depends(get_async_db)):
     """
     Allows a GM to give a specified quantity of an item to a character.
     If the character already has the item and it's stackable, it updates the quantity.
     Otherwise, it creates a new inventory entry.
     """
+    return await db.run_sync(_gm_give_item, request)
+
+def _gm_give_item(db: Session, request: GiveItemRequest):
     # Find the character and the master item entry
     character = db.query(models.Character).filter(models.Character.id == request.character_id).first()
-    item = db.query(models.Item).filter(models.Item.id == request.item_id).first()
+    item = rules_catalog.get(db).items.by_id.get(request.item_id)
 
     if not character or not item:
         raise HTTPException(status_code=404, detail="Character or Item not found.")
@@ -1429,34 +1971,43 @@ async def gm_give_item(request: GiveItemRequest, db: Session = Depends(get_db)):
         )
         db.add(new_inventory_item)
 
-    db.commit()
-
-    # Find the session this character is in to broadcast an update
+    # Find the session this character is in to log and broadcast an update
     session_character = db.query(models.SessionCharacter).filter(
         models.SessionCharacter.character_id == request.character_id
     ).first()
-
     if session_character:
         log_event(db, session_character.session_id, 'gm_give_item', details=log_details)
-        await manager.broadcast_session_state(session_character.session_id, db)
-        await manager.broadcast_json(session_character.session_id, json.dumps({"type": "new_log_entry"}))
+
+    db.commit()
+
+    if session_character:
+        # Inventory is part of the cached dump under a resident hot state
+        session_actors.invalidate_snapshot(session_character.session_id)
+        manager.schedule_broadcast(session_character.session_id)
 
     return {"message": f"Successfully gave {request.quantity} of {item.puranic_name} to {character.name}."}
 
 @app.get("/items", response_model=List[ItemSchema])
-async def get_all_items(db: Session = Depends(get_db)):
+async def get_all_items(request: Request, response: Response, db: AsyncSession = Depends(get_async_db)):
     """
     Fetches the master list of all items available in the game.
     """
-    items = db.query(models.Item).order_by(models.Item.puranic_name).all()
-    return items
+    not_modified = conditional_response(request, response, catalog_etag(), CATALOG_CACHE_CONTROL)
+    if not_modified is not None:
+        return not_modified
+    # A cache hit needs no trip through the Session at all
+    catalog = rules_catalog.current() or await db.run_sync(rules_catalog.get)
+    return [ItemSchema.model_validate(item) for item in catalog.items.rows]
 
 @app.post("/character/{character_id}/inventory/{inventory_id}/toggle-equip")
-async def toggle_equip_item(character_id: int, inventory_id: int, db: Session = Depends(get_db)):
+async def toggle_equip_item(character_id: int, inventory_id: int, db: AsyncSession = Depends(get_async_db)):
     """
     Toggles the equipped status of an inventory item.
     Enforces game rules, such as unequipping other items of the same type.
     """
+    return await db.run_sync(_toggle_equip_item, character_id, inventory_id)
+
+def _toggle_equip_item(db: Session, character_id: int, inventory_id: int):
     # Find the specific inventory item the player is trying to equip/unequip
     target_inventory_item = db.query(models.CharacterInventory).options(
         joinedload(models.CharacterInventory.item)
@@ -1493,26 +2044,32 @@ async def toggle_equip_item(character_id: int, inventory_id: int, db: Session =
     # Toggle the state of the target item
     target_inventory_item.is_equipped = is_equipping
     db.add(target_inventory_item)
-    db.commit()
 
-    # Find the session this character is in to broadcast the update
+    # Find the session this character is in to log and broadcast the update
     session_character = db.query(models.SessionCharacter).filter(
         models.SessionCharacter.character_id == character_id
     ).first()
-
     if session_character:
         log_event(db, session_character.session_id, 'item_equip', details={
             "character_name": target_inventory_item.character.name,
             "item_name": target_inventory_item.item.puranic_name,
             "equipped": is_equipping
         })
-        await manager.broadcast_session_state(session_character.session_id, db)
-        await manager.broadcast_json(session_character.session_id, json.dumps({"type": "new_log_entry"}))
+
+    db.commit()
+
+    if session_character:
+        # Inventory is part of the cached dump under a resident hot state
+        session_actors.invalidate_snapshot(session_character.session_id)
+        manager.schedule_broadcast(session_character.session_id)
 
     return {"message": f"Item state toggled for {target_inventory_item.item.puranic_name}."}
 
 @app.delete("/inventory/{inventory_id}/destroy")
-async def destroy_inventory_item(inventory_id: int, db: Session = Depends(get_db)):
+async def destroy_inventory_item(inventory_id: int, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(_destroy_inventory_item, inventory_id)
+
+def _destroy_inventory_item(db: Session, inventory_id: int):
     # 1. Eagerly load all relationships to get the data upfront
     inventory_item = db.query(models.CharacterInventory).options(
         joinedload(models.CharacterInventory.character),
@@ -1529,9 +2086,8 @@ async def destroy_inventory_item(inventory_id: int, db: Session = Depends(get_db
     
     # 3. Now, perform the database deletion
     db.delete(inventory_item)
-    db.commit()
 
-    # Broadcast update to the relevant session
+    # Log to the relevant session, in the same commit as the deletion
     session_character = db.query(models.SessionCharacter).filter(models.SessionCharacter.character_id == character_id).first()
     if session_character:
         # 4. Use the safe, pre-stored variables for the log event
@@ -1539,14 +2095,21 @@ async def destroy_inventory_item(inventory_id: int, db: Session = Depends(get_db
             "character_name": character_name,
             "item_name": item_name
         })
-        # The broadcast function does not need the 'db' argument
-        await manager.broadcast_session_state(session_character.session_id, db)
-        await manager.broadcast_json(session_character.session_id, json.dumps({"type": "new_log_entry"}))
+
+    db.commit()
+
+    if session_character:
+        # Inventory is part of the cached dump under a resident hot state
+        session_actors.invalidate_snapshot(session_character.session_id)
+        manager.schedule_broadcast(session_character.session_id)
         
     return {"message": "Item destroyed."}
 
 @app.post("/inventory/{inventory_id}/give")
-async def give_inventory_item(inventory_id: int, request: GiveItemPlayerRequest, db: Session = Depends(get_db)):
+async def give_inventory_item(inventory_id: int, request: GiveItemPlayerRequest, db: AsyncSession = Depends(get_async_db)):
+    return await db.run_sync(_give_inventory_item, inventory_id, request)
+
+def _give_inventory_item(db: Session, inventory_id: int, request: GiveItemPlayerRequest):
     # Eagerly load relationships to have all data available upfront
     source_item = db.query(models.CharacterInventory).options(
         joinedload(models.CharacterInventory.character),
@@ -1597,8 +2160,6 @@ async def give_inventory_item(inventory_id: int, request: GiveItemPlayerRequest,
     else:
         db.add(source_item)
     # --- END OF NEW LOGIC ---
-    
-    db.commit()
 
     session_character = db.query(models.SessionCharacter).filter(models.SessionCharacter.character_id == source_character_id).first()
     if session_character:
@@ -1608,13 +2169,30 @@ async def give_inventory_item(inventory_id: int, request: GiveItemPlayerRequest,
             "item_name": item_name,
             "quantity": request.quantity # Use the requested quantity for the log
         })
-        await manager.broadcast_session_state(session_character.session_id, db)
-        await manager.broadcast_json(session_character.session_id, json.dumps({"type": "new_log_entry"}))
+
+    db.commit()
+
+    if session_character:
+        # Inventory is part of the cached dump under a resident hot state
+        session_actors.invalidate_snapshot(session_character.session_id)
+        manager.schedule_broadcast(session_character.session_id)
 
     return {"message": "Item transferred."}
 
 @app.post("/inventory/{inventory_id}/use")
-async def use_inventory_item(inventory_id: int, db: Session = Depends(get_db)):
+async def use_inventory_item(inventory_id: int, db: AsyncSession = Depends(get_async_db)):
+    # The linked ability changes a session participant, so it runs on that session's actor
+    session_id = await db.run_sync(_inventory_item_session_id, inventory_id)
+    if session_id is None:
+        return await db.run_sync(_use_inventory_item, inventory_id)
+    return await session_actors.submit(session_id, _use_inventory_item, inventory_id)
+
+def _inventory_item_session_id(db: Session, inventory_id: int) -> int | None:
+    return db.query(models.SessionCharacter.session_id).join(
+        models.CharacterInventory, models.CharacterInventory.character_id == models.SessionCharacter.character_id
+    ).filter(models.CharacterInventory.id == inventory_id).limit(1).scalar()
+
+def _use_inventory_item(db: Session, inventory_id: int):
     
     inventory_item = db.query(models.CharacterInventory).options(
         joinedload(models.CharacterInventory.item),
@@ -1658,9 +2236,7 @@ async def use_inventory_item(inventory_id: int, db: Session = Depends(get_db)):
     # 3. Execute the Linked Ability (NEW CRITICAL LOGIC)
     if ability_id_to_use:
         # Query the ability directly to get its name for logging
-        triggered_ability = db.query(models.Ability).filter(
-            models.Ability.id == ability_id_to_use
-        ).first()
+        triggered_ability = rules_catalog.get(db).abilities.by_id.get(ability_id_to_use)
         
         if not triggered_ability:
              db.rollback() 
@@ -1694,14 +2270,11 @@ async def use_inventory_item(inventory_id: int, db: Session = Depends(get_db)):
                 )
             
             log_details["ability_success"] = triggered_ability.name
-            
-        # Commit any pending log entries and session changes from the ability system
-        db.commit() 
-        
-    # 4. Log and Broadcast 
+
+    # 4. Log, then commit the item use, the ability's changes and every log entry together
     log_event(db, session_id, 'item_use', details=log_details)
-    await manager.broadcast_session_state(session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    db.commit()
+    manager.schedule_broadcast(session_id)
 
     return {"message": f"{inventory_item.item.puranic_name} was used."}
 
@@ -1709,13 +2282,15 @@ async def use_inventory_item(inventory_id: int, db: Session = Depends(get_db)):
 async def create_environmental_object(
     session_id: int,
     obj_data: EnvironmentalObjectCreate,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """
     GM creates an environmental object in the session.
     If has_sections=True, automatically generates sections.
     """
+    return await session_actors.submit(session_id, _create_environmental_object, session_id, obj_data)
+
+def _create_environmental_object(db: Session, session_id: int, obj_data: EnvironmentalObjectCreate):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -1737,8 +2312,7 @@ async def create_environmental_object(
         camp_metadata=obj_data.camp_metadata
     )
     db.add(new_obj)
-    db.commit()
-    db.refresh(new_obj)
+    db.flush() # Assigns new_obj.id for the sections
     
     # If sectioned, create sections
     if obj_data.has_sections and obj_data.total_sections > 0:
@@ -1756,17 +2330,17 @@ async def create_environmental_object(
                 armor_value=obj_data.armor_value
             )
             db.add(section)
-        db.commit()
-        db.refresh(new_obj)
     
     log_event(db, session_id, 'env_object_created', details={
         "object_name": new_obj.name,
-        "object_type": new_obj.object_type
+        "object_type": obj_data.object_type
     })
+    db.commit()
+    db.refresh(new_obj)
     
-    background_tasks.add_task(manager.broadcast_session_state, session_id, db)
+    manager.schedule_broadcast(session_id)
     
-    return new_obj
+    return EnvironmentalObjectSchema.model_validate(new_obj)
 
 
 @app.get("/sessions/{session_id}/environmental_objects", response_model=List[EnvironmentalObjectSchema])
@@ -1783,13 +2357,15 @@ async def damage_environmental_object(
     session_id: int,
     object_id: int,
     damage_request: DamageEnvironmentalObjectRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """
     Damage an environmental object or specific section.
     Handles armor reduction, critical thresholds, destruction.
     """
+    return await session_actors.submit(session_id, _damage_environmental_object, session_id, object_id, damage_request)
+
+def _damage_environmental_object(db: Session, session_id: int, object_id: int, damage_request: DamageEnvironmentalObjectRequest):
     env_obj = db.query(models.EnvironmentalObject).filter(
         models.EnvironmentalObject.id == object_id,
         models.EnvironmentalObject.session_id == session_id
@@ -1848,8 +2424,7 @@ async def damage_environmental_object(
     db.add(env_obj)
     db.commit()
     
-    await manager.broadcast_session_state(session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session_id)
     
     return {"success": True, "object": EnvironmentalObjectSchema.model_validate(env_obj)}
 
@@ -1859,10 +2434,12 @@ async def repair_environmental_object(
     session_id: int,
     object_id: int,
     repair_request: RepairEnvironmentalObjectRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """Repair an environmental object"""
+    return await session_actors.submit(session_id, _repair_environmental_object, session_id, object_id, repair_request)
+
+def _repair_environmental_object(db: Session, session_id: int, object_id: int, repair_request: RepairEnvironmentalObjectRequest):
     env_obj = db.query(models.EnvironmentalObject).filter(
         models.EnvironmentalObject.id == object_id
     ).first()
@@ -1894,15 +2471,13 @@ async def repair_environmental_object(
             env_obj.is_functional = True
         db.add(env_obj)
     
-    db.commit()
-    
     log_event(db, session_id, 'env_object_repaired', details={
         "object_name": env_obj.name,
         "repair_amount": repair_amount
     })
+    db.commit()
     
-    await manager.broadcast_session_state(session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session_id)
     
     return {"success": True, "object": EnvironmentalObjectSchema.model_validate(env_obj)}
 
@@ -1911,10 +2486,12 @@ async def repair_environmental_object(
 async def delete_environmental_object(
     session_id: int,
     object_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """GM deletes an environmental object"""
+    return await session_actors.submit(session_id, _delete_environmental_object, session_id, object_id)
+
+def _delete_environmental_object(db: Session, session_id: int, object_id: int):
     env_obj = db.query(models.EnvironmentalObject).filter(
         models.EnvironmentalObject.id == object_id
     ).first()
@@ -1925,7 +2502,7 @@ async def delete_environmental_object(
     db.delete(env_obj)
     db.commit()
     
-    await manager.broadcast_session_state(session_id, db)
+    manager.schedule_broadcast(session_id)
     
     return {"success": True}
 
@@ -1956,8 +2533,11 @@ def create_campaign(campaign_data: CampaignCreate, db: Session = Depends(get_db)
 
 
 @app.get("/campaigns", response_model=List[CampaignSchema])
-def list_campaigns(published_only: bool = False, db: Session = Depends(get_db)):
+def list_campaigns(request: Request, response: Response, published_only: bool = False, db: Session = Depends(get_db)):
     """List all campaigns (or only published ones)"""
+    not_modified = conditional_response(request, response, content_versions.etag("campaigns"), PRIVATE_CACHE_CONTROL)
+    if not_modified is not None:
+        return not_modified
     query = db.query(models.Campaign).options(joinedload(models.Campaign.scenes))
     if published_only:
         query = query.filter(models.Campaign.is_published == True)
@@ -2075,13 +2655,15 @@ def update_scene(scene_id: int, scene_data: SceneCreate, db: Session = Depends(g
 async def select_campaign_for_session(
     session_id: int,
     campaign_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """
     Attach a campaign to a session
     This makes campaign characters available for selection
     """
+    return await session_actors.submit(session_id, _select_campaign_for_session, session_id, campaign_id)
+
+def _select_campaign_for_session(db: Session, session_id: int, campaign_id: int):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -2094,8 +2676,7 @@ async def select_campaign_for_session(
     session.campaign_name = campaign.name  # Update session name to match campaign
     db.commit()
     
-    await manager.broadcast_session_state(session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session_id)
     return {"message": "Campaign selected successfully", "campaign_id": campaign_id}
 
 
@@ -2103,13 +2684,15 @@ async def select_campaign_for_session(
 async def select_character_in_lobby(
     session_id: int,
     request: CharacterSelectionRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """
     Player selects a character in the lobby (before game starts)
     Updates character_selections in session
     """
+    return await session_actors.submit(session_id, _select_character_in_lobby, session_id, request)
+
+def _select_character_in_lobby(db: Session, session_id: int, request: CharacterSelectionRequest):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -2133,19 +2716,13 @@ async def select_character_in_lobby(
     character = db.query(models.Character).filter(models.Character.id == request.character_id).first()
     player = db.query(models.User).filter(models.User.id == request.player_id).first()
     if character and player:
-        log_entry = models.GameLogEntry(
-            session_id=session_id,
-            event_type='character_selection',
-            details={
-                'player_name': player.display_name,
-                'character_name': character.name
-            }
-        )
-    db.add(log_entry)
+        log_event(db, session_id, 'character_selection', details={
+            'player_name': player.display_name,
+            'character_name': character.name
+        })
 
     db.commit()
-    await manager.broadcast_session_state(session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session_id)
     
     return {"message": "Character selected successfully"}
 
@@ -2154,10 +2731,12 @@ async def select_character_in_lobby(
 async def deselect_character_in_lobby(
     session_id: int,
     request: CharacterDeselectionRequest,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """Player deselects their character in the lobby"""
+    return await session_actors.submit(session_id, _deselect_character_in_lobby, session_id, request)
+
+def _deselect_character_in_lobby(db: Session, session_id: int, request: CharacterDeselectionRequest):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -2172,19 +2751,13 @@ async def deselect_character_in_lobby(
     character = db.query(models.Character).filter(models.Character.id == request.character_id).first()
     player = db.query(models.User).filter(models.User.id == request.player_id).first()
     if character and player:
-        log_entry = models.GameLogEntry(
-            session_id=session_id,
-            event_type='character_selection',
-            details={
-                'player_name': player.display_name,
-                'character_name': character.name
-            }
-        )
-    db.add(log_entry)
+        log_event(db, session_id, 'character_selection', details={
+            'player_name': player.display_name,
+            'character_name': character.name
+        })
 
     db.commit()
-    await manager.broadcast_session_state(session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session_id)
     
     
     return {"message": "Character deselected successfully"}
@@ -2193,12 +2766,14 @@ async def deselect_character_in_lobby(
 @app.post("/sessions/{session_id}/start_with_campaign")
 async def start_session_with_campaign(
     session_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """
     GM starts the session - creates SessionCharacters from selected characters
     """
+    return await session_actors.submit(session_id, _start_session_with_campaign, session_id)
+
+def _start_session_with_campaign(db: Session, session_id: int):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -2228,8 +2803,8 @@ async def start_session_with_campaign(
         ).all()
         ability_ids = [link.ability_id for link in ability_links]
         
-        # Calculate max resources using CharacterSchema
-        char_schema = CharacterSchema.model_validate(character)
+        # Max resources come from the character's precomputed stat block
+        stats = stat_blocks.for_character(character)
         
         # Create SessionCharacter
         session_char = models.SessionCharacter(
@@ -2239,10 +2814,10 @@ async def start_session_with_campaign(
             level=character.level,
             learned_abilities=ability_ids,
             npc_type=None,  # Player characters have no npc_type
-            current_prana=char_schema.max_prana,
-            current_tapas=char_schema.max_tapas,
-            current_maya=char_schema.max_maya,
-            remaining_speed=char_schema.movement_speed
+            current_prana=stats.max_prana,
+            current_tapas=stats.max_tapas,
+            current_maya=stats.max_maya,
+            remaining_speed=character.movement_speed
         )
         db.add(session_char)
     
@@ -2250,8 +2825,7 @@ async def start_session_with_campaign(
     session.current_mode = 'exploration'
     db.commit()
     
-    await manager.broadcast_session_state(session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session_id)
     return {"message": "Session started successfully"}
 
 
@@ -2263,10 +2837,12 @@ async def start_session_with_campaign(
 async def set_active_scene(
     session_id: int,
     scene_id: int,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
+    background_tasks: BackgroundTasks
 ):
     """GM sets the active scene that players see"""
+    return await session_actors.submit(session_id, _set_active_scene, session_id, scene_id)
+
+def _set_active_scene(db: Session, session_id: int, scene_id: int):
     session = db.query(models.GameSession).filter(models.GameSession.id == session_id).first()
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
@@ -2282,8 +2858,7 @@ async def set_active_scene(
     session.active_scene_id = scene_id
     db.commit()
     
-    await manager.broadcast_session_state(session_id, db)
-    await manager.broadcast_json(session_id, json.dumps({"type": "new_log_entry"}))
+    manager.schedule_broadcast(session_id)
     return {"message": "Active scene updated"}
 
 
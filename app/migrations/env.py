@@ -0,0 +1,38 @@
+# app/migrations/env.py
+"""
+Alembic environment. Uses the same DATABASE_URL and metadata as the app,
+so `alembic revision --autogenerate` diffs against models.py.
+"""
+
+from logging.config import fileConfig
+from alembic import context
+
+import models
+
+config = context.config
+if config.config_file_name is not None:
+    fileConfig(config.config_file_name)
+
+target_metadata = models.Base.metadata
+
+def run_migrations_offline():
+    """Emits the SQL to stdout (`alembic upgrade head --sql`) instead of running it."""
+    context.configure(
+        url=models.DATABASE_URL,
+        target_metadata=target_metadata,
+        literal_binds=True,
+        dialect_opts={"paramstyle": "named"},
+    )
+    with context.begin_transaction():
+        context.run_migrations()
+
+def run_migrations_online():
+    with models.engine.connect() as connection:
+        context.configure(connection=connection, target_metadata=target_metadata)
+        with context.begin_transaction():
+            context.run_migrations()
+
+if context.is_offline_mode():
+    run_migrations_offline()
+else:
+    run_migrations_online()
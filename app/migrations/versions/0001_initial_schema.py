@@ -0,0 +1,323 @@
+"""Initial schema, as previously created by Base.metadata.create_all()
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-17
+
+Databases created before migrations existed already match this revision:
+run `alembic -c app/alembic.ini stamp 0001` on them instead of upgrading.
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+# Enum types store the member names, as SQLAlchemyEnum(<enum class>) does
+ITEM_TYPE = sa.Enum("WEAPON", "ARMOR", "POTION", "GENERAL", name="itemtype")
+ACTION_TYPE = sa.Enum("ACTION", "BONUS_ACTION", "REACTION", "FREE", name="actiontype")
+RESOURCE_TYPE = sa.Enum("TAPAS", "MAYA", "SPEED", "PRANA", name="resourcetype")
+TARGET_TYPE = sa.Enum("SELF", "ENEMY", "ALLY", "GROUND", name="targettype")
+ENVIRONMENTAL_OBJECT_TYPE = sa.Enum(
+    "BRIDGE", "GATE", "WALL", "ALTAR", "SIEGE_WEAPON", "TRAP", "DESTRUCTIBLE",
+    name="environmentalobjecttype"
+)
+
+
+def upgrade():
+    # --- Core tables ---
+    op.create_table(
+        "users",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("display_name", sa.String()),
+        # Foreign key to game_sessions is added below, once that table exists
+        sa.Column("current_session_id", sa.Integer(), nullable=True),
+    )
+    op.create_index("ix_users_id", "users", ["id"])
+    op.create_index("ix_users_display_name", "users", ["display_name"])
+
+    op.create_table(
+        "races",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("bala_mod", sa.Integer()),
+        sa.Column("dakshata_mod", sa.Integer()),
+        sa.Column("dhriti_mod", sa.Integer()),
+        sa.Column("buddhi_mod", sa.Integer()),
+        sa.Column("prajna_mod", sa.Integer()),
+        sa.Column("samkalpa_mod", sa.Integer()),
+    )
+    op.create_index("ix_races_id", "races", ["id"])
+    op.create_index("ix_races_name", "races", ["name"], unique=True)
+
+    op.create_table(
+        "char_classes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("primary_attribute", sa.String()),
+        sa.Column("base_bala", sa.Integer()),
+        sa.Column("base_dakshata", sa.Integer()),
+        sa.Column("base_dhriti", sa.Integer()),
+        sa.Column("base_buddhi", sa.Integer()),
+        sa.Column("base_prajna", sa.Integer()),
+        sa.Column("base_samkalpa", sa.Integer()),
+        sa.Column("default_abilities", sa.JSON()),
+    )
+    op.create_index("ix_char_classes_id", "char_classes", ["id"])
+    op.create_index("ix_char_classes_name", "char_classes", ["name"], unique=True)
+
+    op.create_table(
+        "subclasses",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("description", sa.Text()),
+        sa.Column("level_requirement", sa.Integer()),
+        sa.Column("tapas_bonus", sa.Integer()),
+        sa.Column("maya_bonus", sa.Integer()),
+        sa.Column("base_class_id", sa.Integer(), sa.ForeignKey("char_classes.id")),
+    )
+    op.create_index("ix_subclasses_id", "subclasses", ["id"])
+    op.create_index("ix_subclasses_name", "subclasses", ["name"], unique=True)
+
+    op.create_table(
+        "abilities",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), unique=True),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("action_type", ACTION_TYPE, nullable=False),
+        sa.Column("resource_cost", sa.Integer()),
+        sa.Column("resource_type", RESOURCE_TYPE, nullable=True),
+        sa.Column("requirements", sa.JSON(), nullable=True),
+        sa.Column("target_type", TARGET_TYPE, nullable=False),
+        sa.Column("effect_radius", sa.Integer()),
+        sa.Column("to_hit_attribute", sa.String(), nullable=True),
+        sa.Column("effect_type", sa.String()),
+        sa.Column("damage_dice", sa.String(), nullable=True),
+        sa.Column("damage_attribute", sa.String(), nullable=True),
+        sa.Column("status_effect", sa.String(), nullable=True),
+        sa.Column("range", sa.Integer()),
+    )
+    op.create_index("ix_abilities_id", "abilities", ["id"])
+
+    op.create_table(
+        "items",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("puranic_name", sa.String(), nullable=False, unique=True),
+        sa.Column("english_name", sa.String(), nullable=True),
+        sa.Column("description", sa.Text()),
+        sa.Column("item_type", ITEM_TYPE, nullable=False),
+        sa.Column("is_stackable", sa.Boolean()),
+        sa.Column("on_use_ability_id", sa.Integer(), sa.ForeignKey("abilities.id"), nullable=True),
+    )
+    op.create_index("ix_items_id", "items", ["id"])
+
+    op.create_table(
+        "characters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String()),
+        sa.Column("owner_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("race_id", sa.Integer(), sa.ForeignKey("races.id")),
+        sa.Column("char_class_id", sa.Integer(), sa.ForeignKey("char_classes.id")),
+        sa.Column("subclass_id", sa.Integer(), sa.ForeignKey("subclasses.id"), nullable=True),
+        sa.Column("level", sa.Integer()),
+        sa.Column("unlocked_loka_attunement", sa.String(), nullable=True),
+        sa.Column("currency", sa.Integer()),
+        sa.Column("movement_speed", sa.Integer()),
+        sa.Column("level_6_loka_choice", sa.String(), nullable=True),
+        sa.Column("has_loka_resistance", sa.Boolean()),
+        sa.Column("has_loka_mastery", sa.Boolean()),
+        sa.Column("loka_avahana_used_this_combat", sa.Boolean()),
+    )
+    op.create_index("ix_characters_id", "characters", ["id"])
+    op.create_index("ix_characters_name", "characters", ["name"])
+
+    # --- Campaigns and scenes ---
+    op.create_table(
+        "campaigns",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text()),
+        sa.Column("theme", sa.String()),
+        sa.Column("recommended_level", sa.Integer()),
+        sa.Column("recommended_party_size", sa.Integer()),
+        sa.Column("estimated_duration_minutes", sa.Integer()),
+        sa.Column("player_character_ids", sa.JSON()),
+        sa.Column("npc_character_ids", sa.JSON()),
+        sa.Column("enemy_character_ids", sa.JSON()),
+        sa.Column("creator_user_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("is_published", sa.Boolean()),
+    )
+    op.create_index("ix_campaigns_id", "campaigns", ["id"])
+
+    op.create_table(
+        "scenes",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id"), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=True),
+        sa.Column("scene_order", sa.Integer()),
+        sa.Column("background_url", sa.String(), nullable=True),
+        sa.Column("cards", sa.JSON()),
+    )
+    op.create_index("ix_scenes_id", "scenes", ["id"])
+
+    # --- Sessions ---
+    op.create_table(
+        "game_sessions",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("gm_id", sa.Integer(), sa.ForeignKey("users.id")),
+        sa.Column("campaign_name", sa.String()),
+        sa.Column("current_mode", sa.String()),
+        sa.Column("active_loka_resonance", sa.String()),
+        sa.Column("turn_order", sa.JSON()),
+        sa.Column("current_turn_index", sa.Integer()),
+        sa.Column("access_code", sa.String(), nullable=True),
+        sa.Column("active_loka_summoning", sa.JSON()),
+        sa.Column("environmental_resonance", sa.String()),
+        sa.Column("campaign_id", sa.Integer(), sa.ForeignKey("campaigns.id"), nullable=True),
+        sa.Column("character_selections", sa.JSON()),
+        sa.Column("active_scene_id", sa.Integer(), sa.ForeignKey("scenes.id"), nullable=True),
+    )
+    op.create_index("ix_game_sessions_id", "game_sessions", ["id"])
+    op.create_index("ix_game_sessions_access_code", "game_sessions", ["access_code"], unique=True)
+
+    # users <-> game_sessions reference each other
+    op.create_foreign_key(
+        "users_current_session_id_fkey", "users", "game_sessions",
+        ["current_session_id"], ["id"]
+    )
+
+    op.create_table(
+        "session_characters",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("character_id", sa.Integer(), sa.ForeignKey("characters.id")),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("game_sessions.id")),
+        sa.Column("player_id", sa.Integer(), sa.ForeignKey("users.id"), nullable=True),
+        sa.Column("current_prana", sa.Integer()),
+        sa.Column("current_tapas", sa.Integer()),
+        sa.Column("current_maya", sa.Integer()),
+        sa.Column("remaining_speed", sa.Integer()),
+        sa.Column("actions", sa.Integer()),
+        sa.Column("bonus_actions", sa.Integer()),
+        sa.Column("reactions", sa.Integer()),
+        sa.Column("status", sa.String()),
+        sa.Column("x_pos", sa.Integer(), nullable=True),
+        sa.Column("y_pos", sa.Integer(), nullable=True),
+        sa.Column("level", sa.Integer()),
+        sa.Column("learned_abilities", sa.JSON()),
+        sa.Column("npc_type", sa.String(), nullable=True),
+    )
+    op.create_index("ix_session_characters_id", "session_characters", ["id"])
+
+    # --- Link tables ---
+    op.create_table(
+        "character_inventory",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("character_id", sa.Integer(), sa.ForeignKey("characters.id"), nullable=False),
+        sa.Column("item_id", sa.Integer(), sa.ForeignKey("items.id"), nullable=False),
+        sa.Column("quantity", sa.Integer()),
+        sa.Column("is_equipped", sa.Boolean()),
+    )
+    op.create_index("ix_character_inventory_id", "character_inventory", ["id"])
+
+    op.create_table(
+        "character_abilities",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("character_id", sa.Integer(), sa.ForeignKey("characters.id")),
+        sa.Column("ability_id", sa.Integer(), sa.ForeignKey("abilities.id")),
+    )
+    op.create_index("ix_character_abilities_id", "character_abilities", ["id"])
+
+    # --- Session activity ---
+    op.create_table(
+        "game_log_entries",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("game_sessions.id"), nullable=False),
+        sa.Column("timestamp", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("event_type", sa.String(), nullable=False),
+        sa.Column("actor_id", sa.Integer(), sa.ForeignKey("session_characters.id"), nullable=True),
+        sa.Column("target_id", sa.Integer(), sa.ForeignKey("session_characters.id"), nullable=True),
+        sa.Column("details", sa.JSON(), nullable=True),
+    )
+    op.create_index("ix_game_log_entries_id", "game_log_entries", ["id"])
+
+    op.create_table(
+        "skill_checks",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("game_sessions.id"), nullable=False),
+        sa.Column("participant_id", sa.Integer(), sa.ForeignKey("session_characters.id"), nullable=False),
+        sa.Column("check_type", sa.String(), nullable=False),
+        sa.Column("dc", sa.Integer(), nullable=False),
+        sa.Column("description", sa.Text(), nullable=False),
+        sa.Column("status", sa.String()),
+    )
+    op.create_index("ix_skill_checks_id", "skill_checks", ["id"])
+
+    # --- Environmental objects ---
+    op.create_table(
+        "environmental_objects",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("session_id", sa.Integer(), sa.ForeignKey("game_sessions.id"), nullable=False),
+        sa.Column("name", sa.String(), nullable=False),
+        sa.Column("object_type", ENVIRONMENTAL_OBJECT_TYPE),
+        sa.Column("description", sa.Text()),
+        sa.Column("icon_url", sa.String(), nullable=True),
+        sa.Column("grid_positions", sa.JSON()),
+        sa.Column("has_sections", sa.Boolean()),
+        sa.Column("total_sections", sa.Integer()),
+        sa.Column("current_integrity", sa.Integer()),
+        sa.Column("max_integrity", sa.Integer()),
+        sa.Column("critical_threshold", sa.Integer()),
+        sa.Column("evasion_dc", sa.Integer()),
+        sa.Column("armor_value", sa.Integer()),
+        sa.Column("is_functional", sa.Boolean()),
+        sa.Column("is_visible_to_players", sa.Boolean()),
+        sa.Column("camp_metadata", sa.JSON()),
+    )
+    op.create_index("ix_environmental_objects_id", "environmental_objects", ["id"])
+
+    op.create_table(
+        "environmental_object_sections",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column("parent_id", sa.Integer(), sa.ForeignKey("environmental_objects.id"), nullable=False),
+        sa.Column("section_name", sa.String(), nullable=False),
+        sa.Column("section_index", sa.Integer(), nullable=False),
+        sa.Column("grid_positions", sa.JSON()),
+        sa.Column("current_integrity", sa.Integer()),
+        sa.Column("max_integrity", sa.Integer()),
+        sa.Column("evasion_dc", sa.Integer()),
+        sa.Column("armor_value", sa.Integer()),
+        sa.Column("is_destroyed", sa.Boolean()),
+        sa.Column("is_critical", sa.Boolean()),
+    )
+    op.create_index("ix_environmental_object_sections_id", "environmental_object_sections", ["id"])
+
+
+def downgrade():
+    op.drop_table("environmental_object_sections")
+    op.drop_table("environmental_objects")
+    op.drop_table("skill_checks")
+    op.drop_table("game_log_entries")
+    op.drop_table("character_abilities")
+    op.drop_table("character_inventory")
+    op.drop_table("session_characters")
+    op.drop_constraint("users_current_session_id_fkey", "users", type_="foreignkey")
+    op.drop_table("game_sessions")
+    op.drop_table("scenes")
+    op.drop_table("campaigns")
+    op.drop_table("characters")
+    op.drop_table("items")
+    op.drop_table("abilities")
+    op.drop_table("subclasses")
+    op.drop_table("char_classes")
+    op.drop_table("races")
+    op.drop_table("users")
+
+    bind = op.get_bind()
+    for enum_type in (ENVIRONMENTAL_OBJECT_TYPE, TARGET_TYPE, RESOURCE_TYPE, ACTION_TYPE, ITEM_TYPE):
+        enum_type.drop(bind, checkfirst=True)
@@ -0,0 +1,42 @@
+"""Indexes for the foreign keys the API filters on
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+# (name, table, columns) - kept in sync with the Index/index=True declarations in models.py
+HOT_PATH_INDEXES = [
+    # Session roster and "which session is this character in" lookups
+    ("ix_session_characters_session_id_character_id", "session_characters", ["session_id", "character_id"]),
+    ("ix_session_characters_character_id", "session_characters", ["character_id"]),
+    ("ix_users_current_session_id", "users", ["current_session_id"]),
+    # Log pages (cursor on id) and time-ordered reads
+    ("ix_game_log_entries_session_id_id", "game_log_entries", ["session_id", "id"]),
+    ("ix_game_log_entries_session_id_timestamp", "game_log_entries", ["session_id", "timestamp"]),
+    # Inventory listing and stack lookups (character, item)
+    ("ix_character_inventory_character_id_item_id", "character_inventory", ["character_id", "item_id"]),
+    ("ix_character_abilities_character_id_ability_id", "character_abilities", ["character_id", "ability_id"]),
+    # Pending checks per session
+    ("ix_skill_checks_session_id_status", "skill_checks", ["session_id", "status"]),
+    ("ix_environmental_objects_session_id", "environmental_objects", ["session_id"]),
+    ("ix_environmental_object_sections_parent_id", "environmental_object_sections", ["parent_id"]),
+]
+
+
+def upgrade():
+    for name, table, columns in HOT_PATH_INDEXES:
+        # The log index may already exist on databases created by create_all()
+        op.create_index(name, table, columns, if_not_exists=True)
+
+
+def downgrade():
+    for name, table, _ in reversed(HOT_PATH_INDEXES):
+        op.drop_index(name, table_name=table, if_exists=True)
@@ -0,0 +1,24 @@
+"""Version counters for optimistic concurrency on sessions and participants
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0003"
+down_revision = "0002"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("game_sessions", sa.Column("version_id", sa.Integer(), nullable=False, server_default="1"))
+    op.add_column("session_characters", sa.Column("version_id", sa.Integer(), nullable=False, server_default="1"))
+
+
+def downgrade():
+    op.drop_column("session_characters", "version_id")
+    op.drop_column("game_sessions", "version_id")
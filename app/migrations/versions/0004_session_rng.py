@@ -0,0 +1,24 @@
+"""Per-session dice stream: seed and draw counter
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-17
+"""
+
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column("game_sessions", sa.Column("rng_seed", sa.BigInteger(), nullable=True))
+    op.add_column("game_sessions", sa.Column("rng_draws", sa.BigInteger(), nullable=False, server_default="0"))
+
+
+def downgrade():
+    op.drop_column("game_sessions", "rng_draws")
+    op.drop_column("game_sessions", "rng_seed")
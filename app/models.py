@@ -1,7 +1,9 @@
 # app/models.py
 
-from sqlalchemy import create_engine, Column, Integer, String, Text, ForeignKey, Boolean, Enum as SQLAlchemyEnum
-from sqlalchemy.orm import sessionmaker, relationship, declarative_base
+from sqlalchemy import create_engine, Column, Integer, BigInteger, String, Text, ForeignKey, Boolean, Index, Enum as SQLAlchemyEnum
+from sqlalchemy.orm import Session, sessionmaker, relationship, declarative_base
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from sqlalchemy.engine import make_url
 from sqlalchemy.types import JSON, DateTime
 from sqlalchemy.sql import func
 import os 
@@ -11,9 +13,22 @@ import enum
 load_dotenv() 
 
 # --- Database Setup ---
+# The schema itself is managed by Alembic (app/migrations): alembic -c app/alembic.ini upgrade head
 DATABASE_URL = os.getenv("DATABASE_URL")
+
+class AppSession(Session):
+    """Session class behind both factories below, so session event hooks apply to sync and async use alike."""
+
+# Sync stack (psycopg2): seed scripts, migrations and the plain `def` endpoints that run in the threadpool
 engine = create_engine(DATABASE_URL)
-SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+SessionLocal = sessionmaker(class_=AppSession, autocommit=False, autoflush=False, bind=engine)
+
+# Async stack (asyncpg) for the `async def` endpoints and the broadcast layer. Their ORM code runs
+# through AsyncSession.run_sync(), so every round-trip awaits the driver instead of blocking the event loop.
+# Defaults to DATABASE_URL with the asyncpg driver; set ASYNC_DATABASE_URL if the URL needs other options.
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or make_url(DATABASE_URL).set(drivername="postgresql+asyncpg")
+async_engine = create_async_engine(ASYNC_DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, sync_session_class=AppSession, autoflush=False)
 Base = declarative_base()
 
 # --- Core Models ---
@@ -21,7 +36,7 @@ class User(Base):
     __tablename__ = "users"
     id = Column(Integer, primary_key=True, index=True)
     display_name = Column(String, index=True)
-    current_session_id = Column(Integer, ForeignKey("game_sessions.id"), nullable=True)
+    current_session_id = Column(Integer, ForeignKey("game_sessions.id"), nullable=True, index=True)
     characters = relationship("Character", back_populates="owner")
 
 class ItemType(str, enum.Enum):
@@ -76,6 +91,9 @@ class CharacterInventory(Base):
     # Relationships to easily access the data
     character = relationship("Character")
     item = relationship("Item")
+    __table_args__ = (
+        Index("ix_character_inventory_character_id_item_id", "character_id", "item_id"),
+    )
 
 class Ability(Base):
     __tablename__ = "abilities"
@@ -184,6 +202,9 @@ class CharacterAbility(Base):
     id = Column(Integer, primary_key=True, index=True)
     character_id = Column(Integer, ForeignKey("characters.id"))
     ability_id = Column(Integer, ForeignKey("abilities.id"))
+    __table_args__ = (
+        Index("ix_character_abilities_character_id_ability_id", "character_id", "ability_id"),
+    )
 
 class SessionCharacter(Base):
     __tablename__ = "session_characters"
@@ -204,8 +225,15 @@ class SessionCharacter(Base):
     level = Column(Integer, default=1)
     learned_abilities = Column(JSON, default=list)  # List of ability IDs
     npc_type = Column(String, nullable=True)  # "ally", "neutral", "enemy", or null
+    # Optimistic concurrency: every UPDATE checks and bumps this, so a lost update raises StaleDataError
+    version_id = Column(Integer, nullable=False, server_default="1")
     character = relationship("Character")
     session = relationship("GameSession", back_populates="participants")
+    __mapper_args__ = {"version_id_col": version_id}
+    __table_args__ = (
+        Index("ix_session_characters_session_id_character_id", "session_id", "character_id"),
+        Index("ix_session_characters_character_id", "character_id"),
+    )
 
 class GameSession(Base):
     __tablename__ = "game_sessions"
@@ -223,6 +251,12 @@ class GameSession(Base):
     campaign_id = Column(Integer, ForeignKey("campaigns.id"), nullable=True)
     character_selections = Column(JSON, default=dict)  # {player_id: character_id}
     active_scene_id = Column(Integer, ForeignKey("scenes.id"), nullable=True)
+    # Dice stream (see session_rng.py): seed and number of dice drawn so far. Written without a version bump
+    rng_seed = Column(BigInteger, nullable=True)
+    rng_draws = Column(BigInteger, nullable=False, server_default="0")
+    # Optimistic concurrency, see SessionCharacter.version_id; also what clients send back as expected_version
+    version_id = Column(Integer, nullable=False, server_default="1")
+    __mapper_args__ = {"version_id_col": version_id}
     campaign = relationship("Campaign", back_populates="sessions")
     active_scene = relationship("Scene", foreign_keys=[active_scene_id])
     log_entries = relationship("GameLogEntry", back_populates="session", cascade="all, delete-orphan")
@@ -239,6 +273,11 @@ class GameLogEntry(Base):
     target_id = Column(Integer, ForeignKey("session_characters.id"), nullable=True)
     details = Column(JSON, nullable=True) 
     session = relationship("GameSession", back_populates="log_entries")
+    # Cursor pagination walks (session_id, id), so page reads stay O(page) however long the session gets
+    __table_args__ = (
+        Index("ix_game_log_entries_session_id_id", "session_id", "id"),
+        Index("ix_game_log_entries_session_id_timestamp", "session_id", "timestamp"),
+    )
 
 class SkillCheck(Base):
     __tablename__ = "skill_checks"
@@ -254,6 +293,9 @@ class SkillCheck(Base):
 
     participant = relationship("SessionCharacter")
     session = relationship("GameSession")
+    __table_args__ = (
+        Index("ix_skill_checks_session_id_status", "session_id", "status"),
+    )
 
 # === ENVIRONMENTAL OBJECTS SYSTEM ===
 
@@ -269,7 +311,7 @@ class EnvironmentalObjectType(str, enum.Enum):
 class EnvironmentalObject(Base):
     __tablename__ = "environmental_objects"
     id = Column(Integer, primary_key=True, index=True)
-    session_id = Column(Integer, ForeignKey("game_sessions.id"), nullable=False)
+    session_id = Column(Integer, ForeignKey("game_sessions.id"), nullable=False, index=True)
     # Identity
     name = Column(String, nullable=False)
     object_type = Column(SQLAlchemyEnum(EnvironmentalObjectType))
@@ -299,7 +341,7 @@ class EnvironmentalObject(Base):
 class EnvironmentalObjectSection(Base):
     __tablename__ = "environmental_object_sections"
     id = Column(Integer, primary_key=True, index=True)
-    parent_id = Column(Integer, ForeignKey("environmental_objects.id"), nullable=False)
+    parent_id = Column(Integer, ForeignKey("environmental_objects.id"), nullable=False, index=True)
     # Identity
     section_name = Column(String, nullable=False)
     section_index = Column(Integer, nullable=False)
@@ -0,0 +1,284 @@
+# app/movement.py
+"""
+Where a token can move this turn.
+Every cell of a session's board has a movement cost, kept in a NumPy array
+per session (BoardObstacles): 1 on open ground, BLOCKED under walls and
+other blocking environmental objects (cells of destroyed sections are open
+again), or a camp_metadata "movement_cost" for difficult terrain. The array
+is built with one query on first use and then patched object by object by
+the commit hooks below, so damaging or moving one object only rewrites that
+object's cells. Cells held by other tokens can't be entered either.
+Paths and reachable cells come from pathfinding.py. Reachable cells are
+cached per (participant, turn, board version): the turn is the
+participant's cell and remaining speed, the board version is the version
+of the session's GridIndex plus that of its obstacles. They are sent as
+run-length rows: [y, first x, number of cells].
+"""
+
+from collections import OrderedDict
+from itertools import chain, count
+from typing import Dict, Any, FrozenSet, Iterable, List, NamedTuple, Optional, Set, Tuple
+
+import numpy as np
+from sqlalchemy import event
+from sqlalchemy.orm import Session, selectinload
+
+from . import models
+from .pathfinding import BLOCKED, Path, pathfinder
+from .spatial_index import GridIndex, Cell
+
+# Object types that block movement unless camp_metadata says otherwise ({"blocks_movement": false})
+BLOCKING_OBJECT_TYPES = frozenset({
+    models.EnvironmentalObjectType.WALL,
+    models.EnvironmentalObjectType.GATE,
+    models.EnvironmentalObjectType.ALTAR,
+    models.EnvironmentalObjectType.SIEGE_WEAPON,
+    models.EnvironmentalObjectType.DESTRUCTIBLE,
+})
+
+# Reachable sets kept at most
+REACH_CACHE_SIZE = 1024
+
+# Keys in Session.info
+_PENDING_FOOTPRINTS = "pending_object_footprints"
+_DROPPED_BOARDS = "dropped_board_obstacles"
+
+_VERSIONS = count(1)
+
+Footprint = Tuple[FrozenSet[Cell], int]
+
+def _cells(grid_positions) -> Set[Cell]:
+    cells = {(int(position["x"]), int(position["y"])) for position in grid_positions or ()}
+    return {(x, y) for x, y in cells if x >= 0 and y >= 0}
+
+def footprint(env_object: models.EnvironmentalObject) -> Footprint:
+    """
+    (cells, movement cost) env_object imposes. Blocking objects cost BLOCKED while functional,
+    minus the cells of their destroyed sections; others cost their camp_metadata "movement_cost", if any.
+    """
+    metadata = env_object.camp_metadata or {}
+    if not env_object.is_functional:
+        return frozenset(), 1
+    if metadata.get("blocks_movement", env_object.object_type in BLOCKING_OBJECT_TYPES):
+        cells = _cells(env_object.grid_positions)
+        for section in env_object.sections:
+            if section.is_destroyed:
+                cells -= _cells(section.grid_positions)
+            else:
+                cells |= _cells(section.grid_positions)
+        return frozenset(cells), BLOCKED
+    cost = min(BLOCKED - 1, max(1, int(metadata.get("movement_cost", 1))))
+    if cost == 1:
+        return frozenset(), 1
+    return frozenset(_cells(env_object.grid_positions)), cost
+
+# ==================================
+# Obstacles
+# ==================================
+
+class BoardObstacles:
+    """Movement costs of one session's board, as a [y, x] array; cells beyond it are open ground."""
+
+    def __init__(self, objects: Iterable[models.EnvironmentalObject] = ()):
+        self.costs = np.ones((0, 0), dtype=np.uint8)
+        self._footprints: Dict[int, Footprint] = {}
+        # cell -> object id -> cost, for cells under at least one object; the highest cost wins
+        self._cover: Dict[Cell, Dict[int, int]] = {}
+        self.version = next(_VERSIONS)
+        for obj in objects:
+            self.set_object(obj.id, footprint(obj))
+
+    def set_object(self, object_id: int, new_footprint: Optional[Footprint]):
+        """Places, changes or (with None) removes an object; only its old and new cells are rewritten."""
+        touched = set()
+        old = self._footprints.pop(object_id, None)
+        if old is not None:
+            for cell in old[0]:
+                cover = self._cover[cell]
+                del cover[object_id]
+                if not cover:
+                    del self._cover[cell]
+                touched.add(cell)
+        if new_footprint is not None and new_footprint[0]:
+            cells, cost = new_footprint
+            self._footprints[object_id] = new_footprint
+            for cell in cells:
+                self._cover.setdefault(cell, {})[object_id] = cost
+            touched |= cells
+        if not touched:
+            return
+        width = max(self.costs.shape[1], max(x for x, _ in touched) + 1)
+        height = max(self.costs.shape[0], max(y for _, y in touched) + 1)
+        if (height, width) != self.costs.shape:
+            grown = np.ones((height, width), dtype=np.uint8)
+            grown[:self.costs.shape[0], :self.costs.shape[1]] = self.costs
+            self.costs = grown
+        for x, y in touched:
+            cover = self._cover.get((x, y))
+            self.costs[y, x] = max(cover.values()) if cover else 1
+        self.version = next(_VERSIONS)
+
+    def cost(self, x: int, y: int) -> int:
+        if x < 0 or y < 0:
+            return BLOCKED
+        if y < self.costs.shape[0] and x < self.costs.shape[1]:
+            return int(self.costs[y, x])
+        return 1
+
+    def blocked(self, x: int, y: int) -> bool:
+        return self.cost(x, y) == BLOCKED
+
+class BoardObstacleRegistry:
+    """BoardObstacles per session; built with one query on first use and patched by the commit hooks."""
+
+    def __init__(self):
+        self._boards: Dict[int, BoardObstacles] = {}
+        # session id -> number of changes applied or dropped, so a build that raced a commit is not kept
+        self._changes: Dict[int, int] = {}
+        # Counters
+        self.hits = 0
+        self.builds = 0
+        self.patches = 0
+
+    def get(self, db: Session, session_id: int) -> BoardObstacles:
+        board = self._boards.get(session_id)
+        if board is not None:
+            self.hits += 1
+            return board
+        changes = self._changes.get(session_id, 0)
+        objects = db.query(models.EnvironmentalObject).options(
+            selectinload(models.EnvironmentalObject.sections)
+        ).filter(models.EnvironmentalObject.session_id == session_id)
+        board = BoardObstacles(objects)
+        self.builds += 1
+        if self._changes.get(session_id, 0) == changes:
+            self._boards[session_id] = board
+        return board
+
+    def _changed(self, session_id: int):
+        self._changes[session_id] = self._changes.get(session_id, 0) + 1
+
+    def apply(self, footprints: Dict[int, Tuple[int, Optional[Footprint]]]):
+        """Applies committed (session_id, footprint) per object id; None removes the object."""
+        for object_id, (session_id, new_footprint) in footprints.items():
+            self._changed(session_id)
+            board = self._boards.get(session_id)
+            if board is not None:
+                board.set_object(object_id, new_footprint)
+                self.patches += 1
+
+    def invalidate(self, session_id: int):
+        self._changed(session_id)
+        self._boards.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"sessions": len(self._boards), "hits": self.hits, "builds": self.builds, "patches": self.patches}
+
+board_obstacles = BoardObstacleRegistry()
+
+# ==================================
+# Reachable Cells and Paths
+# ==================================
+
+class Reach(NamedTuple):
+    origin: Cell
+    speed: int
+    # cell -> speed it takes to get there
+    steps: Dict[Cell, int]
+    rows: Tuple[Tuple[int, int, int], ...]
+
+    def to_message(self, participant_id: int) -> Dict[str, Any]:
+        return {
+            "participant_id": participant_id,
+            "origin": {"x": self.origin[0], "y": self.origin[1]},
+            "remaining_speed": self.speed,
+            "rows": self.rows,
+        }
+
+def _run_length_rows(cells: Iterable[Cell]) -> Tuple[Tuple[int, int, int], ...]:
+    rows: List[List[int]] = []
+    for x, y in sorted(cells, key=lambda cell: (cell[1], cell[0])):
+        if rows and rows[-1][0] == y and rows[-1][1] + rows[-1][2] == x:
+            rows[-1][2] += 1
+        else:
+            rows.append([y, x, 1])
+    return tuple(tuple(row) for row in rows)
+
+class ReachCache:
+    """Most recently used reachable sets, keyed by (participant, turn, board version)."""
+
+    def __init__(self, max_entries: int = REACH_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Tuple, Reach]" = OrderedDict()
+        # Counters
+        self.hits = 0
+        self.fills = 0
+
+    def reach(self, db: Session, participant, grid: GridIndex) -> Reach:
+        """Cells participant (on the grid) can move to with its remaining speed."""
+        obstacles = board_obstacles.get(db, participant.session_id)
+        origin = (participant.x_pos, participant.y_pos)
+        speed = max(0, participant.remaining_speed or 0)
+        key = (participant.id, origin, speed, grid.version, obstacles.version)
+        reach = self._entries.get(key)
+        if reach is not None:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return reach
+        steps = pathfinder().reachable(origin, speed, obstacles.costs, grid)
+        reach = Reach(origin, speed, steps, _run_length_rows(steps))
+        self.fills += 1
+        self._entries[key] = reach
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+        return reach
+
+    def stats(self) -> Dict[str, Any]:
+        return {"entries": len(self._entries), "hits": self.hits, "fills": self.fills, "obstacles": board_obstacles.stats()}
+
+reach_cache = ReachCache()
+
+def find_path(db: Session, participant, grid: GridIndex, goal: Cell) -> Optional[Path]:
+    """Cheapest path participant (on the grid) can take to goal with its remaining speed, or None."""
+    obstacles = board_obstacles.get(db, participant.session_id)
+    speed = max(0, participant.remaining_speed or 0)
+    return pathfinder().find_path((participant.x_pos, participant.y_pos), goal, speed, obstacles.costs, grid)
+
+# ==================================
+# Session Hooks
+# ==================================
+
+def _note(pending: Dict[int, Tuple[int, Optional[Footprint]]], env_object: models.EnvironmentalObject, deleted: bool = False):
+    pending[env_object.id] = (env_object.session_id, None if deleted else footprint(env_object))
+
+@event.listens_for(models.AppSession, "after_flush")
+def _note_obstacle_writes(db: Session, flush_context):
+    pending = db.info.setdefault(_PENDING_FOOTPRINTS, {})
+    for obj in chain(db.new, db.dirty):
+        if isinstance(obj, models.EnvironmentalObject):
+            _note(pending, obj)
+        elif isinstance(obj, models.EnvironmentalObjectSection) and obj.parent_object is not None:
+            # A damaged or repaired section changes its object's footprint
+            _note(pending, obj.parent_object, deleted=obj.parent_object in db.deleted)
+    for obj in db.deleted:
+        if isinstance(obj, models.EnvironmentalObject):
+            _note(pending, obj, deleted=True)
+        elif isinstance(obj, models.GameSession):
+            db.info.setdefault(_DROPPED_BOARDS, set()).add(obj.id)
+    if not pending:
+        db.info.pop(_PENDING_FOOTPRINTS)
+
+@event.listens_for(models.AppSession, "after_commit")
+def _apply_obstacle_writes(db: Session):
+    board_obstacles.apply(db.info.pop(_PENDING_FOOTPRINTS, {}))
+    for session_id in db.info.pop(_DROPPED_BOARDS, ()):
+        board_obstacles.invalidate(session_id)
+
+@event.listens_for(models.AppSession, "after_soft_rollback")
+def _forget_obstacle_writes(db: Session, previous_transaction):
+    # As for token positions (spatial_index.py): after a SAVEPOINT rollback the boards are rebuilt
+    pending = db.info.pop(_PENDING_FOOTPRINTS, None)
+    if not previous_transaction.nested:
+        db.info.pop(_DROPPED_BOARDS, None)
+    elif pending:
+        db.info.setdefault(_DROPPED_BOARDS, set()).update(session_id for session_id, _ in pending.values())
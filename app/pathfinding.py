@@ -0,0 +1,162 @@
+# app/pathfinding.py
+"""
+Shortest paths on the battle grid.
+Searches run over a window of the board around the mover that is just large
+enough for the remaining speed (no affordable path leaves it): the window's
+movement costs are copied out of the board's cost array once, cells held by
+other tokens are marked blocked in the copy, and the search itself works on
+flat lists. Pathfinder keeps its per-cell buffers (cost so far, parent,
+open / closed stamps) between calls; a call only bumps a generation
+counter instead of clearing them.
+
+Entering a cell costs its movement cost (1 on open ground); a diagonal step
+costs DIAGONAL_COST times that (1: movement is Chebyshev, like
+calculate_distance). A diagonal step can't squeeze between two blocked
+cells. find_path() is A* with the octile heuristic; reachable() is the same
+search without a goal (Dijkstra), so the overlay and MOVE validation always
+agree.
+"""
+
+import threading
+from heapq import heappop, heappush
+from typing import Dict, List, NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from .spatial_index import GridIndex, Cell
+
+# Movement cost of a cell nothing can enter
+BLOCKED = 255
+DIAGONAL_COST = 1
+
+_STEPS = ((-1, -1), (0, -1), (1, -1), (-1, 0), (1, 0), (-1, 1), (0, 1), (1, 1))
+
+class Path(NamedTuple):
+    cells: Tuple[Cell, ...]  # start first, goal last
+    cost: int
+
+def octile(dx: int, dy: int) -> int:
+    """Cheapest possible cost of a (dx, dy) move over open ground."""
+    dx, dy = abs(dx), abs(dy)
+    return max(dx, dy) + (DIAGONAL_COST - 1) * min(dx, dy)
+
+class Pathfinder:
+    def __init__(self):
+        self._g: List[int] = []
+        self._parent: List[int] = []
+        self._opened: List[int] = []
+        self._closed: List[int] = []
+        self._generation = 0
+        # Counters
+        self.searches = 0
+        self.expanded = 0
+
+    def _prepare(self, size: int) -> int:
+        if size > len(self._g):
+            grow = size - len(self._g)
+            self._g.extend([0] * grow)
+            self._parent.extend([0] * grow)
+            self._opened.extend([0] * grow)
+            self._closed.extend([0] * grow)
+        self._generation += 1
+        self.searches += 1
+        return self._generation
+
+    @staticmethod
+    def _window(start: Cell, budget: int, costs: np.ndarray, grid: GridIndex) -> Tuple[int, int, int, List[int]]:
+        """
+        (left, top, width, flat cell costs) of the board within budget cells of start,
+        with a BLOCKED border around it so the search needs no bounds checks.
+        """
+        left, top = max(0, start[0] - budget), max(0, start[1] - budget)
+        right, bottom = start[0] + budget + 1, start[1] + budget + 1
+        width, height = right - left + 2, bottom - top + 2
+        window = np.full((height, width), BLOCKED, dtype=np.uint8)
+        window[1:-1, 1:-1] = 1
+        # Cells beyond the cost array are open ground
+        known = costs[top:bottom, left:right]
+        window[1:1 + known.shape[0], 1:1 + known.shape[1]] = known
+        x0, y0 = left - 1, top - 1
+        flat = window.ravel().tolist()
+        for participant_id in grid.within(start[0], start[1], budget):
+            x, y = grid.position(participant_id)
+            if (x, y) != start:
+                flat[(y - y0) * width + (x - x0)] = BLOCKED
+        return x0, y0, width, flat
+
+    def _search(self, start: Cell, goal: Optional[Cell], budget: int, costs: np.ndarray, grid: GridIndex):
+        x0, y0, width, cells = self._window(start, budget, costs, grid)
+        generation = self._prepare(len(cells))
+        g, parent, opened, closed = self._g, self._parent, self._opened, self._closed
+        # (offset, the two orthogonal offsets it passes between, or None)
+        steps = tuple(
+            (dy * width + dx, (dx, dy * width) if dx and dy else None)
+            for dx, dy in _STEPS
+        )
+        origin = (start[1] - y0) * width + (start[0] - x0)
+        target = -1 if goal is None else (goal[1] - y0) * width + (goal[0] - x0)
+        gx, gy = (goal[0] - x0, goal[1] - y0) if goal is not None else (0, 0)
+        g[origin], parent[origin], opened[origin] = 0, -1, generation
+        heap = [(0, 0, origin)]
+        settled = []
+        while heap:
+            _, cost, index = heappop(heap)
+            if closed[index] == generation:
+                continue
+            closed[index] = generation
+            settled.append(index)
+            if index == target:
+                break
+            for offset, between in steps:
+                neighbour = index + offset
+                step = cells[neighbour]
+                if step == BLOCKED or closed[neighbour] == generation:
+                    continue
+                if between is not None:
+                    if cells[index + between[0]] == BLOCKED and cells[index + between[1]] == BLOCKED:
+                        continue
+                    step *= DIAGONAL_COST
+                reached = cost + step
+                if reached > budget or (opened[neighbour] == generation and reached >= g[neighbour]):
+                    continue
+                if target < 0:
+                    estimate = reached
+                else:
+                    # Admissible, so a cell that can't make the goal within budget is never opened
+                    estimate = reached + octile(gx - neighbour % width, gy - neighbour // width)
+                    if estimate > budget:
+                        continue
+                g[neighbour], parent[neighbour], opened[neighbour] = reached, index, generation
+                heappush(heap, (estimate, reached, neighbour))
+        self.expanded += len(settled)
+        return x0, y0, width, settled
+
+    def find_path(self, start: Cell, goal: Cell, budget: int, costs: np.ndarray, grid: GridIndex) -> Optional[Path]:
+        """Cheapest path from start to goal costing at most budget, or None."""
+        if goal[0] < 0 or goal[1] < 0 or octile(goal[0] - start[0], goal[1] - start[1]) > budget:
+            return None
+        x0, y0, width, settled = self._search(start, goal, budget, costs, grid)
+        index = (goal[1] - y0) * width + (goal[0] - x0)
+        if not settled or settled[-1] != index:
+            return None
+        cost = self._g[index]
+        cells = []
+        while index >= 0:
+            cells.append((x0 + index % width, y0 + index // width))
+            index = self._parent[index]
+        return Path(tuple(reversed(cells)), cost)
+
+    def reachable(self, start: Cell, budget: int, costs: np.ndarray, grid: GridIndex) -> Dict[Cell, int]:
+        """Every cell reachable for at most budget -> the cost of getting there."""
+        x0, y0, width, settled = self._search(start, None, budget, costs, grid)
+        g = self._g
+        return {(x0 + index % width, y0 + index // width): g[index] for index in settled}
+
+# One per thread, since searches share their buffers
+_local = threading.local()
+
+def pathfinder() -> Pathfinder:
+    finder = getattr(_local, "pathfinder", None)
+    if finder is None:
+        finder = _local.pathfinder = Pathfinder()
+    return finder
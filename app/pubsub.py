@@ -0,0 +1,155 @@
+# app/pubsub.py
+"""
+Pub/sub backends for the broadcast layer.
+Any worker publishes a small session event; every worker (including the
+publisher) receives it and fans it out to the sockets it holds locally.
+This is what allows running uvicorn with more than one worker.
+"""
+
+import asyncio
+import threading
+from typing import Dict, Any, Callable, Awaitable, Optional
+import orjson
+
+MessageHandler = Callable[[Dict[str, Any]], Awaitable[None]]
+
+class InMemoryPubSub:
+    """Single-process backend: publishing delivers straight to the local handler. Used for one worker and tests."""
+
+    def __init__(self):
+        self._handler: Optional[MessageHandler] = None
+
+    async def start(self, handler: MessageHandler):
+        self._handler = handler
+
+    async def publish(self, message: Dict[str, Any]):
+        if self._handler is not None:
+            await self._handler(message)
+
+    async def stop(self):
+        self._handler = None
+
+
+class PostgresPubSub:
+    """
+    Postgres LISTEN/NOTIFY backend on the existing DATABASE_URL.
+    One dedicated autocommit connection listens (read through the event loop,
+    never blocking it); a second one sends NOTIFY from a worker thread.
+    NOTIFY payloads are capped at 8000 bytes, so only small events go through here.
+    """
+
+    MAX_PAYLOAD_BYTES = 7999
+    RECONNECT_DELAY_SECONDS = 2.0
+
+    def __init__(self, database_url: str, channel: str = "vyuha_broadcast"):
+        from sqlalchemy.engine import make_url
+        # psycopg2 wants a plain libpq URI, not the SQLAlchemy "+driver" form
+        self.dsn = make_url(database_url).set(drivername="postgresql").render_as_string(hide_password=False)
+        self.channel = channel
+        self._handler: Optional[MessageHandler] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._listen_conn = None
+        self._publish_conn = None
+        self._publish_lock = threading.Lock()
+        self._reconnect_task: Optional[asyncio.Task] = None
+        self._stopped = False
+
+    def _connect(self):
+        import psycopg2
+        import psycopg2.extensions
+        conn = psycopg2.connect(self.dsn)
+        conn.set_isolation_level(psycopg2.extensions.ISOLATION_LEVEL_AUTOCOMMIT)
+        return conn
+
+    async def start(self, handler: MessageHandler):
+        self._handler = handler
+        self._loop = asyncio.get_running_loop()
+        self._stopped = False
+        self._listen()
+
+    def _listen(self):
+        self._listen_conn = self._connect()
+        with self._listen_conn.cursor() as cur:
+            cur.execute(f'LISTEN "{self.channel}";')
+        self._loop.add_reader(self._listen_conn.fileno(), self._on_readable)
+        print(f"Listening for broadcasts on Postgres channel '{self.channel}'")
+
+    def _on_readable(self):
+        try:
+            self._listen_conn.poll()
+        except Exception as e:
+            print(f"Lost Postgres LISTEN connection: {e}")
+            self._drop_listener()
+            self._reconnect_task = self._loop.create_task(self._reconnect())
+            return
+        while self._listen_conn.notifies:
+            notify = self._listen_conn.notifies.pop(0)
+            try:
+                message = orjson.loads(notify.payload)
+            except orjson.JSONDecodeError:
+                print(f"Ignoring malformed broadcast payload: {notify.payload[:100]}")
+                continue
+            self._loop.create_task(self._handler(message))
+
+    def _drop_listener(self):
+        if self._listen_conn is None:
+            return
+        try:
+            self._loop.remove_reader(self._listen_conn.fileno())
+        except Exception:
+            pass
+        try:
+            self._listen_conn.close()
+        except Exception:
+            pass
+        self._listen_conn = None
+
+    async def _reconnect(self):
+        while not self._stopped:
+            await asyncio.sleep(self.RECONNECT_DELAY_SECONDS)
+            try:
+                self._listen()
+                return
+            except Exception as e:
+                print(f"Postgres LISTEN reconnect failed: {e}")
+
+    def _notify(self, payload: str):
+        with self._publish_lock:
+            for attempt in range(2):
+                try:
+                    if self._publish_conn is None or self._publish_conn.closed:
+                        self._publish_conn = self._connect()
+                    with self._publish_conn.cursor() as cur:
+                        cur.execute("SELECT pg_notify(%s, %s)", (self.channel, payload))
+                    return
+                except Exception:
+                    # Stale connection: reconnect once, then give up
+                    self._publish_conn = None
+                    if attempt:
+                        raise
+
+    async def publish(self, message: Dict[str, Any]):
+        payload = orjson.dumps(message)
+        if len(payload) > self.MAX_PAYLOAD_BYTES:
+            raise ValueError(f"Broadcast payload too large for NOTIFY ({len(payload)} bytes)")
+        await asyncio.get_running_loop().run_in_executor(None, self._notify, payload.decode())
+
+    async def stop(self):
+        self._stopped = True
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+        self._drop_listener()
+        if self._publish_conn is not None:
+            self._publish_conn.close()
+            self._publish_conn = None
+
+
+def create_pubsub_backend(name: str, database_url: Optional[str] = None):
+    """Builds the backend selected by BROADCAST_BACKEND ("memory" or "postgres")."""
+    if name == "memory":
+        return InMemoryPubSub()
+    if name == "postgres":
+        if not database_url:
+            raise ValueError("The postgres broadcast backend needs DATABASE_URL.")
+        return PostgresPubSub(database_url)
+    raise ValueError(f"Unknown broadcast backend: {name}")
@@ -0,0 +1,139 @@
+# app/rules_catalog.py
+"""
+In-process cache for the rules catalogs (races, classes, abilities, items).
+These tables only change when a seed script runs or an ability is created,
+so they are loaded once into immutable rows keyed by id and name and served
+from memory; a hit costs no DB query. Every committed write to one of them
+(from any Session of this process) bumps the catalog version and the next
+read loads a fresh catalog. Writes made by another process (seed scripts,
+other workers) are picked up through invalidate(), see POST /rules/reload.
+"""
+
+from types import MappingProxyType
+from typing import Dict, Any, Optional, Tuple
+from itertools import chain
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+
+CATALOG_MODELS = (models.Race, models.Char_Class, models.Ability, models.Item)
+
+# Key in Session.info: set by a flush that wrote catalog rows, consumed by the commit
+_CATALOG_CHANGED = "rules_catalog_changed"
+
+# ==================================
+# Immutable Rows
+# ==================================
+
+def _freeze(value: Any) -> Any:
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_freeze(item) for item in value)
+    return value
+
+class CatalogRow:
+    """Read-only copy of an ORM row's columns, with the same attribute names (so from_attributes schemas accept it)."""
+    __slots__ = ("_values",)
+
+    def __init__(self, obj):
+        values = {attr.key: _freeze(getattr(obj, attr.key)) for attr in obj.__mapper__.column_attrs}
+        object.__setattr__(self, "_values", values)
+
+    def __getattr__(self, name: str) -> Any:
+        try:
+            return self._values[name]
+        except KeyError:
+            raise AttributeError(name) from None
+
+    def __setattr__(self, name: str, value: Any):
+        raise AttributeError(f"Catalog rows are read-only ({name})")
+
+    def __repr__(self) -> str:
+        return f"CatalogRow({self._values.get('id')}, {self._values.get('name', self._values.get('puranic_name'))!r})"
+
+class CatalogTable:
+    """One catalog: rows in listing order, plus lookups by id and by name."""
+
+    def __init__(self, rows, name_attr: str):
+        self.rows: Tuple[CatalogRow, ...] = tuple(rows)
+        self.by_id = MappingProxyType({row.id: row for row in self.rows})
+        self.by_name = MappingProxyType({getattr(row, name_attr): row for row in self.rows})
+
+class RulesCatalog:
+    """An immutable snapshot of all rules catalogs at one catalog version."""
+
+    def __init__(self, db: Session, version: int):
+        self.version = version
+        self.races = CatalogTable(
+            (CatalogRow(r) for r in db.query(models.Race).order_by(models.Race.name)), "name")
+        self.classes = CatalogTable(
+            (CatalogRow(c) for c in db.query(models.Char_Class).order_by(models.Char_Class.name)), "name")
+        self.abilities = CatalogTable(
+            (CatalogRow(a) for a in db.query(models.Ability).order_by(models.Ability.id)), "name")
+        self.items = CatalogTable(
+            (CatalogRow(i) for i in db.query(models.Item).order_by(models.Item.puranic_name)), "puranic_name")
+
+# ==================================
+# Cache
+# ==================================
+
+class RulesCatalogCache:
+    def __init__(self):
+        self.version = 1
+        self._catalog: Optional[RulesCatalog] = None
+        # Counters
+        self.hits = 0
+        self.loads = 0
+
+    def current(self) -> Optional[RulesCatalog]:
+        """The cached catalog if it is up to date, else None. Never touches the DB."""
+        catalog = self._catalog
+        if catalog is not None and catalog.version == self.version:
+            self.hits += 1
+            return catalog
+        return None
+
+    def get(self, db: Session) -> RulesCatalog:
+        """
+        The current catalog, loading it through db on a miss. No lock: concurrent misses
+        (threadpool and event loop alike) may both load, and the last one is kept.
+        """
+        catalog = self.current()
+        if catalog is not None:
+            return catalog
+        # Read the version first, so a write committed during the load forces another one
+        catalog = RulesCatalog(db, self.version)
+        self._catalog = catalog
+        self.loads += 1
+        return catalog
+
+    def invalidate(self):
+        """Bumps the catalog version; readers load a fresh catalog on their next call."""
+        self.version += 1
+
+    def stats(self) -> Dict[str, Any]:
+        return {"version": self.version, "hits": self.hits, "loads": self.loads}
+
+rules_catalog = RulesCatalogCache()
+
+# ==================================
+# Session Hooks
+# ==================================
+
+@event.listens_for(models.AppSession, "after_flush")
+def _note_catalog_writes(db: Session, flush_context):
+    # new/dirty/deleted still hold what this flush wrote
+    if any(isinstance(obj, CATALOG_MODELS) for obj in chain(db.new, db.dirty, db.deleted)):
+        db.info[_CATALOG_CHANGED] = True
+
+@event.listens_for(models.AppSession, "after_commit")
+def _bump_catalog_version(db: Session):
+    if db.info.pop(_CATALOG_CHANGED, False):
+        rules_catalog.invalidate()
+
+@event.listens_for(models.AppSession, "after_rollback")
+def _forget_catalog_writes(db: Session):
+    db.info.pop(_CATALOG_CHANGED, None)
@@ -0,0 +1,131 @@
+# app/rules_engine.py
+"""
+The combat resolution rules as pure functions.
+Nothing here touches the DB or the ORM: characters come in as StatBlocks,
+abilities as anything with the Ability column names (ORM rows, catalog rows
+or simulator specs) and state as plain numbers or NumPy arrays, so the same
+rules serve AbilitySystem, the turn actions and the headless simulator
+(combat_sim.py). Rolls are passed in; drawing them is the caller's business.
+The odds functions give the exact distributions of the same rules for
+previews; they only depend on dice, modifiers and DC, so they are memoized.
+"""
+
+from functools import lru_cache
+from typing import NamedTuple, Optional, Tuple
+
+import numpy as np
+
+from . import models, loka_system
+from .dice import DiceExpression, compile_dice
+from .stat_blocks import StatBlock
+
+def ability_resource(ability) -> Optional[str]:
+    """ "tapas" or "maya" for abilities that resonance affects, else None."""
+    if ability.resource_type == models.ResourceType.TAPAS:
+        return "tapas"
+    if ability.resource_type == models.ResourceType.MAYA:
+        return "maya"
+    return None
+
+def ability_cost(ability, active_resonance: str = "none", is_enhanced: bool = False, has_loka_resistance: bool = False) -> int:
+    """Resource cost of ability under the active resonance."""
+    resource = ability_resource(ability)
+    if resource is None:
+        return ability.resource_cost or 0
+    return loka_system.apply_resonance_to_ability_cost(
+        base_cost=ability.resource_cost or 0,
+        ability_resource=resource,
+        active_resonance=active_resonance,
+        is_enhanced=is_enhanced,
+        has_loka_resistance=has_loka_resistance
+    )
+
+def roll_modifier(ability, active_resonance: str = "none", is_enhanced: bool = False, has_loka_resistance: bool = False) -> int:
+    """What the active resonance adds to ability's attack rolls."""
+    resource = ability_resource(ability)
+    if resource is None:
+        return 0
+    return loka_system.apply_resonance_to_ability_roll(
+        base_roll=0,  # We're modifying the modifier, not the d20 roll itself
+        ability_resource=resource,
+        active_resonance=active_resonance,
+        is_enhanced=is_enhanced,
+        has_loka_resistance=has_loka_resistance
+    )
+
+def to_hit_modifier(stats: StatBlock, ability, active_resonance: str = "none", is_enhanced: bool = False, has_loka_resistance: bool = False) -> int:
+    to_hit_mod = stats.modifier(ability.to_hit_attribute) if ability.to_hit_attribute else 0
+    return to_hit_mod + roll_modifier(ability, active_resonance, is_enhanced, has_loka_resistance)
+
+def damage_modifier(stats: StatBlock, ability) -> int:
+    """Added to damage and healing rolls."""
+    return stats.modifier(ability.damage_attribute) if ability.damage_attribute else 0
+
+def evasion_dc(stats: StatBlock) -> int:
+    return 10 + stats.modifier("dakshata")
+
+def ability_dice(ability) -> DiceExpression:
+    """ability.damage_dice compiled (once per distinct expression)."""
+    return compile_dice(ability.damage_dice)
+
+# ==================================
+# Resolution
+# ==================================
+
+def resolve_attacks(attack_rolls, to_hit_mod, evasion_dcs, damage_rolls, damage_mod, prana):
+    """
+    Attack rolls against evasion DCs, elementwise over any number of attacks.
+    Returns (totals, hits, damage dealt, prana afterwards); misses deal 0.
+    """
+    totals = np.asarray(attack_rolls) + to_hit_mod
+    hits = totals >= evasion_dcs
+    damage = np.where(hits, np.maximum(0, np.asarray(damage_rolls) + damage_mod), 0)
+    return totals, hits, damage, np.maximum(0, np.asarray(prana) - damage)
+
+def resolve_healing(healing_rolls, healing_mod, prana, max_prana):
+    """Prana after healing, capped at max_prana."""
+    return np.minimum(np.asarray(prana) + np.asarray(healing_rolls) + healing_mod, max_prana)
+
+# ==================================
+# Odds
+# ==================================
+
+class AttackOdds(NamedTuple):
+    hit_chance: float
+    # (damage, probability) when the attack hits, ascending
+    damage: Tuple[Tuple[int, float], ...]
+    expected_damage: float
+
+def _distribution(damage_dice: str, modifier: int, low: Optional[int] = None, high: Optional[int] = None) -> Tuple[Tuple[int, float], ...]:
+    """Exact distribution of roll + modifier, clamped to [low, high]."""
+    outcomes = {}
+    for total, p in compile_dice(damage_dice).distribution():
+        amount = total + modifier
+        if low is not None:
+            amount = max(low, amount)
+        if high is not None:
+            amount = min(high, amount)
+        outcomes[amount] = outcomes.get(amount, 0.0) + p
+    return tuple(sorted(outcomes.items()))
+
+@lru_cache(maxsize=4096)
+def hit_chance(to_hit_mod: int, dc: int) -> float:
+    """Chance that d20 + to_hit_mod reaches dc."""
+    return sum(1 for roll in range(1, 21) if roll + to_hit_mod >= dc) / 20
+
+@lru_cache(maxsize=4096)
+def attack_odds(damage_dice: str, damage_mod: int, to_hit_mod: int, dc: int) -> AttackOdds:
+    """Exact odds of resolve_attacks() for one target, memoized per (dice, modifiers, DC)."""
+    damage = _distribution(damage_dice, damage_mod, low=0)
+    chance = hit_chance(to_hit_mod, dc)
+    return AttackOdds(chance, damage, chance * sum(amount * p for amount, p in damage))
+
+def downed_chance(odds: AttackOdds, prana: int) -> float:
+    """Chance that the attack takes a target with `prana` left to 0."""
+    if prana <= 0:
+        return 0.0
+    return odds.hit_chance * sum(p for amount, p in odds.damage if amount >= prana)
+
+def healing_odds(damage_dice: str, healing_mod: int, prana: int, max_prana: int) -> Tuple[Tuple[int, float], ...]:
+    """Exact distribution of the prana resolve_healing() restores to one target."""
+    return _distribution(damage_dice, healing_mod, high=max_prana - prana)
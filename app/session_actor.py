@@ -0,0 +1,333 @@
+# app/session_actor.py
+"""
+Per-session command actors.
+Every command that mutates a game session is sent to that session's actor:
+one asyncio task with a mailbox that runs the commands one at a time, so two
+requests can never interleave read-modify-write on the same session.
+Commands waiting in the mailbox are applied together and committed in one
+transaction (each command in its own SAVEPOINT, so one failing command only
+undoes itself). Callers get their reply once the batch is durable.
+Different sessions have different actors and run fully in parallel.
+Actors are per process; with several workers, the optional lock statement
+(e.g. SELECT ... FOR UPDATE on the session row) serializes batches across them.
+With a HotStateStore, commands submitted through submit_hot() run against the
+actor's in-memory SessionState instead (see combat_state.py); the state is
+flushed and dropped before any regular command so those always see current rows.
+"""
+
+import asyncio
+import time
+from typing import Dict, Any, Callable, List, Optional, Tuple
+
+from .game_log import has_pending_log_rows, discard_pending_log_rows, take_pending_log_rows, hold_log_announcements, release_log_announcements
+from .combat_state import CommittedView, HotStateStore, SessionState
+
+# A command is a sync function taking the Session first, run through AsyncSession.run_sync().
+# Hot commands additionally take combat=SessionState (None when hot state is off).
+Command = Callable[..., Any]
+# (command, args, future, hot)
+Envelope = Tuple[Command, Tuple[Any, ...], asyncio.Future, bool]
+
+class SessionActor:
+    """Mailbox and worker task for one session. Exits after idle_seconds without commands."""
+
+    def __init__(self, session_id: int, registry: "SessionActorRegistry"):
+        self.session_id = session_id
+        self._registry = registry
+        self._mailbox: asyncio.Queue = asyncio.Queue()
+        self._in_flight: List[Envelope] = []
+        # Resident hot state, loaded by the first hot command
+        self.combat: Optional[SessionState] = None
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    def submit(self, command: Command, args: Tuple[Any, ...], hot: bool = False) -> asyncio.Future:
+        future = asyncio.get_running_loop().create_future()
+        self._mailbox.put_nowait((command, args, future, hot))
+        return future
+
+    def cancel(self):
+        self._task.cancel()
+
+    def close(self) -> asyncio.Task:
+        """Runs what is already queued, flushes the hot state and exits."""
+        self._mailbox.put_nowait(None)
+        return self._task
+
+    def _next_timeout(self) -> float:
+        registry = self._registry
+        if self.combat is not None and self.combat.dirty:
+            return max(0.0, self.combat.dirty_since + registry.hot_state.flush_seconds - time.monotonic())
+        return registry.idle_seconds
+
+    async def _run(self):
+        registry = self._registry
+        try:
+            while True:
+                try:
+                    first = await asyncio.wait_for(self._mailbox.get(), timeout=self._next_timeout())
+                except asyncio.TimeoutError:
+                    if self.combat is not None and self.combat.dirty:
+                        await self._flush_combat()
+                        continue
+                    if self._mailbox.empty():
+                        # Nothing can be enqueued between this check and the removal (no await in between)
+                        registry._remove(self)
+                        return
+                    continue
+                closing = first is None
+                batch = [] if closing else [first]
+                if batch and registry.tick_seconds:
+                    await asyncio.sleep(registry.tick_seconds)
+                while batch and len(batch) < registry.max_batch and not self._mailbox.empty():
+                    envelope = self._mailbox.get_nowait()
+                    if envelope is None:
+                        closing = True
+                        break
+                    batch.append(envelope)
+                self._in_flight = batch
+                # Consecutive hot / regular commands are executed as separate groups, in order
+                start = 0
+                for i in range(1, len(batch) + 1):
+                    if i == len(batch) or batch[i][3] != batch[start][3]:
+                        if batch[start][3]:
+                            await self._execute_hot(batch[start:i])
+                        else:
+                            await self._execute(batch[start:i])
+                        start = i
+                self._in_flight = []
+                if self.combat is not None and self.combat.dirty and self._next_timeout() == 0:
+                    await self._flush_combat()
+                if closing:
+                    await self._flush_combat()
+                    registry._remove(self)
+                    return
+        except asyncio.CancelledError:
+            self._fail_pending(RuntimeError("Session actor stopped."))
+            raise
+
+    async def _flush_combat(self):
+        if self.combat is None:
+            return
+        try:
+            await self._registry.hot_state.flush(self.combat)
+        except Exception:
+            # Still journaled and still dirty: retried after another flush interval
+            self.combat.dirty_since = time.monotonic()
+
+    async def _execute(self, batch: List[Envelope]):
+        registry = self._registry
+        registry.batches += 1
+        outcomes = []
+        try:
+            if self.combat is not None:
+                # Regular commands read rows, so the rows must be current; the state is reloaded on demand afterwards
+                await registry.hot_state.flush(self.combat)
+                self.combat = None
+            async with registry.engine.connect() as connection:
+                transaction = await connection.begin()
+                if registry.lock_statement is not None:
+                    await connection.execute(registry.lock_statement(self.session_id))
+                # Commits inside a command only release its SAVEPOINT; the batch commits below
+                db = registry.session_factory(bind=connection, join_transaction_mode="create_savepoint")
+                hold_log_announcements(db)
+                try:
+                    for command, args, future, _ in batch:
+                        if future.cancelled():
+                            continue
+                        try:
+                            result = await db.run_sync(command, *args)
+                            if has_pending_log_rows(db):
+                                await db.commit()
+                            outcomes.append((future, result, None))
+                        except Exception as e:
+                            await db.rollback()
+                            discard_pending_log_rows(db)
+                            outcomes.append((future, None, e))
+                    await transaction.commit()
+                finally:
+                    await db.close()
+        except Exception as e:
+            registry.failed_batches += 1
+            print(f"Session {self.session_id}: batch of {len(batch)} commands failed to commit: {e}")
+            self._fail(batch, e)
+            return
+
+        registry.commands += len(outcomes)
+        release_log_announcements(db)
+        self._complete(outcomes)
+
+    async def _execute_hot(self, batch: List[Envelope]):
+        """
+        Runs commands against the in-memory state. Their Session is only used for reads
+        (abilities, inventory) and never committed. The batch is acknowledged once its
+        records are fsynced to the journal; the rows follow with the next flush.
+        """
+        registry = self._registry
+        if self.combat is None:
+            try:
+                self.combat = await registry.hot_state.load(self.session_id)
+            except Exception as e:
+                registry.batches += 1
+                registry.failed_batches += 1
+                print(f"Session {self.session_id}: failed to load hot state: {e}")
+                self._fail(batch, e)
+                return
+            if self.combat is None:
+                # Not in combat: the commands work on the rows like regular ones (lock, SAVEPOINT per command)
+                await self._execute(batch)
+                return
+        registry.batches += 1
+        outcomes = []
+        records = []
+        try:
+            state = self.combat
+            async with registry.session_factory() as db:
+                for command, args, future, _ in batch:
+                    if future.cancelled():
+                        continue
+                    state.begin()
+                    try:
+                        result = await db.run_sync(command, *args, combat=state)
+                        outcomes.append((future, result, None))
+                        log_rows = take_pending_log_rows(db)
+                    except Exception as e:
+                        state.rollback()
+                        discard_pending_log_rows(db)
+                        outcomes.append((future, None, e))
+                        log_rows = []
+                    record = state.finish(log_rows)
+                    if record is not None:
+                        records.append(record)
+            if records:
+                await registry.hot_state.append(state, records)
+        except Exception as e:
+            registry.failed_batches += 1
+            print(f"Session {self.session_id}: hot batch of {len(batch)} commands failed to journal: {e}")
+            # Memory may now be ahead of the journal; reload from rows + journal next time
+            self.combat = None
+            self._fail(batch, e)
+            return
+
+        registry.commands += len(outcomes)
+        self._complete(outcomes)
+
+    def _complete(self, outcomes: List[Tuple[asyncio.Future, Any, Optional[Exception]]]):
+        registry = self._registry
+        if registry.on_committed is not None:
+            registry.on_committed(self.session_id)
+        for future, result, error in outcomes:
+            if future.done():
+                continue
+            if error is not None:
+                future.set_exception(error)
+            else:
+                future.set_result(result)
+
+    def _fail(self, batch: List[Envelope], error: Exception):
+        for _, _, future, _ in batch:
+            if not future.done():
+                future.set_exception(error)
+
+    def _fail_pending(self, error: Exception):
+        pending = self._in_flight
+        while not self._mailbox.empty():
+            envelope = self._mailbox.get_nowait()
+            if envelope is not None:
+                pending.append(envelope)
+        self._fail(pending, error)
+
+
+class SessionActorRegistry:
+    """
+    Starts actors on demand, one per session id.
+    lock_statement(session_id), if given, is executed first in every batch transaction.
+    on_committed(session_id) runs after every successful batch commit.
+    hot_state, if given, turns on the in-memory mode for commands sent with submit_hot().
+    """
+
+    def __init__(
+        self,
+        engine,
+        session_factory,
+        lock_statement: Optional[Callable[[int], Any]] = None,
+        on_committed: Optional[Callable[[int], None]] = None,
+        tick_seconds: float = 0.0,
+        max_batch: int = 32,
+        idle_seconds: float = 60.0,
+        hot_state: Optional[HotStateStore] = None
+    ):
+        self.engine = engine
+        self.session_factory = session_factory
+        self.lock_statement = lock_statement
+        self.on_committed = on_committed
+        self.tick_seconds = tick_seconds
+        self.max_batch = max_batch
+        self.idle_seconds = idle_seconds
+        self.hot_state = hot_state
+        self._actors: Dict[int, SessionActor] = {}
+        # Counters
+        self.batches = 0
+        self.commands = 0
+        self.failed_batches = 0
+
+    def _actor(self, session_id: int) -> SessionActor:
+        actor = self._actors.get(session_id)
+        if actor is None:
+            actor = SessionActor(session_id, self)
+            self._actors[session_id] = actor
+        return actor
+
+    async def submit(self, session_id: int, command: Command, *args) -> Any:
+        """Runs command(db, *args) on the session's actor and returns its result once committed."""
+        return await self._actor(session_id).submit(command, args)
+
+    async def submit_hot(self, session_id: int, command: Command, *args) -> Any:
+        """
+        Runs command(db, *args, combat=state) on the session's actor and returns its result once journaled.
+        Without a hot state store it is plain submit() and the command keeps its combat=None default.
+        """
+        if self.hot_state is None:
+            return await self.submit(session_id, command, *args)
+        return await self._actor(session_id).submit(command, args, hot=True)
+
+    def combat_state(self, session_id: int) -> Optional[SessionState]:
+        """The session's resident hot state in this process, if any."""
+        actor = self._actors.get(session_id)
+        return actor.combat if actor is not None else None
+
+    def committed_view(self, session_id: int) -> Optional[CommittedView]:
+        """What the session's resident hot state last committed, if any; for reads in worker threads."""
+        combat = self.combat_state(session_id)
+        return combat.committed_view() if combat is not None else None
+
+    def invalidate_snapshot(self, session_id: int):
+        """For writes made outside the actor: the cached dump under the hot state is reloaded on the next broadcast."""
+        combat = self.combat_state(session_id)
+        if combat is not None:
+            combat.snapshot_stale = True
+
+    def _remove(self, actor: SessionActor):
+        if self._actors.get(actor.session_id) is actor:
+            del self._actors[actor.session_id]
+
+    async def stop(self):
+        actors = list(self._actors.values())
+        self._actors.clear()
+        if self.hot_state is None:
+            for actor in actors:
+                actor.cancel()
+            return
+        # Hot state has to reach the DB (or at least stay journaled) before the process exits
+        await asyncio.gather(*(actor.close() for actor in actors), return_exceptions=True)
+
+    def stats(self) -> Dict[str, Any]:
+        stats = {
+            "active_sessions": len(self._actors),
+            "batches": self.batches,
+            "commands": self.commands,
+            "failed_batches": self.failed_batches,
+            "commands_per_batch": round(self.commands / self.batches, 2) if self.batches else 0,
+        }
+        if self.hot_state is not None:
+            stats["hot_state"] = self.hot_state.stats()
+        return stats
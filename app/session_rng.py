@@ -0,0 +1,167 @@
+# app/session_rng.py
+"""
+Deterministic dice for each game session.
+Every session owns a PCG64 stream. Its seed and the number of dice drawn so
+far (rng_seed / rng_draws) are stored on the session row, and each die uses
+exactly one 64-bit output of the stream, so position N of the stream is
+always the same die. A stream is resumed at any position in O(log N)
+(PCG64.advance), which is also how a logged roll is replayed: log entries
+record the position of their first die as "rng_draw", and
+SessionRng(seed, rng_draw) draws the same dice again.
+Dice are pre-drawn in blocks, so a roll is a slice of a buffer; nothing is
+shared between sessions (or with the global random module).
+"""
+
+import secrets
+from typing import Dict, Any, Tuple, Union
+
+import numpy as np
+from sqlalchemy import event, update
+from sqlalchemy.orm import Session
+from sqlalchemy.orm.exc import StaleDataError
+
+from . import models
+
+# Dice drawn from the stream at a time
+BUFFER_SIZE = 256
+
+# Key in Session.info: session id -> (stream, seed, draws) as read from the row by this transaction
+_PENDING_STREAMS = "pending_rng_streams"
+
+_HIGH_BITS = np.uint64(32)
+
+def new_seed() -> int:
+    # 63 bits, so it fits a signed BIGINT
+    return secrets.randbits(63)
+
+class SessionRng:
+    """A session's dice stream, positioned after its first `draws` dice."""
+
+    def __init__(self, seed: int, draws: int = 0, buffer_size: int = BUFFER_SIZE):
+        self.seed = seed
+        self.buffer_size = buffer_size
+        self._resume(draws)
+
+    def _resume(self, draws: int):
+        self._bits = np.random.PCG64(self.seed)
+        self._bits.advance(draws)
+        self._buffer = np.empty(0, dtype=np.uint64)
+        self._buffer_start = draws
+        self._next = 0
+
+    @property
+    def draws(self) -> int:
+        return self._buffer_start + self._next
+
+    def _take(self, count: int) -> np.ndarray:
+        available = len(self._buffer) - self._next
+        if count > available:
+            fresh = self._bits.random_raw(max(self.buffer_size, count - available))
+            self._buffer = np.concatenate((self._buffer[self._next:], fresh))
+            self._buffer_start = self.draws
+            self._next = 0
+        raw = self._buffer[self._next:self._next + count]
+        self._next += count
+        return raw
+
+    def seek(self, draws: int):
+        """Repositions the stream, e.g. to take back the dice of a command that was rolled back."""
+        if self._buffer_start <= draws <= self._buffer_start + len(self._buffer):
+            self._next = draws - self._buffer_start
+        else:
+            self._resume(draws)
+
+    def integers(self, low: int, high: int, size: Union[int, Tuple[int, ...], None] = None):
+        """Like numpy.random.Generator.integers: values in [low, high), one die per value."""
+        count = 1 if size is None else int(np.prod(size))
+        # High 32 bits scaled to the range; the bias is below range / 2**32
+        raw = self._take(count)
+        values = ((raw >> _HIGH_BITS) * np.uint64(high - low) >> _HIGH_BITS).astype(np.int64) + low
+        if size is None:
+            return int(values[0])
+        return values.reshape(size)
+
+    def randint(self, low: int, high: int) -> int:
+        """Like random.randint: one value in [low, high]."""
+        return self.integers(low, high + 1)
+
+# ==================================
+# Registry
+# ==================================
+
+class SessionRngRegistry:
+    """
+    Streams of the DB-backed path. A stream is kept between commands and reused as long
+    as the row still records its position; otherwise (rollback, another worker rolled)
+    it is resumed from the row. Resident hot sessions carry their own stream (SessionState.rng).
+    """
+
+    def __init__(self):
+        self._streams: Dict[int, SessionRng] = {}
+        # Counters
+        self.reused = 0
+        self.resumed = 0
+        self.seeded = 0
+
+    def stream(self, db: Session, session) -> SessionRng:
+        """The stream to roll with in db's transaction; its new position is written by db's commit."""
+        resident = getattr(session, "rng", None)
+        if resident is not None:
+            return resident
+        pending = db.info.setdefault(_PENDING_STREAMS, {})
+        if session.id in pending:
+            return pending[session.id][0]
+        seed, draws = session.rng_seed, session.rng_draws or 0
+        stream = self._streams.get(session.id)
+        if seed is None:
+            stream = SessionRng(new_seed())
+            self.seeded += 1
+        elif stream is None or stream.seed != seed or stream.draws != draws:
+            stream = SessionRng(seed, draws)
+            self.resumed += 1
+        else:
+            self.reused += 1
+        self._streams[session.id] = stream
+        pending[session.id] = (stream, seed, draws)
+        return stream
+
+    def discard(self, session_id: int):
+        self._streams.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"streams": len(self._streams), "reused": self.reused, "resumed": self.resumed, "seeded": self.seeded}
+
+session_rngs = SessionRngRegistry()
+
+# ==================================
+# Session Hooks
+# ==================================
+
+@event.listens_for(models.AppSession, "before_commit")
+def _write_stream_positions(db: Session):
+    pending = db.info.pop(_PENDING_STREAMS, None)
+    if not pending:
+        return
+    table = models.GameSession.__table__
+    for session_id, (stream, seed, draws) in pending.items():
+        if seed is not None and stream.draws == draws:
+            continue
+        # Only from the position this transaction started at; two writers never hand out the same dice
+        seed_matches = table.c.rng_seed.is_(None) if seed is None else table.c.rng_seed == seed
+        result = db.execute(
+            update(table)
+            .where(table.c.id == session_id, seed_matches, table.c.rng_draws == draws)
+            .values(rng_seed=stream.seed, rng_draws=stream.draws)
+        )
+        if result.rowcount != 1:
+            session_rngs.discard(session_id)
+            raise StaleDataError(f"Dice stream of session {session_id} moved on since draw {draws}.")
+
+@event.listens_for(models.AppSession, "after_soft_rollback")
+def _forget_stream_positions(db: Session, previous_transaction):
+    # After a SAVEPOINT rollback the streams carry on from where they are: the dice drawn
+    # inside it are skipped, never handed out again, and commands that committed before it
+    # keep their positions. After the outermost rollback the cached streams are ahead of
+    # their rows and get resumed from them on next use.
+    if not previous_transaction.nested:
+        db.info.pop(_PENDING_STREAMS, None)
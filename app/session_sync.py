@@ -0,0 +1,307 @@
+# app/session_sync.py
+"""
+Versioned session snapshots for WebSocket sync.
+Remembers the last GameSessionSchema dump broadcast for each session and
+turns the next one into a keyed diff, so clients only receive what changed.
+Also holds the scheduler that coalesces bursts of broadcasts per session
+and the per-connection writers that deliver them.
+"""
+
+import asyncio
+import time
+from collections import deque
+from typing import Dict, Any, Optional, Tuple, Callable, Awaitable, Hashable
+
+# List fields of GameSessionSchema whose items carry an "id" and are diffed per item
+KEYED_COLLECTIONS = ("participants", "skill_checks", "environmental_objects")
+
+# ==================================
+# Diffing
+# ==================================
+
+def _diff_item(old_item: Dict[str, Any], new_item: Dict[str, Any]) -> Dict[str, Any]:
+    """Returns the id plus every top-level field of new_item that differs from old_item"""
+    changed = {key: value for key, value in new_item.items() if old_item.get(key) != value}
+    if not changed:
+        return {}
+    changed["id"] = new_item["id"]
+    return changed
+
+def diff_session_snapshots(old: Dict[str, Any], new: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Builds a keyed diff between two session dumps.
+
+    Format:
+        "set":    {field: value} for changed plain fields
+        "upsert": {collection: [items]} - new items in full, existing ones as
+                  their id plus the changed top-level fields
+        "remove": {collection: [ids]}
+        "order":  {collection: [ids]} - only when the id sequence changed
+    An empty dict means nothing changed.
+    """
+    patch: Dict[str, Any] = {}
+
+    changed_fields = {
+        key: value for key, value in new.items()
+        if key not in KEYED_COLLECTIONS and old.get(key) != value
+    }
+    if changed_fields:
+        patch["set"] = changed_fields
+
+    for collection in KEYED_COLLECTIONS:
+        old_items = {item["id"]: item for item in old.get(collection, [])}
+        new_list = new.get(collection, [])
+        new_ids = [item["id"] for item in new_list]
+
+        upserts = []
+        for item in new_list:
+            old_item = old_items.get(item["id"])
+            if old_item is None:
+                upserts.append(item)
+            else:
+                item_diff = _diff_item(old_item, item)
+                if item_diff:
+                    upserts.append(item_diff)
+        if upserts:
+            patch.setdefault("upsert", {})[collection] = upserts
+
+        new_id_set = set(new_ids)
+        removed = [item_id for item_id in old_items if item_id not in new_id_set]
+        if removed:
+            patch.setdefault("remove", {})[collection] = removed
+
+        surviving_old_ids = [item_id for item_id in old_items if item_id in new_id_set]
+        if surviving_old_ids != new_ids[:len(surviving_old_ids)]:
+            patch.setdefault("order", {})[collection] = new_ids
+
+    return patch
+
+# ==================================
+# Snapshot Store
+# ==================================
+
+class SessionSnapshotStore:
+    """
+    Last broadcast snapshot and version per session.
+    Versions only ever increase, even after a snapshot is forgotten.
+    """
+
+    def __init__(self):
+        self._snapshots: Dict[int, Dict[str, Any]] = {}
+        self._versions: Dict[int, int] = {}
+
+    def get(self, session_id: int) -> Optional[Tuple[int, Dict[str, Any]]]:
+        """Returns (version, snapshot) or None if nothing has been recorded"""
+        snapshot = self._snapshots.get(session_id)
+        if snapshot is None:
+            return None
+        return self._versions[session_id], snapshot
+
+    def advance(self, session_id: int, snapshot: Dict[str, Any]) -> Tuple[int, Optional[Dict[str, Any]]]:
+        """
+        Records snapshot as the latest state of the session.
+        Returns (version, patch). patch is None when there was no previous
+        snapshot to diff against, and {} when nothing changed (the version
+        is not bumped in that case).
+        """
+        previous = self._snapshots.get(session_id)
+        patch = diff_session_snapshots(previous, snapshot) if previous is not None else None
+        if patch == {}:
+            return self._versions[session_id], patch
+
+        version = self._versions.get(session_id, 0) + 1
+        self._versions[session_id] = version
+        self._snapshots[session_id] = snapshot
+        return version, patch
+
+    def forget(self, session_id: int):
+        """Drops the stored snapshot (e.g. when the last client leaves) but keeps the version"""
+        self._snapshots.pop(session_id, None)
+
+# ==================================
+# Message Builders
+# ==================================
+
+def full_snapshot_message(version: int, snapshot: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "session_update", "version": version, "data": snapshot}
+
+def patch_message(version: int, patch: Dict[str, Any]) -> Dict[str, Any]:
+    return {"type": "session_patch", "version": version, "base_version": version - 1, "patch": patch}
+
+# ==================================
+# Broadcast Scheduler
+# ==================================
+
+class BroadcastScheduler:
+    """
+    Coalesces bursts of broadcast requests.
+    mark_dirty() only flags a key; a per-key timer flushes it at most once per
+    tick. Requests that arrive while a flush is running re-flag the key, so a
+    trailing flush always follows and the final state is never lost.
+    """
+
+    def __init__(self, flush: Callable[[Hashable], Awaitable[None]], tick_seconds: float = 0.04):
+        self._flush = flush
+        self.tick_seconds = tick_seconds
+        self._dirty: set = set()
+        self._timers: Dict[Hashable, asyncio.Task] = {}
+        # Counters
+        self.requested = 0
+        self.coalesced = 0
+        self.sent = 0
+        self.failed = 0
+
+    def mark_dirty(self, key: Hashable):
+        """Flags key for the next flush. Must be called from the event loop thread."""
+        self.requested += 1
+        if key in self._dirty:
+            # A flush is already pending and will cover this request
+            self.coalesced += 1
+            return
+        self._dirty.add(key)
+        if key not in self._timers:
+            self._timers[key] = asyncio.get_running_loop().create_task(self._run(key))
+
+    async def _run(self, key: Hashable):
+        try:
+            while key in self._dirty:
+                await asyncio.sleep(self.tick_seconds)
+                self._dirty.discard(key)
+                try:
+                    await self._flush(key)
+                    self.sent += 1
+                except Exception as e:
+                    self.failed += 1
+                    print(f"Broadcast flush failed for {key}: {e}")
+        finally:
+            self._timers.pop(key, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "tick_ms": round(self.tick_seconds * 1000),
+            "requested": self.requested,
+            "coalesced": self.coalesced,
+            "sent": self.sent,
+            "failed": self.failed,
+            "pending": len(self._dirty),
+        }
+
+# ==================================
+# Per-Connection Writers
+# ==================================
+
+# Kinds of queued messages
+STATE = "state"        # session_update / session_patch; superseded by newer state
+SNAPSHOT = "snapshot"  # placeholder, resolved to the latest full snapshot when it is written
+EVENT = "event"        # everything else (log notices, ...)
+
+class ClientConnection:
+    """
+    One WebSocket plus its own writer task and bounded send queue.
+    Broadcasting only enqueues, so a slow client delays nobody but itself:
+    - when the queue is full, queued state messages are dropped and replaced
+      by a single "latest full snapshot" placeholder,
+    - when the oldest unsent message (or the send in flight) is older than the
+      lag budget, the socket is closed,
+    - any send error closes the connection and reports it via on_failure.
+    """
+
+    def __init__(
+        self,
+        websocket,
+        snapshot_provider: Callable[[], Optional[bytes]],
+        on_failure: Callable[["ClientConnection"], None],
+        max_queue: int = 64,
+        lag_budget_seconds: float = 5.0
+    ):
+        self.websocket = websocket
+        self._snapshot_provider = snapshot_provider
+        self._on_failure = on_failure
+        self.max_queue = max_queue
+        self.lag_budget_seconds = lag_budget_seconds
+        self._queue: deque = deque()  # (kind, payload, enqueued_at)
+        self._wakeup = asyncio.Event()
+        self._sending_since: Optional[float] = None
+        self.dropped = 0
+        self.closed = False
+        self._task = asyncio.get_running_loop().create_task(self._writer())
+
+    def lag(self) -> float:
+        """Seconds the oldest undelivered message has been waiting"""
+        now = time.monotonic()
+        oldest = self._sending_since
+        if self._queue:
+            queued_at = self._queue[0][2]
+            oldest = queued_at if oldest is None else min(oldest, queued_at)
+        return 0.0 if oldest is None else now - oldest
+
+    def send(self, payload: Optional[bytes], kind: str = EVENT) -> bool:
+        """Enqueues a message without waiting. Returns False if the connection is (now) closed."""
+        if self.closed:
+            return False
+        if self.lag() > self.lag_budget_seconds:
+            print(f"WebSocket exceeded lag budget ({self.lag():.1f}s), closing.")
+            self.close(code=1008)
+            return False
+
+        if len(self._queue) >= self.max_queue:
+            self._shed_load()
+        if kind == STATE and self._queue and self._queue[-1][0] == SNAPSHOT:
+            # The pending snapshot is resolved at write time and already covers this state
+            self.dropped += 1
+        else:
+            self._queue.append((kind, payload, time.monotonic()))
+        self._wakeup.set()
+        return True
+
+    def _shed_load(self):
+        """Keeps only the newest state: queued state messages collapse into one snapshot placeholder."""
+        kept = deque(item for item in self._queue if item[0] == EVENT)
+        shed = len(self._queue) - len(kept)
+        if shed:
+            oldest_state_at = next(item[2] for item in self._queue if item[0] != EVENT)
+            kept.append((SNAPSHOT, None, oldest_state_at))
+            shed -= 1
+        while len(kept) >= self.max_queue:
+            kept.popleft()
+            shed += 1
+        self.dropped += shed
+        self._queue = kept
+
+    async def _writer(self):
+        try:
+            while True:
+                while not self._queue:
+                    self._wakeup.clear()
+                    await self._wakeup.wait()
+                kind, payload, _ = self._queue.popleft()
+                if kind == SNAPSHOT:
+                    payload = self._snapshot_provider()
+                    if payload is None:
+                        continue
+                self._sending_since = time.monotonic()
+                await self.websocket.send_bytes(payload)
+                self._sending_since = None
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            print(f"WebSocket send failed, dropping connection: {e}")
+            self.close()
+
+    def close(self, code: int = 1000, close_socket: bool = True):
+        """Stops the writer, closes the socket in the background and reports the closure once."""
+        if self.closed:
+            return
+        self.closed = True
+        self._queue.clear()
+        if self._task is not asyncio.current_task():
+            self._task.cancel()
+        if close_socket:
+            asyncio.get_running_loop().create_task(self._close_socket(code))
+        self._on_failure(self)
+
+    async def _close_socket(self, code: int):
+        try:
+            await asyncio.wait_for(self.websocket.close(code=code), timeout=self.lag_budget_seconds)
+        except Exception:
+            pass  # Already gone
@@ -0,0 +1,223 @@
+# app/spatial_index.py
+"""
+Per-session spatial index of token positions.
+Positions are hashed into square buckets of BUCKET_SIZE cells, so area,
+range and adjacency queries only look at the buckets their square touches
+(distances are Chebyshev, like calculate_distance) and cost time
+proportional to what is found, not to the number of tokens on the board.
+Indexes are built with one query on first use and then kept up to date by
+the commit hooks below, which see every placement, move, teleport and
+removal written through the ORM. Bulk writes that bypass the ORM (the hot
+state flush) drop the session's index instead, and so do state events from
+other workers. Resident hot sessions keep their own GridIndex, see
+combat_state.SessionState.
+"""
+
+from itertools import chain, count
+from typing import Dict, Any, List, Optional, Set, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models
+
+BUCKET_SIZE = 8
+
+# Keys in Session.info
+_PENDING_POSITIONS = "pending_token_positions"
+_DROPPED_SESSIONS = "dropped_spatial_indexes"
+
+Cell = Tuple[int, int]
+
+# Versions are unique across all indexes, so a rebuilt index never reuses one
+_VERSIONS = count(1)
+
+# ==================================
+# Grid Index
+# ==================================
+
+class GridIndex:
+    """Token positions of one session: participant id -> cell, bucketed for range queries and by cell for occupancy."""
+
+    def __init__(self, bucket_size: int = BUCKET_SIZE):
+        self.bucket_size = bucket_size
+        self._positions: Dict[int, Cell] = {}
+        self._buckets: Dict[Cell, Set[int]] = {}
+        self._cells: Dict[Cell, Set[int]] = {}
+        # Changes with every placement, move or removal
+        self.version = next(_VERSIONS)
+
+    def __len__(self) -> int:
+        return len(self._positions)
+
+    def copy(self) -> "GridIndex":
+        """An independent index with the same positions and version."""
+        other = GridIndex(self.bucket_size)
+        other._positions = dict(self._positions)
+        other._buckets = {key: set(members) for key, members in self._buckets.items()}
+        other._cells = {key: set(members) for key, members in self._cells.items()}
+        other.version = self.version
+        return other
+
+    def _bucket(self, x: int, y: int) -> Cell:
+        return (x // self.bucket_size, y // self.bucket_size)
+
+    def position(self, participant_id: int) -> Optional[Cell]:
+        return self._positions.get(participant_id)
+
+    def set_position(self, participant_id: int, x: Optional[int], y: Optional[int]):
+        """Places, moves or (with x or y None) removes a token."""
+        cell = (x, y) if x is not None and y is not None else None
+        old = self._positions.get(participant_id)
+        if old == cell:
+            return
+        self.version = next(_VERSIONS)
+        if old is not None:
+            self._discard(self._buckets, self._bucket(*old), participant_id)
+            self._discard(self._cells, old, participant_id)
+            del self._positions[participant_id]
+        if cell is not None:
+            self._positions[participant_id] = cell
+            self._buckets.setdefault(self._bucket(*cell), set()).add(participant_id)
+            self._cells.setdefault(cell, set()).add(participant_id)
+
+    def remove(self, participant_id: int):
+        self.set_position(participant_id, None, None)
+
+    @staticmethod
+    def _discard(buckets: Dict[Cell, Set[int]], key: Cell, participant_id: int):
+        members = buckets.get(key)
+        if members is not None:
+            members.discard(participant_id)
+            if not members:
+                del buckets[key]
+
+    def within(self, x: int, y: int, radius: int) -> List[int]:
+        """Ids of the tokens at most radius cells from (x, y), in id order."""
+        if radius < 0:
+            return []
+        min_bx, min_by = self._bucket(x - radius, y - radius)
+        max_bx, max_by = self._bucket(x + radius, y + radius)
+        found = []
+        for bx in range(min_bx, max_bx + 1):
+            for by in range(min_by, max_by + 1):
+                for participant_id in self._buckets.get((bx, by), ()):
+                    px, py = self._positions[participant_id]
+                    if max(abs(px - x), abs(py - y)) <= radius:
+                        found.append(participant_id)
+        found.sort()
+        return found
+
+    def at(self, x: int, y: int) -> List[int]:
+        """Ids of the tokens standing on (x, y)."""
+        return sorted(self._cells.get((x, y), ()))
+
+    def adjacent(self, participant_id: int) -> List[int]:
+        """Ids of the tokens on the 8 cells around a token (and on its own cell), itself excluded."""
+        cell = self._positions.get(participant_id)
+        if cell is None:
+            return []
+        return [other for other in self.within(cell[0], cell[1], 1) if other != participant_id]
+
+    def occupied(self, x: int, y: int) -> bool:
+        return (x, y) in self._cells
+
+# ==================================
+# Registry
+# ==================================
+
+class SpatialIndexRegistry:
+    """GridIndex per session for the DB-backed path; built on first use and maintained by the commit hooks."""
+
+    def __init__(self):
+        self._indexes: Dict[int, GridIndex] = {}
+        # session id -> number of changes applied or dropped, so a build that raced a commit is not kept
+        self._changes: Dict[int, int] = {}
+        # Counters
+        self.hits = 0
+        self.builds = 0
+
+    def get(self, db: Session, session_id: int) -> GridIndex:
+        index = self._indexes.get(session_id)
+        if index is not None:
+            self.hits += 1
+            return index
+        changes = self._changes.get(session_id, 0)
+        index = GridIndex()
+        rows = db.query(
+            models.SessionCharacter.id, models.SessionCharacter.x_pos, models.SessionCharacter.y_pos
+        ).filter(
+            models.SessionCharacter.session_id == session_id,
+            models.SessionCharacter.x_pos.isnot(None),
+            models.SessionCharacter.y_pos.isnot(None)
+        )
+        for participant_id, x, y in rows:
+            index.set_position(participant_id, x, y)
+        self.builds += 1
+        if self._changes.get(session_id, 0) == changes:
+            self._indexes[session_id] = index
+        return index
+
+    def _changed(self, session_id: int):
+        self._changes[session_id] = self._changes.get(session_id, 0) + 1
+
+    def apply(self, positions: Dict[int, Tuple[int, Optional[int], Optional[int]]]):
+        """Applies committed (session_id, x, y) per participant id; None coordinates remove the token."""
+        for participant_id, (session_id, x, y) in positions.items():
+            self._changed(session_id)
+            index = self._indexes.get(session_id)
+            if index is not None:
+                index.set_position(participant_id, x, y)
+
+    def invalidate(self, session_id: int):
+        self._changed(session_id)
+        self._indexes.pop(session_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "sessions": len(self._indexes),
+            "tokens": sum(len(index) for index in self._indexes.values()),
+            "hits": self.hits,
+            "builds": self.builds,
+        }
+
+spatial_index = SpatialIndexRegistry()
+
+def drop_on_commit(db: Session, session_id: int):
+    """For writes that bypass the ORM: the session's index is rebuilt after db commits."""
+    db.info.setdefault(_DROPPED_SESSIONS, set()).add(session_id)
+
+# ==================================
+# Session Hooks
+# ==================================
+
+@event.listens_for(models.AppSession, "after_flush")
+def _note_position_writes(db: Session, flush_context):
+    pending = db.info.setdefault(_PENDING_POSITIONS, {})
+    for obj in chain(db.new, db.dirty):
+        if isinstance(obj, models.SessionCharacter):
+            pending[obj.id] = (obj.session_id, obj.x_pos, obj.y_pos)
+    for obj in db.deleted:
+        if isinstance(obj, models.SessionCharacter):
+            pending[obj.id] = (obj.session_id, None, None)
+        elif isinstance(obj, models.GameSession):
+            drop_on_commit(db, obj.id)
+    if not pending:
+        db.info.pop(_PENDING_POSITIONS)
+
+@event.listens_for(models.AppSession, "after_commit")
+def _apply_position_writes(db: Session):
+    spatial_index.apply(db.info.pop(_PENDING_POSITIONS, {}))
+    for session_id in db.info.pop(_DROPPED_SESSIONS, ()):
+        spatial_index.invalidate(session_id)
+
+@event.listens_for(models.AppSession, "after_soft_rollback")
+def _forget_position_writes(db: Session, previous_transaction):
+    # Fires for SAVEPOINTs as well as the outermost transaction, and says which one rolled back.
+    # After a SAVEPOINT rollback what the rest of the transaction wrote can't be told apart
+    # any more, so those sessions are rebuilt
+    pending = db.info.pop(_PENDING_POSITIONS, None)
+    if not previous_transaction.nested:
+        db.info.pop(_DROPPED_SESSIONS, None)
+    elif pending:
+        db.info.setdefault(_DROPPED_SESSIONS, set()).update(session_id for session_id, _, _ in pending.values())
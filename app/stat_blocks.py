@@ -0,0 +1,145 @@
+# app/stat_blocks.py
+"""
+Precomputed character stat blocks.
+Attributes, derived resources and every DERIVED_SKILLS modifier depend only
+on race, class, level and equipment, so they are computed once per such
+combination and shared. Lookups by character are cached as well; those
+entries are dropped when a commit changes the character (level-up) or its
+inventory (equip changes), and everything is dropped when the rules
+catalogs change. A cached lookup never loads race, class or inventory.
+"""
+
+import math
+from itertools import chain
+from types import MappingProxyType
+from typing import Dict, Any, Mapping, NamedTuple, Tuple, Set
+
+from sqlalchemy import event
+from sqlalchemy.orm import Session
+
+from . import models, game_rules
+from .rules_catalog import rules_catalog
+
+ATTRIBUTES = ("bala", "dakshata", "dhriti", "buddhi", "prajna", "samkalpa")
+
+# Key in Session.info: ids of characters whose stat inputs this transaction changed
+_CHANGED_CHARACTERS = "stat_block_changed_characters"
+
+def get_modifier(score: int) -> int:
+    return (score - 10) // 2
+
+class StatBlock(NamedTuple):
+    """Same attribute names as CharacterSchema, so getattr(stats, ability.to_hit_attribute) keeps working."""
+    bala: int
+    dakshata: int
+    dhriti: int
+    buddhi: int
+    prajna: int
+    samkalpa: int
+    max_prana: int
+    max_tapas: int
+    max_maya: int
+    skill_modifiers: Mapping[str, int]
+
+    def modifier(self, attribute: str) -> int:
+        return get_modifier(getattr(self, attribute))
+
+    def check_modifier(self, check_type: str) -> int:
+        """Modifier for a skill check: a DERIVED_SKILLS entry or a plain attribute."""
+        if check_type in self.skill_modifiers:
+            return self.skill_modifiers[check_type]
+        return self.modifier(check_type)
+
+def compute_stat_block(race, char_class, level: int) -> StatBlock:
+    """race / char_class may be ORM rows, catalog rows or schemas; they share the column names."""
+    scores = {attr: getattr(char_class, f"base_{attr}") + getattr(race, f"{attr}_mod") for attr in ATTRIBUTES}
+    mods = {attr: get_modifier(score) for attr, score in scores.items()}
+    return StatBlock(
+        **scores,
+        # Prana is based on Fortitude (Dhriti)
+        max_prana=10 + (level * mods["dhriti"]),
+        # Tapas is the sum of Deha (Body) attribute modifiers, Māyā of the Ātman (Spirit) ones
+        max_tapas=mods["bala"] + mods["dakshata"] + mods["dhriti"],
+        max_maya=mods["buddhi"] + mods["prajna"] + mods["samkalpa"],
+        skill_modifiers=MappingProxyType({
+            skill: math.floor((mods[first] + mods[second]) / 2)
+            for skill, (first, second) in game_rules.DERIVED_SKILLS.items()
+        })
+    )
+
+# ==================================
+# Service
+# ==================================
+
+class StatBlockService:
+    def __init__(self):
+        # (race, class, level, equipped item ids) -> StatBlock
+        self._blocks: Dict[Tuple[Any, ...], StatBlock] = {}
+        # character id -> (level, StatBlock)
+        self._by_character: Dict[int, Tuple[int, StatBlock]] = {}
+        self._catalog_version = rules_catalog.version
+        # Counters
+        self.hits = 0
+        self.computed = 0
+
+    def _check_catalog(self):
+        # Race and class numbers come from the catalogs
+        if self._catalog_version != rules_catalog.version:
+            self._blocks.clear()
+            self._by_character.clear()
+            self._catalog_version = rules_catalog.version
+
+    def for_template(self, race, char_class, level: int, equipment: Tuple[int, ...] = ()) -> StatBlock:
+        self._check_catalog()
+        key = (race.name, char_class.name, level, equipment)
+        block = self._blocks.get(key)
+        if block is None:
+            # Equipment is part of the key so items with stat effects can be added without changing callers
+            block = compute_stat_block(race, char_class, level)
+            self._blocks[key] = block
+            self.computed += 1
+        return block
+
+    def for_character(self, character: models.Character) -> StatBlock:
+        """The character's stat block; only a miss reads its race, class and inventory."""
+        self._check_catalog()
+        cached = self._by_character.get(character.id)
+        if cached is not None and cached[0] == character.level:
+            self.hits += 1
+            return cached[1]
+        equipment = tuple(sorted(inv.item_id for inv in character.inventory if inv.is_equipped))
+        block = self.for_template(character.race, character.char_class, character.level, equipment)
+        self._by_character[character.id] = (character.level, block)
+        return block
+
+    def invalidate_character(self, character_id: int):
+        self._by_character.pop(character_id, None)
+
+    def stats(self) -> Dict[str, Any]:
+        return {"blocks": len(self._blocks), "characters": len(self._by_character), "hits": self.hits, "computed": self.computed}
+
+stat_blocks = StatBlockService()
+
+# ==================================
+# Session Hooks
+# ==================================
+
+@event.listens_for(models.AppSession, "after_flush")
+def _note_stat_input_writes(db: Session, flush_context):
+    changed: Set[int] = set()
+    for obj in chain(db.new, db.dirty, db.deleted):
+        if isinstance(obj, models.Character):
+            changed.add(obj.id)
+        elif isinstance(obj, models.CharacterInventory):
+            changed.add(obj.character_id)
+    if changed:
+        db.info.setdefault(_CHANGED_CHARACTERS, set()).update(changed)
+
+@event.listens_for(models.AppSession, "after_commit")
+def _invalidate_stat_blocks(db: Session):
+    for character_id in db.info.pop(_CHANGED_CHARACTERS, ()):
+        stat_blocks.invalidate_character(character_id)
+
+@event.listens_for(models.AppSession, "after_rollback")
+def _forget_stat_input_writes(db: Session):
+    db.info.pop(_CHANGED_CHARACTERS, None)
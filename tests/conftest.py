@@ -0,0 +1,10 @@
+# tests/conftest.py
+"""
+Tests for the pure parts of the app: run `python -m pytest` from the repo root
+(pip install -r tests/requirements.txt). Nothing here talks to a database;
+app.models only needs a URL to build its engines, which connect lazily.
+"""
+
+import os
+
+os.environ.setdefault("DATABASE_URL", "postgresql://localhost/vyuha_test")
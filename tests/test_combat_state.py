@@ -0,0 +1,172 @@
+# tests/test_combat_state.py
+from types import SimpleNamespace
+
+import pytest
+
+from app.combat_state import PARTICIPANT_FIELDS, SESSION_FIELDS, CombatJournal, SessionState, merge_records
+
+def participant_row(participant_id, x_pos, y_pos):
+    return SimpleNamespace(
+        id=participant_id, session_id=1, character_id=10 + participant_id, player_id=None, npc_type=None,
+        character=SimpleNamespace(name=f"Fighter {participant_id}"),
+        current_prana=20, current_tapas=5, current_maya=3, remaining_speed=6,
+        actions=1, bonus_actions=1, reactions=1, status="active", x_pos=x_pos, y_pos=y_pos, version_id=1,
+    )
+
+@pytest.fixture
+def state():
+    """A SessionState built from stand-ins for the GameSession / SessionCharacter rows."""
+    session_db = SimpleNamespace(
+        id=1, environmental_resonance="none", current_mode="combat", turn_order=[1, 2], current_turn_index=0,
+        active_loka_summoning=None, version_id=4, rng_seed=1234, rng_draws=0,
+        participants=[participant_row(1, 0, 0), participant_row(2, 3, 3)],
+    )
+    snapshot = {"id": 1, "current_turn_index": 0, "participants": [{"id": 1, "x_pos": 0}, {"id": 2, "x_pos": 3}]}
+    return SessionState(session_db, snapshot)
+
+def test_loads_the_hot_fields(state):
+    assert {field: getattr(state, field) for field in SESSION_FIELDS}["version_id"] == 4
+    assert state.participants[1].image() == {field: getattr(participant_row(1, 0, 0), field) for field in PARTICIPANT_FIELDS}
+    assert state.grid.position(2) == (3, 3)
+    assert not state.dirty
+
+def test_commit_bumps_only_changed_rows(state):
+    state.begin()
+    state.participants[1].current_prana -= 7
+    state.participants[1].x_pos = 1
+    state.commit()
+    record = state.finish([{"event": "attack"}])
+    assert state.participants[1].version_id == 2
+    assert state.participants[2].version_id == 1
+    assert state.version_id == 4
+    assert state.grid.position(1) == (1, 0)
+    assert record["session"] is None
+    assert record["participants"] == {1: state.participants[1].image()}
+    assert record["log_rows"] == [{"event": "attack"}]
+
+def test_session_changes_bump_the_session_version(state):
+    state.begin()
+    state.current_turn_index = 1
+    state.commit()
+    record = state.finish([])
+    assert state.version_id == 5
+    assert record["session"]["current_turn_index"] == 1
+    assert record["session"]["version_id"] == 5
+
+def test_rollback_drops_changes_and_replays_the_same_dice(state):
+    state.begin()
+    first = state.rng.integers(1, 21, size=5)
+    state.participants[2].status = "downed"
+    state.turn_order.append(3)
+    state.rollback()
+    assert state.participants[2].status == "active"
+    assert state.turn_order == [1, 2]
+    assert state.rng.draws == 0
+    assert list(state.rng.integers(1, 21, size=5)) == list(first)
+
+def test_finish_drops_uncommitted_changes(state):
+    state.begin()
+    state.participants[1].remaining_speed = 2
+    state.commit()
+    state.participants[1].remaining_speed = 0
+    state.participants[2].x_pos = 9
+    record = state.finish([])
+    assert state.participants[1].remaining_speed == 2
+    assert state.participants[2].x_pos == 3
+    assert state.grid.position(2) == (3, 3)
+    assert list(record["participants"]) == [1]
+
+def test_nothing_changed_is_no_record(state):
+    state.begin()
+    assert state.finish([]) is None
+    assert not state.dirty
+
+def test_dice_move_the_stream_position_without_a_version(state):
+    state.begin()
+    state.rng.integers(1, 7, size=3)
+    state.commit()
+    record = state.finish([])
+    assert record["session"] == {"rng_seed": 1234, "rng_draws": 3}
+    assert state.version_id == 4
+
+def test_take_dirty_and_mark_clean(state):
+    state.begin()
+    state.participants[2].reactions = 0
+    state.current_turn_index = 1
+    state.commit()
+    state.finish([{"event": "a"}])
+    assert state.dirty
+    session_image, participant_images, log_rows = state.take_dirty()
+    assert session_image == {field: getattr(state, field) for field in SESSION_FIELDS}
+    assert participant_images == {2: state.participants[2].image()}
+    assert log_rows == [{"event": "a"}]
+    # A row logged after the flush started stays pending
+    state.begin()
+    state.finish([{"event": "b"}])
+    state.mark_clean(len(log_rows))
+    assert state.pending_log_rows == [{"event": "b"}]
+    assert state.take_dirty() == (None, {}, [{"event": "b"}])
+
+def test_snapshot_shows_what_was_committed(state):
+    state.begin()
+    state.participants[1].x_pos = 5
+    assert state.snapshot()["participants"][0]["x_pos"] == 0
+    state.commit()
+    assert state.snapshot()["participants"][0]["x_pos"] == 5
+    state.finish([])
+
+def test_committed_view_is_a_stable_copy(state):
+    state.begin()
+    state.participants[1].x_pos = 2
+    view = state.committed_view()
+    assert view.participants[1].x_pos == 0
+    state.commit()
+    assert view.participants[1].x_pos == 0 and view.grid.position(1) == (0, 0)
+    fresh = state.committed_view()
+    assert fresh is not view
+    assert fresh.participants[1].x_pos == 2 and fresh.grid.position(1) == (2, 0)
+    assert fresh.participants[1].character is state.participants[1].character
+    state.finish([])
+    assert state.committed_view() is fresh
+
+def test_merge_keeps_the_last_image_of_each_participant():
+    records = [
+        {"participants": {"1": {"current_prana": 10}, "2": {"current_prana": 5}}, "log_rows": [{"event": "a"}]},
+        {"participants": {"1": {"current_prana": 4}}, "log_rows": [{"event": "b"}]},
+    ]
+    session_image, participant_images, log_rows = merge_records(records)
+    assert session_image is None
+    assert participant_images == {1: {"current_prana": 4}, 2: {"current_prana": 5}}
+    assert log_rows == [{"event": "a"}, {"event": "b"}]
+
+def test_merge_layers_partial_session_images():
+    records = [
+        {"session": {"current_turn_index": 1, "rng_draws": 12}},
+        {"session": None},
+        {"session": {"rng_draws": 40}},
+    ]
+    session_image, participant_images, log_rows = merge_records(records)
+    assert session_image == {"current_turn_index": 1, "rng_draws": 40}
+    assert participant_images == {}
+    assert log_rows == []
+
+def test_merge_of_nothing():
+    assert merge_records([]) == (None, {}, [])
+
+def test_journal_round_trip(tmp_path):
+    journal = CombatJournal(str(tmp_path))
+    journal.append(3, [{"participants": {"1": {"current_prana": 4}}}])
+    journal.append(3, [{"session": {"version_id": 2}}])
+    assert journal.has_records(3)
+    assert list(journal.session_ids()) == [3]
+    assert journal.read(3) == [{"participants": {"1": {"current_prana": 4}}}, {"session": {"version_id": 2}}]
+    journal.discard(3)
+    assert not journal.has_records(3)
+    journal.discard(3)
+
+def test_journal_stops_at_a_torn_tail(tmp_path):
+    journal = CombatJournal(str(tmp_path))
+    journal.append(3, [{"session": {"version_id": 2}}])
+    with open(tmp_path / "session_3.jsonl", "ab") as f:
+        f.write(b'{"session": {"vers')
+    assert journal.read(3) == [{"session": {"version_id": 2}}]
@@ -0,0 +1,160 @@
+# tests/test_dice.py
+from collections import Counter
+from itertools import product
+
+import numpy as np
+import pytest
+
+from app.dice import EXPLODE_LIMIT, MAX_TOTAL, DiceSyntaxError, DiceTerm, compile_dice
+
+def enumerate_term(count, sides, keep=None, advantage=0):
+    """Exact distribution of a term without explosions, by listing every roll."""
+    totals = Counter()
+    for dice in product(range(1, sides + 1), repeat=count):
+        kept = sorted(dice)
+        if keep is not None:
+            kept = kept[-keep[1]:] if keep[0] == "h" else kept[:keep[1]]
+        totals[sum(kept)] += 1
+    outcomes = sides ** count
+    if advantage:
+        pick = max if advantage > 0 else min
+        pairs = Counter()
+        for (a, wa), (b, wb) in product(totals.items(), repeat=2):
+            pairs[pick(a, b)] += wa * wb
+        totals, outcomes = pairs, outcomes ** 2
+    return {total: ways / outcomes for total, ways in sorted(totals.items())}
+
+def assert_distribution(expression, expected):
+    actual = dict(compile_dice(expression).distribution())
+    assert actual.keys() == expected.keys()
+    for total, p in expected.items():
+        assert actual[total] == pytest.approx(p, abs=1e-12)
+
+# ==================================
+# Parsing
+# ==================================
+
+def test_parses_terms_and_constants():
+    expression = compile_dice("1d8+2d4-1")
+    assert expression.terms == (DiceTerm(1, 1, 8), DiceTerm(1, 2, 4))
+    assert expression.constant == -1
+    assert str(expression) == "1d8+2d4-1"
+
+def test_modifiers():
+    (term,) = compile_dice("4D6kh3!adv").terms
+    assert term == DiceTerm(1, 4, 6, ("h", 3), True, 1)
+    assert compile_dice("d20dis").terms == (DiceTerm(1, 1, 20, None, False, -1),)
+    assert compile_dice("3d6k2").terms[0].keep == ("h", 2)
+
+def test_compiles_once_per_text():
+    assert compile_dice("2d6+3") is compile_dice("2d6+3")
+
+def test_spaces_only_around_signs():
+    assert str(compile_dice(" 2d6 + 3 ")) == "2d6+3"
+    assert str(compile_dice("- 1 + d4")) == "1d4-1"
+    with pytest.raises(DiceSyntaxError):
+        compile_dice("2d6 3")
+    with pytest.raises(DiceSyntaxError):
+        compile_dice("d20 adv")
+
+@pytest.mark.parametrize("text", [
+    "", "   ", "d", "2d", "2x6", "0d6", "101d6", "1d0", "1d1001", "2d6+", "2d6++3",
+    "4d6kh5", "4d6kh0", "4d6kh2kl1", "2d6!!", "1d1!", "d20advdis", "60d6+60d6",
+])
+def test_rejects(text):
+    with pytest.raises(DiceSyntaxError):
+        compile_dice(text)
+
+def test_rejects_non_strings():
+    with pytest.raises(DiceSyntaxError):
+        compile_dice(20)
+
+@pytest.mark.parametrize("text", ["100d1000", "2d1000kh1", "100d10kh14", "3d100!kh2"])
+def test_accepts_the_largest_distributions(text):
+    compile_dice(text)
+
+@pytest.mark.parametrize("text", ["26d1000!", "4d1000kh2", "100d20kh20", "100d10!kh50"])
+def test_rejects_distributions_too_large_to_work_out(text):
+    with pytest.raises(DiceSyntaxError, match="too many outcomes"):
+        compile_dice(text)
+
+@pytest.mark.parametrize("text", ["1d6+99999999999999999999", "1d6+1000001", "1000000+1d6", "-600000-600000"])
+def test_rejects_totals_out_of_range(text):
+    with pytest.raises(DiceSyntaxError):
+        compile_dice(text)
+
+def test_largest_totals_roll():
+    expression = compile_dice("999000+1d1000")
+    assert expression.maximum == MAX_TOTAL
+    assert expression.roll(np.random.default_rng(3), 10).min() > 999000
+
+def test_simple():
+    assert compile_dice("2d6+3").simple == (2, 6, 3)
+    assert compile_dice("2d6!").simple is None
+    assert compile_dice("-2d6").simple is None
+    assert compile_dice("1d6+1d4").simple is None
+
+# ==================================
+# Distributions
+# ==================================
+
+@pytest.mark.parametrize("text, count, sides, keep, advantage", [
+    ("3d6", 3, 6, None, 0),
+    ("4d6kh3", 4, 6, ("h", 3), 0),
+    ("5d4kl2", 5, 4, ("l", 2), 0),
+    ("d20adv", 1, 20, None, 1),
+    ("d20dis", 1, 20, None, -1),
+    ("3d4kh2dis", 3, 4, ("h", 2), -1),
+])
+def test_matches_enumeration(text, count, sides, keep, advantage):
+    assert_distribution(text, enumerate_term(count, sides, keep, advantage))
+
+def test_exploding_die():
+    expected = {}
+    for explosions in range(EXPLODE_LIMIT):
+        for face in range(1, 6):
+            expected[6 * explosions + face] = 6.0 ** -(explosions + 1)
+    for face in range(1, 7):
+        expected[6 * EXPLODE_LIMIT + face] = 6.0 ** -(EXPLODE_LIMIT + 1)
+    assert_distribution("1d6!", expected)
+    assert 6 not in dict(compile_dice("1d6!").distribution())
+
+def test_constants_and_subtraction():
+    assert_distribution("5-1d4", {1: 0.25, 2: 0.25, 3: 0.25, 4: 0.25})
+    assert_distribution("7", {7: 1.0})
+    d6 = enumerate_term(1, 6)
+    assert_distribution("1d6-1d6", {
+        total: sum(d6[a] * d6[a - total] for a in d6 if a - total in d6) for total in range(-5, 6)
+    })
+
+def test_large_sums_stay_normalized():
+    expression = compile_dice("100d1000")
+    probabilities = [p for _, p in expression.distribution()]
+    assert sum(probabilities) == pytest.approx(1.0)
+    assert expression.mean == pytest.approx(100 * 500.5)
+
+def test_summary_values():
+    expression = compile_dice("4d6kh3")
+    assert expression.mean == pytest.approx(12.2445987654321)
+    assert (expression.minimum, expression.maximum) == (3, 18)
+    exploding = compile_dice("2d6!-3")
+    assert (exploding.minimum, exploding.maximum) == (-1, 2 * 6 * (EXPLODE_LIMIT + 1) - 3)
+    assert (compile_dice("1d4-1d8").minimum, compile_dice("1d4-1d8").maximum) == (-7, 3)
+
+# ==================================
+# Rolling
+# ==================================
+
+@pytest.mark.parametrize("text", ["2d6+3", "4d6kh3", "d20adv", "3d6!", "1d8-1d4", "3d4kl1dis"])
+def test_rolls_stay_in_range_and_match_the_mean(text):
+    expression = compile_dice(text)
+    rolls = expression.roll(np.random.default_rng(7), 20_000)
+    assert rolls.dtype == np.int64
+    assert rolls.min() >= expression.minimum and rolls.max() <= expression.maximum
+    assert rolls.mean() == pytest.approx(expression.mean, abs=0.15)
+
+def test_rolls_replay_from_the_same_seed():
+    expression = compile_dice("4d6!kh3adv")
+    first = expression.roll(np.random.default_rng(11), 100)
+    second = expression.roll(np.random.default_rng(11), 100)
+    assert np.array_equal(first, second)
@@ -0,0 +1,35 @@
+# tests/test_movement.py
+from app.movement import BoardObstacles, _run_length_rows
+from app.pathfinding import BLOCKED
+
+def test_objects_patch_only_their_cells():
+    board = BoardObstacles()
+    board.set_object(1, (frozenset({(2, 1), (3, 1)}), BLOCKED))
+    assert board.costs.shape == (2, 4)
+    assert board.blocked(2, 1) and board.blocked(3, 1)
+    assert board.cost(0, 0) == 1
+    assert board.cost(40, 40) == 1
+    assert board.blocked(-1, 0)
+
+def test_highest_cost_wins_and_removal_uncovers():
+    board = BoardObstacles()
+    board.set_object(1, (frozenset({(1, 1), (2, 1)}), 3))
+    board.set_object(2, (frozenset({(2, 1)}), BLOCKED))
+    assert board.cost(1, 1) == 3 and board.blocked(2, 1)
+    board.set_object(2, None)
+    assert board.cost(2, 1) == 3
+    board.set_object(1, (frozenset({(1, 1)}), 2))
+    assert board.cost(1, 1) == 2 and board.cost(2, 1) == 1
+
+def test_version_changes_with_the_costs():
+    board = BoardObstacles()
+    version = board.version
+    board.set_object(1, (frozenset(), 1))
+    assert board.version == version
+    board.set_object(1, (frozenset({(0, 0)}), BLOCKED))
+    assert board.version != version
+
+def test_run_length_rows():
+    cells = {(1, 0), (2, 0), (3, 0), (5, 0), (0, 2), (1, 2)}
+    assert _run_length_rows(cells) == ((0, 1, 3), (0, 5, 1), (2, 0, 2))
+    assert _run_length_rows(()) == ()
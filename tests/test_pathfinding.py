@@ -0,0 +1,129 @@
+# tests/test_pathfinding.py
+from collections import deque
+
+import numpy as np
+import pytest
+
+from app.pathfinding import BLOCKED, Pathfinder, octile
+from app.spatial_index import GridIndex
+
+def board(*rows):
+    """Cost array from rows of text: '.' open, '#' blocked, a digit is that movement cost."""
+    costs = np.ones((len(rows), len(rows[0])), dtype=np.uint8)
+    for y, row in enumerate(rows):
+        for x, cell in enumerate(row):
+            if cell == "#":
+                costs[y, x] = BLOCKED
+            elif cell != ".":
+                costs[y, x] = int(cell)
+    return costs
+
+def tokens(*cells):
+    grid = GridIndex()
+    for participant_id, (x, y) in enumerate(cells, start=1):
+        grid.set_position(participant_id, x, y)
+    return grid
+
+def test_octile():
+    assert octile(3, -4) == 4
+    assert octile(0, 0) == 0
+
+def test_straight_path_on_open_ground():
+    path = Pathfinder().find_path((0, 0), (3, 3), 6, board("....", "....", "....", "...."), tokens((0, 0)))
+    assert path.cost == 3
+    assert path.cells == ((0, 0), (1, 1), (2, 2), (3, 3))
+
+def test_cells_beyond_the_cost_array_are_open():
+    path = Pathfinder().find_path((1, 1), (12, 1), 11, board("..", ".."), tokens())
+    assert path.cost == 11
+
+def test_goes_around_a_wall():
+    costs = board(
+        ".#...",
+        ".#...",
+        ".....",
+    )
+    path = Pathfinder().find_path((0, 0), (2, 0), 10, costs, tokens())
+    assert path.cost == 4
+    assert all(costs[y, x] != BLOCKED for x, y in path.cells)
+
+def test_no_path_within_budget_or_into_walls():
+    costs = board(".#...", ".#...", ".....")
+    finder = Pathfinder()
+    assert finder.find_path((0, 0), (2, 0), 3, costs, tokens()) is None
+    assert finder.find_path((0, 0), (1, 0), 10, costs, tokens()) is None
+    assert finder.find_path((0, 0), (-1, 0), 10, costs, tokens()) is None
+
+def test_no_squeezing_diagonally_between_two_walls():
+    costs = board(
+        ".#.",
+        "#..",
+        "...",
+    )
+    path = Pathfinder().find_path((0, 0), (1, 1), 10, costs, tokens())
+    assert path is None
+
+def test_other_tokens_block_but_the_mover_does_not():
+    costs = board("...", "...", "...")
+    grid = tokens((0, 1), (1, 1), (1, 0), (1, 2))
+    finder = Pathfinder()
+    # The wall of tokens is only passed below the board
+    assert finder.find_path((0, 1), (2, 1), 10, costs, grid).cells == ((0, 1), (0, 2), (1, 3), (2, 2), (2, 1))
+    assert finder.find_path((0, 1), (2, 1), 3, costs, grid) is None
+    assert finder.find_path((0, 1), (1, 1), 10, costs, grid) is None
+    assert finder.find_path((0, 1), (0, 0), 1, costs, grid).cost == 1
+
+def test_difficult_terrain_costs_more():
+    costs = board(
+        ".2.",
+        "...",
+    )
+    finder = Pathfinder()
+    assert finder.find_path((0, 0), (1, 0), 5, costs, tokens()).cost == 2
+    assert finder.find_path((0, 0), (2, 0), 5, costs, tokens()).cost == 2
+
+def brute_force_reach(start, budget, costs, grid):
+    """Dijkstra by repeated relaxation, straight from the movement rules."""
+    def cost(x, y):
+        if x < 0 or y < 0:
+            return BLOCKED
+        if grid.occupied(x, y) and (x, y) != start:
+            return BLOCKED
+        if y < costs.shape[0] and x < costs.shape[1]:
+            return int(costs[y, x])
+        return 1
+    best = {start: 0}
+    queue = deque([start])
+    while queue:
+        x, y = queue.popleft()
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                step = cost(x + dx, y + dy)
+                if (dx, dy) == (0, 0) or step == BLOCKED:
+                    continue
+                if dx and dy and cost(x + dx, y) == BLOCKED and cost(x, y + dy) == BLOCKED:
+                    continue
+                reached = best[(x, y)] + step
+                if reached <= budget and reached < best.get((x + dx, y + dy), budget + 1):
+                    best[(x + dx, y + dy)] = reached
+                    queue.append((x + dx, y + dy))
+    return best
+
+@pytest.mark.parametrize("seed", range(5))
+def test_reachable_matches_brute_force_and_find_path(seed):
+    rng = np.random.default_rng(seed)
+    costs = rng.choice(np.array([1, 1, 1, 1, 2, 3, BLOCKED], dtype=np.uint8), size=(12, 12))
+    start = (6, 6)
+    costs[start[1], start[0]] = 1
+    grid = tokens(start, *[tuple(cell) for cell in rng.integers(0, 12, size=(4, 2))])
+    finder = Pathfinder()
+    reach = finder.reachable(start, 6, costs, grid)
+    assert reach == brute_force_reach(start, 6, costs, grid)
+    for goal, cost in reach.items():
+        path = finder.find_path(start, goal, 6, costs, grid)
+        assert path.cost == cost
+        assert path.cells[0] == start and path.cells[-1] == goal
+    for y in range(12):
+        for x in range(12):
+            if (x, y) not in reach:
+                assert finder.find_path(start, (x, y), 6, costs, grid) is None
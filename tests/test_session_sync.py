@@ -0,0 +1,56 @@
+# tests/test_session_sync.py
+from app.session_sync import (
+    SessionSnapshotStore,
+    diff_session_snapshots,
+    full_snapshot_message,
+    patch_message,
+)
+
+def snapshot(**fields):
+    base = {"id": 1, "current_mode": "combat", "participants": [], "skill_checks": [], "environmental_objects": []}
+    return {**base, **fields}
+
+def test_no_changes_is_an_empty_patch():
+    old = snapshot(participants=[{"id": 1, "hp": 10}])
+    assert diff_session_snapshots(old, snapshot(participants=[{"id": 1, "hp": 10}])) == {}
+
+def test_plain_fields_are_set():
+    patch = diff_session_snapshots(snapshot(), snapshot(current_mode="staging"))
+    assert patch == {"set": {"current_mode": "staging"}}
+
+def test_changed_item_sends_id_and_changed_fields_only():
+    old = snapshot(participants=[{"id": 1, "hp": 10, "x_pos": 2}])
+    new = snapshot(participants=[{"id": 1, "hp": 7, "x_pos": 2}])
+    assert diff_session_snapshots(old, new) == {"upsert": {"participants": [{"id": 1, "hp": 7}]}}
+
+def test_new_items_are_sent_in_full_and_removed_ones_by_id():
+    old = snapshot(participants=[{"id": 1, "hp": 10}, {"id": 2, "hp": 5}])
+    new = snapshot(participants=[{"id": 1, "hp": 10}, {"id": 3, "hp": 8}])
+    patch = diff_session_snapshots(old, new)
+    assert patch["upsert"] == {"participants": [{"id": 3, "hp": 8}]}
+    assert patch["remove"] == {"participants": [2]}
+    assert "order" not in patch
+
+def test_reordering_sends_the_new_order():
+    old = snapshot(participants=[{"id": 1}, {"id": 2}])
+    new = snapshot(participants=[{"id": 2}, {"id": 1}])
+    assert diff_session_snapshots(old, new) == {"order": {"participants": [2, 1]}}
+
+def test_store_versions_only_bump_on_change():
+    store = SessionSnapshotStore()
+    assert store.advance(7, snapshot()) == (1, None)
+    assert store.advance(7, snapshot()) == (1, {})
+    version, patch = store.advance(7, snapshot(current_mode="staging"))
+    assert (version, patch) == (2, {"set": {"current_mode": "staging"}})
+    assert store.get(7) == (2, snapshot(current_mode="staging"))
+
+def test_store_keeps_the_version_after_forgetting():
+    store = SessionSnapshotStore()
+    store.advance(7, snapshot())
+    store.forget(7)
+    assert store.get(7) is None
+    assert store.advance(7, snapshot()) == (2, None)
+
+def test_messages():
+    assert full_snapshot_message(3, {"id": 1}) == {"type": "session_update", "version": 3, "data": {"id": 1}}
+    assert patch_message(3, {"set": {}}) == {"type": "session_patch", "version": 3, "base_version": 2, "patch": {"set": {}}}
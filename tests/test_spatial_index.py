@@ -0,0 +1,51 @@
+# tests/test_spatial_index.py
+from app.spatial_index import GridIndex
+
+def make_grid(positions):
+    grid = GridIndex(bucket_size=4)
+    for participant_id, (x, y) in positions.items():
+        grid.set_position(participant_id, x, y)
+    return grid
+
+def test_place_move_and_remove():
+    grid = make_grid({1: (0, 0)})
+    assert grid.position(1) == (0, 0)
+    grid.set_position(1, 9, 3)
+    assert grid.position(1) == (9, 3)
+    assert not grid.occupied(0, 0) and grid.occupied(9, 3)
+    grid.remove(1)
+    assert grid.position(1) is None
+    assert len(grid) == 0
+
+def test_within_is_chebyshev_across_buckets():
+    grid = make_grid({1: (3, 3), 2: (5, 5), 3: (6, 3), 4: (8, 8)})
+    assert grid.within(4, 4, 1) == [1, 2]
+    assert grid.within(4, 4, 2) == [1, 2, 3]
+    assert grid.within(4, 4, 4) == [1, 2, 3, 4]
+    assert grid.within(4, 4, -1) == []
+
+def test_at_and_adjacent():
+    grid = make_grid({1: (2, 2), 2: (2, 2), 3: (3, 3), 4: (4, 4)})
+    assert grid.at(2, 2) == [1, 2]
+    assert grid.adjacent(1) == [2, 3]
+    assert grid.adjacent(99) == []
+
+def test_version_changes_only_with_positions():
+    grid = make_grid({1: (1, 1)})
+    version = grid.version
+    grid.set_position(1, 1, 1)
+    assert grid.version == version
+    grid.set_position(1, 2, 1)
+    assert grid.version != version
+
+def test_versions_are_unique_across_indexes():
+    assert GridIndex().version != GridIndex().version
+
+def test_copies_are_independent():
+    grid = make_grid({1: (1, 1), 2: (5, 5)})
+    copied = grid.copy()
+    assert copied.version == grid.version
+    grid.set_position(1, 2, 2)
+    grid.remove(2)
+    assert copied.position(1) == (1, 1) and copied.within(5, 5, 0) == [2]
+    assert copied.at(2, 2) == []
@@ -6,6 +6,7 @@ import GameRoom from './components/GameRoom';
 import HomePage from './components/HomePage';
 import Lobby from './components/Lobby';
 import Token from './components/Token';
+import { applySessionPatch } from './utils/sessionPatch';
 import './App.css';
 
 function App() {
@@ -15,7 +16,10 @@ function App() {
   const [isGmOverride, setIsGmOverride] = useState(false);
   const [error, setError] = useState('');
   const dragPreviewRef = useRef(null);
-  const [newLogTrigger, setNewLogTrigger] = useState(0);
+  // Latest batch of log entries pushed over the WebSocket; GameLog appends them.
+  const [liveLogEntries, setLiveLogEntries] = useState([]);
+  // Version of the last session state received over the WebSocket; patches must build on it.
+  const sessionVersionRef = useRef(null);
 
   // Effect #1: Load initial state from localStorage on startup.
   useEffect(() => {
@@ -36,20 +40,47 @@ function App() {
     if (!sessionData?.id || !playerData?.id) return;
 
     const ws = new WebSocket(`ws://localhost:8000/ws/${sessionData.id}/${playerData.id}`);
+    // The server sends pre-serialized UTF-8 JSON as binary frames
+    ws.binaryType = 'arraybuffer';
+    const decoder = new TextDecoder();
     ws.onopen = () => console.log("WebSocket Connected!");
     ws.onmessage = (event) => {
-      const message = JSON.parse(event.data);
+      const raw = typeof event.data === 'string' ? event.data : decoder.decode(event.data);
+      const message = JSON.parse(raw);
       if (message.type === 'session_update') {
+      sessionVersionRef.current = message.version;
       setSessionData(message.data);
       localStorage.setItem('vyuhaSession', JSON.stringify(message.data));
-    } else if (message.type === 'new_log_entry') {
-      setNewLogTrigger(prev => prev + 1);
+    } else if (message.type === 'session_patch') {
+      if (sessionVersionRef.current !== null && message.version <= sessionVersionRef.current) {
+        // Already covered by a newer full snapshot (the server collapses backlogs into one).
+        return;
+      }
+      if (sessionVersionRef.current !== message.base_version) {
+        // We missed an update; ask the server for a full snapshot instead of patching stale data.
+        if (sessionVersionRef.current !== null) {
+          sessionVersionRef.current = null;
+          ws.send(JSON.stringify({ type: 'resync' }));
+        }
+        return;
+      }
+      sessionVersionRef.current = message.version;
+      setSessionData(prev => {
+        const next = applySessionPatch(prev, message.patch);
+        localStorage.setItem('vyuhaSession', JSON.stringify(next));
+        return next;
+      });
+    } else if (message.type === 'log_entries') {
+      setLiveLogEntries(message.entries);
     }
   };
     ws.onerror = (err) => console.error("WebSocket Error:", err);
     ws.onclose = () => console.log("WebSocket Closed.");
 
-    return () => ws.close();
+    return () => {
+      sessionVersionRef.current = null;
+      ws.close();
+    };
   }, [sessionData?.id, playerData?.id]); // Reconnects only if the session/player fundamentally changes.
 
   // --- HANDLER FUNCTIONS ---
@@ -100,7 +131,7 @@ function App() {
 
   if (sessionData.current_mode === 'lobby') {
     // If the session mode is 'lobby', show the lobby.
-    return <Lobby sessionData={sessionData} playerData={playerData} newLogTrigger={newLogTrigger}/>;
+    return <Lobby sessionData={sessionData} playerData={playerData} liveLogEntries={liveLogEntries}/>;
   }
 
   if (['exploration', 'staging', 'combat'].includes(sessionData.current_mode)) {
@@ -132,7 +163,7 @@ function App() {
           isGM={isGM}
           dragPreviewRef={dragPreviewRef}
           isGmOverride={isGmOverride} 
-          newLogTrigger={newLogTrigger}
+          liveLogEntries={liveLogEntries}
         />
       </>
     );
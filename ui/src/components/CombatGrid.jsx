@@ -6,7 +6,7 @@ import MovementOverlay from './MovementOverlay';
 
 const GRID_CELL_SIZE = 50;
 
-function CombatGrid({ participants, isGM, onTokenMove, onGridClick, onTokenClick, activeParticipantId, showMovementFor }) {
+function CombatGrid({ sessionId, participants, isGM, onTokenMove, onGridClick, onTokenClick, activeParticipantId, showMovementFor, boardKey }) {
   
   const handleDragOver = (e) => e.preventDefault();
   
@@ -39,7 +39,7 @@ function CombatGrid({ participants, isGM, onTokenMove, onGridClick, onTokenClick
       onClick={handleGridClick}
     >
       {/* This correctly renders the movement overlay when needed */}
-      {showMovementFor && <MovementOverlay originX={showMovementFor.x_pos} originY={showMovementFor.y_pos} speed={showMovementFor.remaining_speed} />}
+      {showMovementFor && <MovementOverlay sessionId={sessionId} participant={showMovementFor} boardKey={boardKey} />}
 
       {participants.map(p => (
         (p.x_pos !== null && p.y_pos !== null) && (
@@ -314,25 +314,42 @@ const formatLogEntry = (entry, participants = []) => {
     }
 };
 
+// Entries per request to GET /sessions/{id}/log
+const LOG_PAGE_SIZE = 200;
+
 /**
  * GameLog Component
  * Displays all game events in chronological order
  */
-function GameLog({ sessionId, participants = [], newLogTrigger }) {
+function GameLog({ sessionId, participants = [], liveLogEntries = [] }) {
     const [logEntries, setLogEntries] = useState([]);
     const [isLoading, setIsLoading] = useState(false);
     const [error, setError] = useState(null);
+    const [hasEarlier, setHasEarlier] = useState(false);
     const logEndRef = useRef(null);
+    const lastEntryIdRef = useRef(null);
+
+    // Merges entries by id so the initial fetch and live pushes can arrive in any order
+    const mergeEntries = (current, incoming) => {
+        const byId = new Map(current.map(entry => [entry.id, entry]));
+        incoming.forEach(entry => byId.set(entry.id, entry));
+        return Array.from(byId.values()).sort((a, b) => a.id - b.id);
+    };
 
-    const fetchLog = async () => {
+    // Fetches the newest page, or the page before `beforeId` when scrolling back
+    const fetchLog = async (beforeId = null) => {
         if (!sessionId) return;
         
         setIsLoading(true);
         setError(null);
         
         try {
-            const res = await axios.get(`http://localhost:8000/sessions/${sessionId}/log`);
-            setLogEntries(res.data || []);
+            const params = { limit: LOG_PAGE_SIZE };
+            if (beforeId !== null) params.before_id = beforeId;
+            const res = await axios.get(`http://localhost:8000/sessions/${sessionId}/log`, { params });
+            const page = res.data || [];
+            setHasEarlier(page.length === LOG_PAGE_SIZE);
+            setLogEntries(prev => mergeEntries(prev, page));
         } catch (err) {
             console.error("Failed to fetch game log", err);
             setError("Failed to load game log");
@@ -341,14 +358,26 @@ function GameLog({ sessionId, participants = [], newLogTrigger }) {
         }
     };
 
-    // Fetch log on mount and when triggered
+    // Fetch the full log only on first load; afterwards entries arrive over the WebSocket
     useEffect(() => {
+        setLogEntries([]);
         fetchLog();
-    }, [sessionId, newLogTrigger]);
+    }, [sessionId]);
 
-    // Auto-scroll to bottom
+    // Append entries pushed by the server
     useEffect(() => {
-        logEndRef.current?.scrollIntoView({ behavior: 'smooth' });
+        if (liveLogEntries.length > 0) {
+            setLogEntries(prev => mergeEntries(prev, liveLogEntries));
+        }
+    }, [liveLogEntries]);
+
+    // Auto-scroll to bottom when new entries arrive (not when older ones are loaded)
+    useEffect(() => {
+        const lastId = logEntries.length ? logEntries[logEntries.length - 1].id : null;
+        if (lastId !== lastEntryIdRef.current) {
+            lastEntryIdRef.current = lastId;
+            logEndRef.current?.scrollIntoView({ behavior: 'smooth' });
+        }
     }, [logEntries]);
 
     if (!sessionId) {
@@ -368,6 +397,12 @@ function GameLog({ sessionId, participants = [], newLogTrigger }) {
                     <p className="placeholder-text">Loading log...</p>
                 )}
                 
+                {hasEarlier && logEntries.length > 0 && (
+                    <button className="log-load-earlier" disabled={isLoading} onClick={() => fetchLog(logEntries[0].id)}>
+                        Load earlier entries
+                    </button>
+                )}
+
                 {error && (
                     <p className="log-error">{error}</p>
                 )}
@@ -24,7 +24,7 @@ const initialLayout = [
   { i: 'context', x: 0, y: 0, w: 3, h: 11, minW: 2, minH: 5 },
 ];
 const COLLAPSED_HEIGHT = 1;
-function GameRoom({ sessionData, currentUser, isGM, isGmOverride, dragPreviewRef , newLogTrigger }) {
+function GameRoom({ sessionData, currentUser, isGM, isGmOverride, dragPreviewRef , liveLogEntries }) {
   const [gridTargetAbility, setGridTargetAbility] = useState(null);
   const [selectedAction, setSelectedAction] = useState({ type: 'none', ability: null });
   const [activeCharacterAbilities, setActiveCharacterAbilities] = useState([]);
@@ -73,12 +73,14 @@ function GameRoom({ sessionData, currentUser, isGM, isGmOverride, dragPreviewRef
             <div className="staging-layout">
               <div className="grid-container">
                 <CombatGrid
+                  sessionId={sessionData.id}
                   participants={onGridParticipants}
                   isGM={isGM}
                   onTokenMove={handleTokenMove}
                   onGridClick={handleGridClick}
                   onTokenClick={handleTokenClick}
                   activeParticipantId={activeParticipant?.id}
+                  boardKey={boardKey}
                   showMovementFor={selectedAction.type === 'MOVE' && isMyTurn ? activeParticipant : null}
                   onDragOver={(e) => e.preventDefault()}
                   onDrop={(e) => {
@@ -199,7 +201,10 @@ const handleGiveItem = async (payload) => {
 
   const handleEndTurn = async () => {
     try {
-      await axios.post(`http://localhost:8000/sessions/${sessionData.id}/next_turn`);
+      // Conditional on the version we saw, so a double click can't advance two turns
+      await axios.post(`http://localhost:8000/sessions/${sessionData.id}/next_turn`, null, {
+        params: { expected_version: sessionData.version_id }
+      });
       setTurnActions({ hasAttacked: false });
       setSelectedAction({ type: 'none', ability: null });
     } catch (err) { console.error("Failed to end turn:", err); }
@@ -300,6 +305,13 @@ const handleTokenClick = async (targetId) => {
 
   const onGridParticipants = sessionData.participants.filter(p => p.x_pos !== null && p.x_pos !== undefined);
   const offGridParticipants = sessionData.participants.filter(p => p.x_pos === null || p.x_pos === undefined);
+  // Changes whenever a token moves or an object on the board changes, so the movement overlay refetches
+  const boardKey = JSON.stringify([
+    onGridParticipants.map(p => [p.id, p.x_pos, p.y_pos]),
+    (sessionData.environmental_objects || []).map(o => [
+      o.id, o.is_functional, o.grid_positions, o.camp_metadata, (o.sections || []).map(s => [s.is_destroyed, s.grid_positions]),
+    ]),
+  ]);
 
   return (
     <>
@@ -369,7 +381,7 @@ const handleTokenClick = async (targetId) => {
               <GameLog 
             sessionId={sessionData.id} 
       participants={sessionData.participants}
-      newLogTrigger={newLogTrigger} />
+      liveLogEntries={liveLogEntries} />
             </Panel>
           </div>
 
@@ -8,7 +8,7 @@ import CharacterCreator from './CharacterCreator';
 import NpcManager from './NpcManager';
 import GameLog from './GameLog';
 
-function Lobby({ sessionData, playerData, newLogTrigger }) {
+function Lobby({ sessionData, playerData, liveLogEntries }) {
   const [playersInLobby, setPlayersInLobby] = useState([]);
   const [myCharacters, setMyCharacters] = useState([]);
   const [isLoading, setIsLoading] = useState(false);
@@ -266,7 +266,7 @@ const canStart = isGM && (hasCampaign ? selectedCount > 0 : sessionData.particip
           )}
       {/* Game Log */}
       <div className="lobby-game-log">
-        <GameLog sessionId={sessionData.id} newLogTrigger={newLogTrigger} />
+        <GameLog sessionId={sessionData.id} liveLogEntries={liveLogEntries} />
       </div>
 
       {/* Modals */}
@@ -6,7 +6,7 @@ import CharacterCreator from './CharacterCreator'; // Import the new component
 import NpcManager from './NpcManager';
 import GameLog from './GameLog';
 
-function Lobby({ sessionData, playerData , newLogTrigger }) {
+function Lobby({ sessionData, playerData , liveLogEntries }) {
   const [playersInLobby, setPlayersInLobby] = useState([]);
   const [myCharacters, setMyCharacters] = useState([]);
   const [isLoading, setIsLoading] = useState(false);
@@ -193,7 +193,7 @@ const handleDeselectCharacter = async () => {
             <GameLog 
                 sessionId={sessionData.id}
                 participants={sessionData.participants}
-                newLogTrigger={newLogTrigger}
+                liveLogEntries={liveLogEntries}
             />
         </div>
     </div>
@@ -1,31 +1,45 @@
 // ui/src/components/MovementOverlay.jsx
-import React from 'react';
+import React, { useState, useEffect } from 'react';
+import axios from 'axios';
 
 const GRID_SIZE = 50;
 
-function MovementOverlay({ originX, originY, speed }) {
-  if (originX === null || originY === null || speed <= 0) return null;
+// The server computes reachable cells (around walls and tokens, see app/movement.py)
+// and sends them as run-length rows: [y, first x, number of cells]. boardKey changes when
+// other tokens or board objects do, which changes the answer without touching the mover.
+function MovementOverlay({ sessionId, participant, boardKey }) {
+  const [rows, setRows] = useState([]);
+  const { id, x_pos, y_pos, remaining_speed } = participant || {};
+
+  useEffect(() => {
+    if (!sessionId || id == null || x_pos === null || y_pos === null || remaining_speed <= 0) {
+      setRows([]);
+      return;
+    }
+    let cancelled = false;
+    axios.get(`http://localhost:8000/sessions/${sessionId}/participants/${id}/reachable`)
+      .then(res => { if (!cancelled) setRows(res.data.rows); })
+      .catch(() => { if (!cancelled) setRows([]); });
+    return () => { cancelled = true; };
+  }, [sessionId, id, x_pos, y_pos, remaining_speed, boardKey]);
 
   const reachableSquares = [];
-  // Simple Manhattan distance calculation
-  for (let x = -speed; x <= speed; x++) {
-    for (let y = -speed; y <= speed; y++) {
-      if (Math.abs(x) + Math.abs(y) <= speed) {
-        reachableSquares.push({ x: originX + x, y: originY + y });
-      }
+  rows.forEach(([y, x, length]) => {
+    for (let i = 0; i < length; i++) {
+      reachableSquares.push({ x: x + i, y });
     }
-  }
+  });
 
   return (
     <div className="movement-overlay">
-      {reachableSquares.map((sq, i) => (
-        <div 
-          key={i} 
-          className="movement-square" 
+      {reachableSquares.map(sq => (
+        <div
+          key={`${sq.x},${sq.y}`}
+          className="movement-square"
           style={{ left: sq.x * GRID_SIZE, top: sq.y * GRID_SIZE }}
         />
       ))}
     </div>
   );
 }
-export default MovementOverlay;
\ No newline at end of file
+export default MovementOverlay;
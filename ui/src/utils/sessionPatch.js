@@ -0,0 +1,34 @@
+// ui/src/utils/sessionPatch.js
+// Applies a keyed `session_patch` from the server (see app/session_sync.py) to the current session data.
+
+const KEYED_COLLECTIONS = ['participants', 'skill_checks', 'environmental_objects'];
+
+const patchCollection = (items = [], upserts = [], removedIds = [], order = null) => {
+  const removed = new Set(removedIds);
+  const byId = new Map();
+  items.forEach(item => {
+    if (!removed.has(item.id)) byId.set(item.id, item);
+  });
+
+  upserts.forEach(change => {
+    const existing = byId.get(change.id);
+    // Existing items only carry the fields that changed; new items arrive in full
+    byId.set(change.id, existing ? { ...existing, ...change } : change);
+  });
+
+  const ids = order || Array.from(byId.keys());
+  return ids.map(id => byId.get(id)).filter(Boolean);
+};
+
+export const applySessionPatch = (sessionData, patch) => {
+  const next = { ...sessionData, ...(patch.set || {}) };
+  KEYED_COLLECTIONS.forEach(collection => {
+    const upserts = patch.upsert?.[collection];
+    const removedIds = patch.remove?.[collection];
+    const order = patch.order?.[collection];
+    if (upserts || removedIds || order) {
+      next[collection] = patchCollection(sessionData[collection], upserts, removedIds, order);
+    }
+  });
+  return next;
+};